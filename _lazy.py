@@ -0,0 +1,19 @@
+"""Optional dependencies that are imported on first use."""
+
+import functools
+
+
+@functools.cache
+def load_numpy():
+    """The numpy module, or None when it is not installed.
+
+    NumPy is optional and slow to import, so it is only imported by the
+    first call. entity_store.py calls this from every bulk operation and
+    transform.py only for batches large enough to benefit; both fall back
+    to plain Python loops when it returns None.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
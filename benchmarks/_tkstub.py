@@ -0,0 +1,118 @@
+"""Headless stand-ins for the Tk widgets used by CADApp.
+
+Benchmarks use a real Tk instance when a display is available (for example
+under ``xvfb-run``). Otherwise CADApp is built on these stubs, which keep the
+canvas item bookkeeping but do not rasterise anything.
+"""
+
+import tkinter as tk
+import types
+
+
+class StubWidget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    def get(self):
+        return "0"
+
+
+class StubCanvas(StubWidget):
+    """Minimal in-memory model of a Tk canvas: items with coords and tags."""
+
+    def __init__(self, *args, **kwargs):
+        self.items = {}
+        self._next_id = 1
+
+    def _create(self, kind, coords, kwargs):
+        item_id = self._next_id
+        self._next_id += 1
+        tags = kwargs.get("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        self.items[item_id] = [kind, list(coords), tuple(tags), kwargs]
+        return item_id
+
+    def create_line(self, *coords, **kwargs):
+        return self._create("line", coords, kwargs)
+
+    def create_rectangle(self, *coords, **kwargs):
+        return self._create("rectangle", coords, kwargs)
+
+    def create_text(self, *coords, **kwargs):
+        return self._create("text", coords, kwargs)
+
+    def find_withtag(self, tag_or_id):
+        if tag_or_id == "all":
+            return tuple(self.items)
+        if isinstance(tag_or_id, int):
+            return (tag_or_id,) if tag_or_id in self.items else ()
+        return tuple(i for i, item in self.items.items() if tag_or_id in item[2])
+
+    def delete(self, *tags_or_ids):
+        for tag_or_id in tags_or_ids:
+            for item_id in self.find_withtag(tag_or_id):
+                del self.items[item_id]
+
+    def move(self, tag_or_id, dx, dy):
+        for item_id in self.find_withtag(tag_or_id):
+            coords = self.items[item_id][1]
+            coords[0::2] = [x + dx for x in coords[0::2]]
+            coords[1::2] = [y + dy for y in coords[1::2]]
+
+    def scale(self, tag_or_id, x0, y0, fx, fy):
+        for item_id in self.find_withtag(tag_or_id):
+            coords = self.items[item_id][1]
+            coords[0::2] = [x0 + (x - x0) * fx for x in coords[0::2]]
+            coords[1::2] = [y0 + (y - y0) * fy for y in coords[1::2]]
+
+    def coords(self, item_id, *coords):
+        if coords:
+            self.items[item_id][1] = list(coords)
+        return self.items[item_id][1]
+
+    def itemconfig(self, tag_or_id, **kwargs):
+        for item_id in self.find_withtag(tag_or_id):
+            self.items[item_id][3].update(kwargs)
+
+    def gettags(self, item_id):
+        return self.items[item_id][2]
+
+    def find_closest(self, x, y):
+        def distance(item_id):
+            coords = self.items[item_id][1]
+            return min((cx - x) ** 2 + (cy - y) ** 2 for cx, cy in zip(coords[0::2], coords[1::2]))
+        return (min(self.items, key=distance),) if self.items else ()
+
+
+def headless_tk():
+    """Namespace usable in place of the ``tkinter`` module inside cad_tool."""
+    stub = types.SimpleNamespace(**{name: getattr(tk, name) for name in dir(tk) if name.isupper()})
+    stub.TclError = tk.TclError
+    stub.Tk = StubWidget
+    stub.Canvas = StubCanvas
+    stub.Frame = stub.Label = stub.Entry = stub.Button = StubWidget
+    return stub
+
+
+def make_app():
+    """Create a CADApp on a real (withdrawn) Tk root if possible, else on stubs.
+
+    The app's first frame, which CADApp defers until the window is idle, is
+    drawn before returning.
+    """
+    import cad_tool
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        cad_tool.tk = headless_tk()
+        app, real_tk = cad_tool.CADApp(StubWidget()), False
+    else:
+        root.withdraw()
+        app, real_tk = cad_tool.CADApp(root), True
+    app.redraw_all()
+    return app, real_tk
@@ -0,0 +1,72 @@
+"""Scaling of BulkProcessor operations from 1 to N worker processes.
+
+Usage::
+
+    python -m benchmarks.bench_bulk_ops [--size 1000000] [--workers 1 2 4 8]
+
+Times each bulk operation on a fresh store for every worker count, prints
+the speedup over the first worker count and checks that every worker count
+leaves the store (and returns results) identical to the first run. The pool
+is started before timing, so process start-up is not counted.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bulk_ops import BulkProcessor
+from benchmarks.bench_entity_store import build_store
+
+OPERATIONS = [
+    ("set_length", lambda bulk, rows: bulk.set_length(2.0, rows)),
+    ("set_width", lambda bulk, rows: bulk.set_width(3.0, rows)),
+    ("translate", lambda bulk, rows: bulk.translate(1.0, 2.0)),
+    ("scale", lambda bulk, rows: bulk.scale(1.5, 10.0, 20.0)),
+    ("bbox", lambda bulk, rows: bulk.bounding_box()),
+    ("report", lambda bulk, rows: bulk.measurement_report()),
+    ("encode dxf", lambda bulk, rows: len(bulk.encode("dxf"))),
+]
+
+
+def run(size, workers):
+    store = build_store(size)
+    rows = range(0, size, 2)
+    timings = []
+    results = []
+    with BulkProcessor(store, workers) as bulk:
+        bulk.bounding_box() # starts the pool
+        for _, operation in OPERATIONS:
+            start = time.perf_counter()
+            results.append(operation(bulk, rows))
+            timings.append(time.perf_counter() - start)
+    columns = [column.tobytes() for column in store._columns()]
+    return timings, results, columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    print(f"{args.size} entities, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} " + " ".join(f"{name:>12}" for name, _ in OPERATIONS))
+    baseline = None
+    identical = True
+    for workers in args.workers:
+        timings, results, columns = run(args.size, workers)
+        if baseline is None:
+            baseline = timings, results, columns
+        elif (results, columns) != baseline[1:]:
+            identical = False
+        print(f"{workers:>7} " + " ".join(f"{t * 1e3:>9.0f} ms" for t in timings))
+        print(f"{'':>7} " + " ".join(f"{base / t:>11.2f}x" for base, t in zip(baseline[0], timings)))
+    print("results identical across worker counts:", "yes" if identical else "NO")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Constraint solver benchmark: dimension edit latency on large sketches.
+
+Usage::
+
+    python -m benchmarks.bench_constraints [--components 10 100 1000] [--chain 20] [--edits 20]
+                                           [--fan 1500] [--budget-ms 100]
+
+Each component is a zig-zag chain of --chain lines joined end to start by
+coincident constraints (added automatically), with every length driving.
+An edit re-solves only the chain containing the edited line, so its latency
+should depend on --chain and not on the number of components.
+
+A fan of --fan lines sharing their start point checks that entities meeting
+at one point get one coincident constraint each, not one per pair, and that
+editing a line of the fan stays within --budget-ms. The exit status is 1 if
+either check fails.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from model import Drawing
+
+
+def build(drawing, components, chain):
+    chains = []
+    for c in range(components):
+        y = c * 10.0
+        lines = []
+        for i in range(chain):
+            lines.append(drawing.add_line(i * 3.0, y + (i % 2) * 4.0, (i + 1) * 3.0, y + ((i + 1) % 2) * 4.0))
+        for line in lines:
+            drawing.set_dimension(line, "length", line.length())
+        chains.append(lines)
+    return chains
+
+
+def build_fan(drawing, fan):
+    return [drawing.add_line(0.0, 0.0, 10 * math.cos(2 * math.pi * k / fan), 10 * math.sin(2 * math.pi * k / fan))
+            for k in range(fan)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--chain", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--fan", type=int, default=1500, help="lines sharing one point (0 to skip)")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="longest allowed mean fan edit")
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'entities':>9} {'constraints':>12} {'build':>9} {'edit':>10} {'undo':>10}")
+    for components in args.components:
+        drawing = Drawing()
+        start = time.perf_counter()
+        chains = build(drawing, components, args.chain)
+        build_time = time.perf_counter() - start
+
+        rng = random.Random(0)
+        edit_times = []
+        undo_times = []
+        for _ in range(args.edits):
+            line = rng.choice(rng.choice(chains))
+            start = time.perf_counter()
+            drawing.set_dimension(line, "length", line.length() * rng.uniform(0.8, 1.2))
+            edit_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            drawing.undo()
+            undo_times.append(time.perf_counter() - start)
+
+        edit = sum(edit_times) / len(edit_times)
+        undo = sum(undo_times) / len(undo_times)
+        print(f"{components:>10} {len(drawing):>9} {len(drawing.constraints):>12} {build_time:>7.2f} s "
+              f"{edit * 1000:>7.2f} ms {undo * 1000:>7.2f} ms")
+
+    if not args.fan:
+        return
+    drawing = Drawing()
+    start = time.perf_counter()
+    lines = build_fan(drawing, args.fan)
+    build_time = time.perf_counter() - start
+    rng = random.Random(0)
+    edit_times = []
+    for _ in range(args.edits):
+        line = rng.choice(lines)
+        start = time.perf_counter()
+        drawing.set_dimension(line, "length", line.length() * rng.uniform(0.8, 1.2))
+        edit_times.append(time.perf_counter() - start)
+        drawing.undo()
+    edit = sum(edit_times) / len(edit_times)
+    print(f"{'fan':>10} {len(drawing):>9} {len(drawing.constraints):>12} {build_time:>7.2f} s {edit * 1000:>7.2f} ms")
+
+    failed = False
+    if len(drawing.constraints) != args.fan - 1:
+        print(f"REGRESSION: a fan of {args.fan} lines has {len(drawing.constraints)} constraints, "
+              f"expected {args.fan - 1}")
+        failed = True
+    if edit * 1000 > args.budget_ms:
+        print(f"REGRESSION: mean fan edit exceeds {args.budget_ms} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
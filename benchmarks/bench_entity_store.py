@@ -0,0 +1,102 @@
+"""Memory and throughput: EntityStore columns versus Line/Rectangle objects.
+
+Usage::
+
+    python -m benchmarks.bench_entity_store [--sizes 100000 1000000]
+
+Reports whether NumPy was available, since the store vectorises bulk
+operations with it and falls back to plain loops otherwise.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from _lazy import load_numpy
+from entity_store import EntityStore
+from geometry import Point, Line, Rectangle
+
+
+def coordinates(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        x, y = rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)
+        yield i % 2, x, y, x + rng.uniform(0.5, 5), y + rng.uniform(0.5, 5)
+
+
+def build_objects(count):
+    return [Line(Point(x1, y1), Point(x2, y2)) if odd else Rectangle(Point(x1, y1), Point(x2, y2))
+            for odd, x1, y1, x2, y2 in coordinates(count)]
+
+
+def build_store(count):
+    store = EntityStore()
+    for odd, x1, y1, x2, y2 in coordinates(count):
+        if odd:
+            store.add_line(x1, y1, x2, y2)
+        else:
+            store.add_rectangle(x1, y1, x2, y2)
+    return store
+
+
+def measure_memory(build, count):
+    tracemalloc.start()
+    result = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def objects_translate(objects, dx, dy):
+    for obj in objects:
+        for point in ((obj.start, obj.end) if isinstance(obj, Line) else (obj.p1, obj.p2)):
+            point.x += dx
+            point.y += dy
+
+
+def objects_bounding_box(objects):
+    boxes = [obj.bounding_box() for obj in objects]
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def objects_total_length(objects):
+    return sum(obj.length() for obj in objects if isinstance(obj, Line))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if load_numpy() is not None else 'no'}")
+    print(f"{'entities':>9} {'layout':>8} {'memory':>10} {'translate':>10} {'bbox':>9} {'length sum':>11}")
+    for count in args.sizes:
+        objects, objects_size = measure_memory(build_objects, count)
+        rows = [
+            ("objects", objects_size,
+             timed(lambda: objects_translate(objects, 1.0, 2.0)),
+             timed(lambda: objects_bounding_box(objects)),
+             timed(lambda: objects_total_length(objects))),
+        ]
+        del objects
+        store, store_size = measure_memory(build_store, count)
+        rows.append(("store", store_size,
+                     timed(lambda: store.translate(1.0, 2.0)),
+                     timed(store.bounding_box),
+                     timed(store.total_length)))
+        del store
+        for layout, size, translate, bbox, total in rows:
+            print(f"{count:>9} {layout:>8} {size / 2**20:>7.1f} MB {translate * 1e3:>7.1f} ms "
+                  f"{bbox * 1e3:>6.1f} ms {total * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Event coalescing benchmark: per-event rendering versus one frame per burst.
+
+Usage::
+
+    python -m benchmarks.bench_events [--entities 10000] [--bursts 20] [--events 10]
+
+Each burst stands for the motion and wheel events arriving within one frame.
+The synchronous run applies every event as it arrives; the coalesced run
+feeds them to the frame scheduler and renders once per burst.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks._tkstub import make_app
+from benchmarks.bench_render import populate
+
+
+def make_bursts(bursts, events, seed=0):
+    rng = random.Random(seed)
+    result = []
+    for _ in range(bursts):
+        burst = []
+        for _ in range(events):
+            if rng.random() < 0.8:
+                burst.append(("pan", rng.uniform(-5, 5), rng.uniform(-5, 5)))
+            else:
+                burst.append(("zoom", rng.choice((1.1, 1 / 1.1)), rng.uniform(0, 800), rng.uniform(0, 600)))
+        result.append(burst)
+    return result
+
+
+def run_synchronous(app, bursts):
+    for burst in bursts:
+        for kind, *args in burst:
+            if kind == "pan":
+                app._pan_view(*args)
+            else:
+                app._zoom_view(*args)
+
+
+def run_coalesced(app, bursts):
+    scheduler = app.frame_scheduler
+    for burst in bursts:
+        for kind, *args in burst:
+            if kind == "pan":
+                scheduler.pan(*args)
+            else:
+                scheduler.zoom(*args)
+        scheduler.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--events", type=int, default=10, help="events per burst")
+    args = parser.parse_args()
+
+    app, real_tk = make_app()
+    bursts = make_bursts(args.bursts, args.events)
+    print(f"canvas: {'Tk' if real_tk else 'stub'}, {args.entities} entities")
+    for name, run in (("synchronous", run_synchronous), ("coalesced", run_coalesced)):
+        app.scale, app.offset_x, app.offset_y = 10.0, app.canvas_width / 2, app.canvas_height / 2
+        populate(app, args.entities)
+        start = time.perf_counter()
+        run(app, bursts)
+        if real_tk:
+            app.canvas.update_idletasks()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {elapsed / args.bursts * 1000:8.1f} ms per burst of {args.events} events")
+    stats = app.frame_scheduler.stats()
+    print(f"events received {stats['events_received']}, frames rendered {stats['frames_rendered']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Throughput and memory of streaming DXF/SVG import, export and conversion.
+
+Usage::
+
+    python -m benchmarks.bench_file_io [--megabytes 200] [--target 50000] [--dir /tmp]
+
+Writes a synthetic DXF of roughly the requested size, then times reading it,
+converting it to SVG and reading the SVG back, in entities per second. Peak
+Python heap use of the DXF-to-SVG conversion is measured in a separate,
+traced pass; with streaming it stays flat regardless of file size.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import drawing_io
+from geometry import Point, Line, Rectangle
+
+
+def synthetic_entities(approx_bytes, seed=0):
+    # A LINE entity takes roughly 150 bytes of DXF text
+    rng = random.Random(seed)
+    for i in range(approx_bytes // 150):
+        x, y = rng.uniform(-1e4, 1e4), rng.uniform(-1e4, 1e4)
+        if i % 2:
+            yield Line(Point(x, y), Point(x + rng.uniform(-50, 50), y + rng.uniform(-50, 50)))
+        else:
+            yield Rectangle(Point(x, y), Point(x + rng.uniform(1, 50), y + rng.uniform(1, 50)))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def count(entities):
+    return sum(1 for _ in entities)
+
+
+def report(label, entities, seconds, target):
+    rate = entities / seconds if seconds else float("inf")
+    verdict = "ok" if rate >= target else "BELOW TARGET"
+    print(f"{label:<22} {entities:>10} entities {seconds:>8.2f} s {rate:>12,.0f} entities/s  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=200)
+    parser.add_argument("--target", type=float, default=50000, help="target throughput in entities per second")
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    parser.add_argument("--skip-memory", action="store_true", help="skip the traced memory pass")
+    args = parser.parse_args()
+
+    dxf_path = os.path.join(args.dir, "bench_file_io.dxf")
+    svg_path = os.path.join(args.dir, "bench_file_io.svg")
+    try:
+        written, seconds = timed(lambda: drawing_io.write(dxf_path, synthetic_entities(args.megabytes * 2**20)))
+        print(f"DXF file: {os.path.getsize(dxf_path) / 2**20:.0f} MB")
+        report("write dxf", written, seconds, args.target)
+
+        read, seconds = timed(lambda: count(drawing_io.read(dxf_path)))
+        report("read dxf", read, seconds, args.target)
+
+        converted, seconds = timed(lambda: drawing_io.convert(dxf_path, svg_path))
+        report("convert dxf -> svg", converted, seconds, args.target)
+
+        read, seconds = timed(lambda: count(drawing_io.read(svg_path)))
+        report("read svg", read, seconds, args.target)
+
+        if not args.skip_memory:
+            tracemalloc.start()
+            drawing_io.convert(dxf_path, svg_path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"peak heap during dxf -> svg conversion: {peak / 2**20:.1f} MB")
+    finally:
+        for path in (dxf_path, svg_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
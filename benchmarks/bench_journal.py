@@ -0,0 +1,88 @@
+"""Undo journal benchmark: memory per recorded step and undo/redo latency.
+
+Usage::
+
+    python -m benchmarks.bench_journal [--sizes 10000 100000] [--steps 10000]
+
+For each drawing size, records --steps dimension edits, then undoes and
+redoes them all, and times clearing the drawing and undoing the clear.
+Memory per step is the traced allocation growth of the edits divided by
+the step count, in total and for the journal alone (allocations made in
+model.py and journal.py, excluding the index updates). It and the latencies
+should not grow with the drawing.
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from benchmarks.bench_spatial_index import make_objects
+from lod import LodIndex
+import journal
+import model
+from model import Drawing
+
+# Allocations made by the journal and the deltas recorded in model.py
+JOURNAL_FILTERS = [tracemalloc.Filter(True, os.path.abspath(module.__file__)) for module in (journal, model)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--steps", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'bytes/step':>11} {'journal':>8} {'undo':>10} {'redo':>10} {'clear':>10} {'undo clear':>11} {'restore':>10}")
+    for count in args.sizes:
+        drawing = Drawing(lod_index=LodIndex())
+        with drawing.journal.group():
+            for obj in make_objects(count)[0]:
+                drawing.add(obj)
+        start_checkpoint = drawing.checkpoint()
+
+        rng = random.Random(1)
+        edits = []
+        for _ in range(args.steps):
+            obj = rng.choice(drawing.objects)
+            dim_type = "width" if hasattr(obj, "set_width") else "length"
+            edits.append((obj, dim_type, rng.uniform(0.5, 5)))
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        snapshot = tracemalloc.take_snapshot()
+        for obj, dim_type, value in edits:
+            drawing.set_dimension(obj, dim_type, value)
+        per_step = (tracemalloc.get_traced_memory()[0] - before) / args.steps
+        growth = tracemalloc.take_snapshot().filter_traces(JOURNAL_FILTERS).compare_to(
+            snapshot.filter_traces(JOURNAL_FILTERS), "filename")
+        journal_per_step = sum(stat.size_diff for stat in growth) / args.steps
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            drawing.undo()
+        undo = (time.perf_counter() - start) / args.steps
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            drawing.redo()
+        redo = (time.perf_counter() - start) / args.steps
+
+        start = time.perf_counter()
+        drawing.clear()
+        clear = time.perf_counter() - start
+        start = time.perf_counter()
+        drawing.undo()
+        undo_clear = time.perf_counter() - start
+
+        start = time.perf_counter()
+        drawing.restore(start_checkpoint)
+        restore = time.perf_counter() - start
+
+        print(f"{count:>9} {per_step:>11.0f} {journal_per_step:>8.0f} {undo * 1e6:>7.1f} us {redo * 1e6:>7.1f} us "
+              f"{clear * 1e6:>7.1f} us {undo_clear * 1e6:>8.1f} us {restore * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
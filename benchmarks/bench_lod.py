@@ -0,0 +1,42 @@
+"""Level-of-detail benchmark: canvas items and frame time of a zoomed-out view.
+
+Usage::
+
+    python -m benchmarks.bench_lod [--sizes 1000 10000 100000] [--scale 0.25] [--frames 5]
+
+Entities are 0.5 to 5 units across, so at the default scale of 0.25 pixels
+per unit they are aggregated into LOD tiles and the item count is bounded by
+the canvas size rather than the drawing size.
+"""
+
+import argparse
+
+from benchmarks._tkstub import make_app
+from benchmarks.bench_render import populate, time_frames, pan_frame, zoom_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scale", type=float, default=0.25)
+    parser.add_argument("--frames", type=int, default=5)
+    args = parser.parse_args()
+
+    app, real_tk = make_app()
+    app.scale = args.scale
+    print(f"canvas: {'Tk' if real_tk else 'stub'}, scale {args.scale} px/unit, LOD level {app._lod_level()}")
+    print(f"{'entities':>9} {'items':>7} {'lod tiles':>10} {'redraw':>10} {'pan':>10} {'zoom':>10}")
+    for count in args.sizes:
+        app.scale = args.scale
+        app.offset_x, app.offset_y = app.canvas_width / 2, app.canvas_height / 2
+        populate(app, count)
+        items = len(app.object_items)
+        tiles = len(app.lod_tile_items)
+        redraw = time_frames(app, lambda i: app.redraw_all(), args.frames, real_tk)
+        pan = time_frames(app, pan_frame(app), args.frames, real_tk)
+        zoom = time_frames(app, zoom_frame(app), args.frames, real_tk)
+        print(f"{count:>9} {items:>7} {tiles:>10} {redraw * 1000:>7.1f} ms {pan * 1000:>7.1f} ms {zoom * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Save, open and viewport-load times of the native format versus DXF.
+
+Usage::
+
+    python -m benchmarks.bench_native_format [--sizes 100000 1000000] [--dir /tmp]
+
+Opening a native file only maps it, so the open time should stay flat as the
+drawing grows; materialising one viewport should depend on what is in the
+viewport rather than on the drawing size. "long line" repeats the viewport
+load with one line across the whole drawing added, which must not make the
+viewport look at every entity.
+
+Files of version 1, which have no entity IDs, must still work with
+queries.py: the same drawing written as version 1 and as the current
+version must give the same query results, with an ID for every entity.
+The exit status is 1 if they do not.
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+import drawing_io
+import native_format
+import queries
+from entity_store import LINE, RECTANGLE
+from geometry import Point, Line, Rectangle, coordinates
+from model import Drawing
+
+
+def synthetic_entities(count, seed=0, long_line=False):
+    rng = random.Random(seed)
+    extent = (count ** 0.5) * 5
+    if long_line:
+        yield Line(Point(-extent, -extent), Point(extent, extent))
+    for i in range(count):
+        x, y = rng.uniform(-extent, extent), rng.uniform(-extent, extent)
+        if i % 2:
+            yield Line(Point(x, y), Point(x + rng.uniform(-5, 5), y + rng.uniform(-5, 5)))
+        else:
+            yield Rectangle(Point(x, y), Point(x + rng.uniform(0.5, 5), y + rng.uniform(0.5, 5)))
+
+
+def write_version1(path, objects, cell_size=10.0):
+    # The version 1 layout: no IDs, one level, four int64 per directory entry
+    records = sorted((math.floor((x1 + x2) / 2 / cell_size), math.floor((y1 + y2) / 2 / cell_size),
+                      LINE if isinstance(obj, Line) else RECTANGLE, (x1, y1, x2, y2))
+                     for obj in objects for x1, y1, x2, y2 in [coordinates(obj)])
+    count = len(records)
+    directory = array("q")
+    for position, (cx, cy, _, _) in enumerate(records):
+        if directory and directory[-4] == cx and directory[-3] == cy:
+            directory[-1] += 1
+        else:
+            directory.extend((cx, cy, position, 1))
+    coords = array("d", [c for *_, record in records for c in record])
+    half_width = max((abs(r[2] - r[0]) for *_, r in records), default=0.0) / 2
+    half_height = max((abs(r[3] - r[1]) for *_, r in records), default=0.0) / 2
+    kinds_offset = native_format.HEADER_V1.size
+    coords_offset = native_format._align(kinds_offset + count)
+    directory_offset = coords_offset + 32 * count
+    with open(path, "wb") as f:
+        f.write(native_format.HEADER_V1.pack(native_format.MAGIC, 1, 0, count, cell_size, half_width, half_height,
+                                             kinds_offset, coords_offset, directory_offset, len(directory) // 4))
+        f.write(struct.pack(f"<{count}b", *(kind for _, _, kind, _ in records)))
+        f.write(b"\0" * (coords_offset - kinds_offset - count))
+        f.write(coords.tobytes())
+        f.write(directory.tobytes())
+
+
+def query_results(drawing):
+    # The query results of a mapped drawing that do not depend on record order
+    found = queries.intersections(drawing)
+    lengths, areas = queries.lengths(drawing), queries.areas(drawing)
+    ids = [obj.eid for obj in drawing]
+    nearest = queries.nearest(drawing, [0.0, 30.0, 500.0], [0.0, -20.0, 500.0])
+    window = queries.select_window(drawing, -20, -20, 20, 20)
+    return {
+        "ids": len(ids) == len(set(ids)) and all(isinstance(eid, int) and eid > 0 for eid in ids),
+        "intersections": sorted(zip(found.x, found.y)),
+        "lengths": sorted(lengths[1]),
+        "areas": sorted(areas[1]),
+        "nearest": list(nearest[1]),
+        "window": sorted(coordinates(drawing.entity(eid)) for eid in window),
+    }
+
+
+def check_version1(directory, count=2000):
+    """Whether a version 1 file gives the same query results as the current version."""
+    results = []
+    for version in (1, native_format.VERSION):
+        path = os.path.join(directory, f"bench_native_format_v{version}.izc")
+        if version == 1:
+            write_version1(path, synthetic_entities(count))
+        else:
+            native_format.save(path, synthetic_entities(count))
+        drawing = Drawing()
+        drawing.open_mapped(path)
+        try:
+            results.append(query_results(drawing))
+            new = drawing.add_line(0.0, 0.0, 1.0, 1.0)
+            results[-1]["new id"] = all(obj.eid != new.eid for obj in drawing if obj is not new)
+        finally:
+            drawing.source.close()
+            os.remove(path)
+    return results[0] == results[1] and results[0]["ids"] and results[0]["new id"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    parser.add_argument("--skip-dxf", action="store_true", help="do not time DXF for comparison")
+    args = parser.parse_args()
+
+    native_path = os.path.join(args.dir, "bench_native_format.izc")
+    dxf_path = os.path.join(args.dir, "bench_native_format.dxf")
+    print(f"{'entities':>9} {'save':>9} {'open':>10} {'viewport':>10} {'in view':>8} {'long line':>10} {'dxf load':>9}")
+    try:
+        for count in args.sizes:
+            _, save = timed(lambda: drawing_io.write(native_path, synthetic_entities(count)))
+
+            drawing = Drawing()
+            _, open_time = timed(lambda: drawing.open_mapped(native_path))
+            # An 80 x 60 unit viewport, as shown by the GUI at its default zoom
+            _, viewport = timed(lambda: drawing.materialize(-40, -30, 40, 30))
+            in_view = len(drawing.objects)
+            drawing.clear()
+
+            drawing_io.write(native_path, synthetic_entities(count, long_line=True))
+            drawing.open_mapped(native_path)
+            _, long_line = timed(lambda: drawing.materialize(-40, -30, 40, 30))
+            drawing.clear()
+
+            dxf_load = float("nan")
+            if not args.skip_dxf:
+                drawing_io.write(dxf_path, synthetic_entities(count))
+                _, dxf_load = timed(lambda: Drawing().objects.extend(drawing_io.read(dxf_path)))
+
+            print(f"{count:>9} {save:>7.2f} s {open_time * 1e3:>7.2f} ms {viewport * 1e3:>7.2f} ms "
+                  f"{in_view:>8} {long_line * 1e3:>7.2f} ms {dxf_load:>7.2f} s")
+    finally:
+        for path in (native_path, dxf_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    legacy = check_version1(args.dir)
+    print("version 1 file gives the same query results:", "yes" if legacy else "NO")
+    if not legacy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Rubber-band preview benchmark: canvas item count and per-event latency.
+
+Usage::
+
+    python -m benchmarks.bench_preview [--events 2000] [--max-latency-ms 2.0]
+
+Drives synthetic motion events through the interactive rectangle preview
+and fails if the canvas item count changes after the first event or the
+mean per-event latency exceeds --max-latency-ms.
+"""
+
+import argparse
+import math
+import sys
+import time
+import types
+
+from benchmarks._tkstub import make_app
+from geometry import Point
+
+
+def motion_events(count, width, height):
+    # Cursor moving on a Lissajous curve around the canvas
+    for i in range(count):
+        t = i / 50
+        yield types.SimpleNamespace(x=width / 2 + width / 3 * math.sin(3 * t),
+                                    y=height / 2 + height / 3 * math.sin(2 * t))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--max-latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app, real_tk = make_app()
+    # Enter interactive drawing with a first corner set, as after the first click
+    app.current_drawing_mode = "draw_rectangle_interactive"
+    app.interactive_start_point_cad = Point(0, 0)
+
+    events = list(motion_events(args.events, app.canvas_width, app.canvas_height))
+    item_counts = set()
+    times = []
+    for i, event in enumerate(events):
+        start = time.perf_counter()
+        app.on_mouse_move(event)
+        app.frame_scheduler.flush()
+        if real_tk:
+            app.canvas.update_idletasks()
+        times.append(time.perf_counter() - start)
+        if i > 0:
+            item_counts.add(len(app.canvas.find_withtag("all")))
+
+    mean = sum(times) / len(times) * 1000
+    worst = max(times) * 1000
+    print(f"canvas: {'Tk' if real_tk else 'stub'}")
+    print(f"{args.events} motion events: mean {mean:.3f} ms, max {worst:.3f} ms per event")
+    print(f"canvas items during drag: {sorted(item_counts)}")
+
+    failures = []
+    if len(item_counts) != 1:
+        failures.append("canvas item count changed during the drag")
+    if mean > args.max_latency_ms:
+        failures.append(f"mean latency {mean:.3f} ms exceeds {args.max_latency_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Offscreen PNG rendering: tile renders with and without the cache, and thumbnails.
+
+Usage::
+
+    python -m benchmarks.bench_raster [--size 10000] [--image 1024] [--workers 1 4]
+                                      [--parts 200]
+
+Renders a line soup of --size entities into an --image x --image view for
+every worker count, first with an empty tile cache and then again with the
+cache filled, and checks that every worker count produces the same pixels.
+Then times write_thumbnail() over --parts small generated parts, as the
+batch mode's thumbnail command does.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.generators import generate
+from model import Drawing
+from raster import TileRenderer, drawing_bounding_box, fit_view, write_thumbnail
+
+
+def build(objects):
+    drawing = Drawing(auto_constrain=False)
+    for obj in objects:
+        drawing.add(obj)
+    return drawing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--image", type=int, default=1024)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--parts", type=int, default=200)
+    args = parser.parse_args()
+
+    drawing = build(generate("soup", args.size))
+    view = fit_view(drawing_bounding_box(drawing), args.image, args.image)
+    print(f"{args.size} entities, {args.image}x{args.image} pixels, {os.cpu_count()} CPUs")
+    reference = None
+    for workers in args.workers:
+        with TileRenderer(workers=workers) as renderer:
+            start = time.perf_counter()
+            image = renderer.render(drawing, args.image, args.image, *view)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            renderer.render(drawing, args.image, args.image, *view)
+            warm = time.perf_counter() - start
+        print(f"{workers:>2} workers: {cold * 1e3:8.0f} ms cold, {warm * 1e3:8.1f} ms from the cache "
+              f"({len(renderer.cache)} tiles)")
+        if reference is None:
+            reference = bytes(image.pixels)
+        elif bytes(image.pixels) != reference:
+            print(f"{workers} workers rendered different pixels")
+            sys.exit(1)
+
+    parts = [build(generate("cluster", 20, seed=seed)) for seed in range(args.parts)]
+    with tempfile.TemporaryDirectory() as directory, TileRenderer() as renderer:
+        start = time.perf_counter()
+        for i, part in enumerate(parts):
+            write_thumbnail(os.path.join(directory, f"{i}.png"), part, renderer=renderer)
+        elapsed = time.perf_counter() - start
+    print(f"{args.parts} thumbnails of 256x256: {elapsed / args.parts * 1e3:.1f} ms each")
+
+
+if __name__ == "__main__":
+    main()
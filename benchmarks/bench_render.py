@@ -0,0 +1,80 @@
+"""Frame-time benchmark: full redraw versus retained-mode pan and zoom.
+
+Usage::
+
+    python -m benchmarks.bench_render [--sizes 1000 10000 100000] [--frames 5]
+
+Run under ``xvfb-run`` to measure a real Tk canvas; without a display the
+stub canvas from ``benchmarks._tkstub`` is used.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks._tkstub import make_app
+
+
+def populate(app, count, seed=0):
+    rng = random.Random(seed)
+    app.drawing.clear()
+    for i in range(count):
+        x, y = rng.uniform(-40, 40), rng.uniform(-30, 30)
+        w, h = rng.uniform(0.5, 5), rng.uniform(0.5, 5)
+        if i % 2:
+            app.drawing.add_line(x, y, x + w, y + h)
+        else:
+            app.drawing.add_rectangle(x, y, x + w, y + h)
+    app.redraw_all()
+
+
+def time_frames(app, frame, frames, real_tk):
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        frame(i)
+        if real_tk:
+            app.canvas.update_idletasks()
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times)
+
+
+def full_redraw_frame(app):
+    def frame(i):
+        app.offset_x += 5
+        app.redraw_all()
+    return frame
+
+
+def pan_frame(app):
+    def frame(i):
+        app._pan_view(5, 0)
+    return frame
+
+
+def zoom_frame(app):
+    def frame(i):
+        factor = 1.1 if i % 2 == 0 else 1 / 1.1
+        app._zoom_view(factor, app.canvas_width / 2, app.canvas_height / 2)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--frames", type=int, default=5)
+    args = parser.parse_args()
+
+    app, real_tk = make_app()
+    print(f"canvas: {'Tk' if real_tk else 'stub'}")
+    print(f"{'entities':>9} {'full redraw':>13} {'pan':>11} {'zoom':>11}")
+    for count in args.sizes:
+        populate(app, count)
+        full = time_frames(app, full_redraw_frame(app), args.frames, real_tk)
+        pan = time_frames(app, pan_frame(app), args.frames, real_tk)
+        zoom = time_frames(app, zoom_frame(app), args.frames, real_tk)
+        print(f"{count:>9} {full * 1000:>10.1f} ms {pan * 1000:>8.1f} ms {zoom * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Snap lookup time on a drawing with about a million snap points.
+
+Usage::
+
+    python -m benchmarks.bench_snap [--points 1000000] [--queries 2000] [--budget-ms 1.0]
+
+Builds a Drawing with a SnapIndex from a line soup (three snap points per
+line), then times snap() for random cursor positions at snap radii from a
+zoomed-in to a zoomed-out view, and the incremental index update after
+moving an entity. The coarser grid levels used in empty space are built
+once with SnapIndex.prepare() (as the GUI does when drawing starts) and
+that time is reported separately. Exits with status 1 if the mean lookup
+time at any radius exceeds --budget-ms.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.generators import line_soup
+from model import Drawing
+from snap import SnapIndex, snap
+
+# Snap radius in drawing units: SNAP_PIXELS at the GUI's scales from 100 down to 0.1 pixels per unit
+RADII = [0.1, 1.0, 10.0, 100.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    lines = args.points // 3
+    extent = 1000.0
+    objects = line_soup(lines, extent=extent)
+    drawing = Drawing(snap_index=SnapIndex(), auto_constrain=False)
+    start = time.perf_counter()
+    for obj in objects:
+        drawing.add(obj)
+    build = time.perf_counter() - start
+    index = drawing.snap_index
+    print(f"{index.point_count} snap points from {len(index)} lines, added in {build:.1f} s "
+          f"({build / len(objects) * 1e6:.1f} us per entity including the other indexes)")
+
+    start = time.perf_counter()
+    index.prepare(max(RADII))
+    print(f"coarse grid levels built in {time.perf_counter() - start:.1f} s")
+
+    rng = random.Random(1)
+    positions = [(rng.uniform(-extent / 2, extent / 2), rng.uniform(-extent / 2, extent / 2))
+                 for _ in range(args.queries)]
+    over_budget = False
+    for radius in RADII:
+        times = []
+        hits = 0
+        for x, y in positions:
+            start = time.perf_counter()
+            _, _, kind = snap(x, y, radius, index, 1.0)
+            times.append(time.perf_counter() - start)
+            hits += kind is not None
+        mean = statistics.mean(times) * 1e3
+        over_budget |= mean > args.budget_ms
+        print(f"radius {radius:>6g}: mean {mean:.4f} ms, max {max(times) * 1e3:.3f} ms, "
+              f"{hits / len(positions):.0%} snapped")
+
+    # Incremental update after an edit, with every grid level built above
+    moved = objects[: args.queries]
+    start = time.perf_counter()
+    for obj in moved:
+        obj.end.x += 0.5
+        index.update(obj)
+    update = (time.perf_counter() - start) / len(moved)
+    print(f"update after a move: {update * 1e6:.1f} us per entity")
+
+    if over_budget:
+        print(f"REGRESSION: mean snap lookup exceeds {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Picking and viewport-query benchmark: SpatialIndex versus a linear scan.
+
+Usage::
+
+    python -m benchmarks.bench_spatial_index [--sizes 10000 100000] [--queries 200]
+
+"nearest out" queries points ten to a hundred times the drawing's extent
+away from it, where the search has to cross empty space.
+"""
+
+import argparse
+import math
+import random
+import time
+
+from geometry import Point, Line, Rectangle
+from spatial_index import SpatialIndex
+
+
+def make_objects(count, seed=0):
+    rng = random.Random(seed)
+    extent = (count ** 0.5) * 5
+    objects = []
+    for i in range(count):
+        x, y = rng.uniform(-extent, extent), rng.uniform(-extent, extent)
+        w, h = rng.uniform(0.5, 5), rng.uniform(0.5, 5)
+        if i % 2:
+            objects.append(Line(Point(x, y), Point(x + w, y + h)))
+        else:
+            objects.append(Rectangle(Point(x, y), Point(x + w, y + h)))
+    return objects, extent
+
+
+def per_query(fn, points):
+    start = time.perf_counter()
+    for x, y in points:
+        fn(x, y)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'build':>10} {'window idx':>11} {'window scan':>12} {'nearest idx':>12} {'nearest scan':>13} {'nearest out':>12}")
+    for count in args.sizes:
+        objects, extent = make_objects(count)
+        start = time.perf_counter()
+        index = SpatialIndex()
+        for obj in objects:
+            index.insert(obj)
+        build = time.perf_counter() - start
+
+        rng = random.Random(1)
+        points = [(rng.uniform(-extent, extent), rng.uniform(-extent, extent)) for _ in range(args.queries)]
+        outside = []
+        for _ in range(args.queries):
+            angle, distance = rng.uniform(0, 2 * math.pi), extent * rng.uniform(10, 100)
+            outside.append((distance * math.cos(angle), distance * math.sin(angle)))
+
+        def window_scan(x, y):
+            return [obj for obj in objects
+                    if (lambda b: b[0] <= x + 40 and b[2] >= x - 40 and b[1] <= y + 30 and b[3] >= y - 30)(obj.bounding_box())]
+
+        window_idx = per_query(lambda x, y: index.query(x - 40, y - 30, x + 40, y + 30), points)
+        window_lin = per_query(window_scan, points[:10])
+        nearest_idx = per_query(index.nearest, points)
+        nearest_lin = per_query(lambda x, y: min(objects, key=lambda obj: obj.distance_to(x, y)), points[:10])
+        nearest_out = per_query(index.nearest, outside)
+        print(f"{count:>9} {build:>8.2f} s {window_idx * 1e3:>8.3f} ms {window_lin * 1e3:>9.3f} ms "
+              f"{nearest_idx * 1e3:>9.3f} ms {nearest_lin * 1e3:>10.3f} ms {nearest_out * 1e3:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Startup time: importing the library modules and opening the GUI.
+
+Usage::
+
+    python -m benchmarks.bench_startup [--repeat 5] [--modules geometry model ...]
+
+Every measurement runs in a fresh interpreter, as a batch job or a worker
+process would, and the median over --repeat runs is reported: the time to
+import each library module (measured inside the process) and the wall time
+of the whole process. The library modules must not load Tk; the benchmark
+exits with status 1 if one of them does.
+
+The GUI row times importing cad_tool, constructing CADApp and drawing its
+first frame, which CADApp defers until the window is idle. It uses a real
+(withdrawn) Tk root when a display is available and the stub widgets from
+``benchmarks._tkstub`` otherwise, and also fails if the dialogs or the file
+formats were loaded before they are used.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ["geometry", "model", "snap", "queries", "layout", "raster", "bulk_ops", "cad_batch"]
+
+# Modules only needed by the library on first use, and by the GUI on first use
+LAZY = ["tkinter", "numpy"]
+GUI_LAZY = ["tkinter.messagebox", "tkinter.simpledialog", "tkinter.filedialog", "drawing_io", "numpy"]
+
+LIBRARY_CHILD = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import sys
+print(elapsed, *[name for name in {lazy!r} if name in sys.modules])
+"""
+
+GUI_CHILD = """
+import time
+start = time.perf_counter()
+import cad_tool
+imported = time.perf_counter() - start
+import sys
+loaded = [name for name in {lazy!r} if name in sys.modules]
+import tkinter as tk
+from benchmarks._tkstub import StubWidget, headless_tk
+try:
+    root = tk.Tk()
+    root.withdraw()
+except tk.TclError:
+    cad_tool.tk = headless_tk()
+    root = None
+start = time.perf_counter()
+app = cad_tool.CADApp(root or StubWidget())
+constructed = time.perf_counter()
+if root is None:
+    app.redraw_all()
+else:
+    root.update()
+drawn = time.perf_counter()
+print(imported, constructed - start, drawn - constructed, *loaded)
+"""
+
+
+def run(code):
+    """(wall time, output fields) of one fresh interpreter running code."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout.split()
+
+
+def median_runs(code, repeat):
+    runs = [run(code) for _ in range(repeat)]
+    walls = [wall for wall, _ in runs]
+    fields = [fields for _, fields in runs]
+    return statistics.median(walls), fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    baseline, _ = median_runs("pass", args.repeat)
+    print(f"empty interpreter: {baseline * 1e3:.1f} ms")
+    print(f"{'module':<12} {'import':>10} {'process':>10}")
+    for module in args.modules:
+        wall, fields = median_runs(LIBRARY_CHILD.format(module=module, lazy=LAZY), args.repeat)
+        elapsed = statistics.median(float(f[0]) for f in fields)
+        loaded = sorted({name for f in fields for name in f[1:]})
+        note = f"  loads {', '.join(loaded)}" if loaded else ""
+        print(f"{module:<12} {elapsed * 1e3:8.1f} ms {wall * 1e3:8.1f} ms{note}")
+        if "tkinter" in loaded:
+            failed = True
+
+    wall, fields = median_runs(GUI_CHILD.format(lazy=GUI_LAZY), args.repeat)
+    imported, constructed, drawn = (statistics.median(float(f[i]) for f in fields) for i in range(3))
+    loaded = sorted({name for f in fields for name in f[3:]})
+    print(f"GUI: import {imported * 1e3:.1f} ms, CADApp() {constructed * 1e3:.1f} ms, "
+          f"first frame {drawn * 1e3:.1f} ms, process {wall * 1e3:.1f} ms")
+    if loaded:
+        print(f"GUI startup loaded {', '.join(loaded)}")
+        failed = True
+
+    if failed:
+        print("startup loaded modules that should load on first use")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Synthetic drawings for the benchmarks.
+
+Every generator returns a list of Line and Rectangle objects and is
+deterministic for a given seed, so a benchmark run can be repeated on
+another machine or after a change and measure the same workload.
+"""
+
+import math
+import random
+
+from geometry import Point, Line, Rectangle
+
+
+def rectangle_grid(count, size=2.0, gap=1.0):
+    """About count rectangles of size x size in a square grid centred on the
+    origin, gap apart (so they do not touch and are not joined by constraints)."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    pitch = size + gap
+    start = -columns * pitch / 2
+    objects = []
+    for i in range(count):
+        x = start + (i % columns) * pitch
+        y = start + (i // columns) * pitch
+        objects.append(Rectangle(Point(x, y), Point(x + size, y + size)))
+    return objects
+
+
+def line_soup(count, extent=100.0, max_length=5.0, distribution="uniform", seed=0):
+    """count lines of random direction and length up to max_length.
+
+    Their start points are spread over a square of side extent centred on
+    the origin: evenly ("uniform"), normally around the origin ("gaussian"),
+    or around a few hot spots ("clustered").
+    """
+    rng = random.Random(seed)
+    half = extent / 2
+    if distribution == "uniform":
+        def start():
+            return rng.uniform(-half, half), rng.uniform(-half, half)
+    elif distribution == "gaussian":
+        def start():
+            return rng.gauss(0, extent / 6), rng.gauss(0, extent / 6)
+    elif distribution == "clustered":
+        spots = [(rng.uniform(-half, half), rng.uniform(-half, half)) for _ in range(8)]
+        def start():
+            x, y = rng.choice(spots)
+            return rng.gauss(x, extent / 40), rng.gauss(y, extent / 40)
+    else:
+        raise ValueError(f"Unknown distribution {distribution!r}.")
+    objects = []
+    for _ in range(count):
+        x, y = start()
+        angle = rng.uniform(0, 2 * math.pi)
+        length = rng.uniform(0.1, max_length)
+        objects.append(Line(Point(x, y), Point(x + length * math.cos(angle), y + length * math.sin(angle))))
+    return objects
+
+
+def dimension_cluster(count, radius=10.0, min_size=3.0, max_size=8.0, seed=0):
+    """count lines and rectangles crowded within radius of the origin, each
+    large enough to show its dimensions, so dimension texts pile up on screen."""
+    rng = random.Random(seed)
+    objects = []
+    for i in range(count):
+        distance = radius * math.sqrt(rng.random())
+        angle = rng.uniform(0, 2 * math.pi)
+        x, y = distance * math.cos(angle), distance * math.sin(angle)
+        w, h = rng.uniform(min_size, max_size), rng.uniform(min_size, max_size)
+        if i % 2:
+            objects.append(Line(Point(x, y), Point(x + w, y + h)))
+        else:
+            objects.append(Rectangle(Point(x, y), Point(x + w, y + h)))
+    return objects
+
+
+GENERATORS = {
+    "grid": rectangle_grid,
+    "soup": line_soup,
+    "cluster": dimension_cluster,
+}
+
+
+def generate(name, count, seed=0):
+    """The drawing of generator name (see GENERATORS) with count entities."""
+    if name == "grid":
+        return rectangle_grid(count)
+    return GENERATORS[name](count, seed=seed)
+
+
+def populate(app, objects, auto_constrain=False):
+    """Replace the drawing of a CADApp with objects and redraw it.
+
+    Joining coinciding points is off by default, since generated points do
+    not touch; the model/add cases of the suite time it.
+    """
+    drawing = app.drawing
+    drawing.clear()
+    saved, drawing.auto_constrain = drawing.auto_constrain, auto_constrain
+    try:
+        with drawing.journal.group():
+            for obj in objects:
+                drawing.add(obj)
+    finally:
+        drawing.auto_constrain = saved
+    app.redraw_all()
@@ -0,0 +1,336 @@
+"""Benchmark suite: run every workload, write a JSON report, check for regressions.
+
+Usage::
+
+    python -m benchmarks.suite [--size 10000] [--repeat 5] [--only redraw_all]
+                               [--output report.json]
+                               [--thresholds benchmarks/thresholds.json]
+                               [--baseline previous_report.json] [--tolerance 0.25]
+
+Each case builds a synthetic drawing (see benchmarks/generators.py) and
+times one operation --repeat times: redraw_all, pan and zoom frames,
+dimension picking and editing through on_dimension_click, the geometry.py
+operations, Drawing.add and the whole-drawing queries of queries.py. The report records the median, minimum and
+maximum time per run of every case along with the environment.
+
+A case regresses when its median exceeds the limit in the thresholds file
+(only checked when the file was made for the same canvas kind and size), or
+exceeds its median in --baseline by more than --tolerance. The exit status
+is 1 if any case regressed.
+
+Run under ``xvfb-run`` to measure a real Tk canvas; without a display the
+stub canvas from ``benchmarks._tkstub`` is used.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from tkinter import simpledialog
+
+from benchmarks._tkstub import make_app
+from benchmarks.generators import generate, populate
+from geometry import Line
+from lod import LodIndex
+from model import Drawing
+import queries
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+# name -> function(app, real_tk, size) returning (run, operations per run)
+CASES = {}
+
+
+def case(name):
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+def reset_view(app):
+    app.scale = 10.0
+    app.offset_x, app.offset_y = app.canvas_width / 2, app.canvas_height / 2
+
+
+def _redraw_case(generator):
+    def setup(app, real_tk, size):
+        reset_view(app)
+        populate(app, generate(generator, size))
+        return app.redraw_all, 1
+    return setup
+
+
+for _generator in ("grid", "soup", "cluster"):
+    case(f"redraw_all/{_generator}")(_redraw_case(_generator))
+
+
+@case("pan/soup")
+def pan_soup(app, real_tk, size):
+    reset_view(app)
+    populate(app, generate("soup", size))
+    steps = iter(range(10**9))
+
+    def run():
+        # Back and forth, so the view stays over the drawing
+        app._pan_view(20 if next(steps) % 2 else -20, 10)
+    return run, 1
+
+
+@case("zoom/soup")
+def zoom_soup(app, real_tk, size):
+    reset_view(app)
+    populate(app, generate("soup", size))
+    steps = iter(range(10**9))
+
+    def run():
+        factor = 1.1 if next(steps) % 2 == 0 else 1 / 1.1
+        app._zoom_view(factor, app.canvas_width / 2, app.canvas_height / 2)
+    return run, 1
+
+
+class _Event:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def _dimension_texts(app, real_tk):
+    # Canvas positions of one dimension text per entity. The stub canvas
+    # finds the closest item by scanning every item in Python, which would
+    # swamp the lookup being measured, so it is given a direct position ->
+    # item map.
+    texts = {}
+    for item_ids in app.object_items.values():
+        for item_id in item_ids:
+            if "dimension_text" in app.canvas.gettags(item_id):
+                x, y = app.canvas.coords(item_id)[:2]
+                texts[x, y] = item_id
+                break
+    if not real_tk:
+        app.canvas.find_closest = lambda x, y: (texts[x, y],)
+    return list(texts)
+
+
+@case("pick/cluster")
+def pick_cluster(app, real_tk, size):
+    # The dialog is cancelled, so this is the lookup from item to entity
+    simpledialog.askfloat = lambda *args, **kwargs: None
+    reset_view(app)
+    populate(app, generate("cluster", size))
+    positions = _dimension_texts(app, real_tk)[:100]
+
+    def run():
+        for x, y in positions:
+            app.on_dimension_click(_Event(x, y))
+    return run, len(positions)
+
+
+@case("edit/cluster")
+def edit_cluster(app, real_tk, size):
+    # Each click sets a dimension, re-solves and redraws the edited entity
+    simpledialog.askfloat = lambda *args, **kwargs: kwargs["initialvalue"] * 1.01
+    reset_view(app)
+    populate(app, generate("cluster", size))
+    clicks = min(10, len(_dimension_texts(app, real_tk)))
+
+    def run():
+        # Texts move with their edited entity; pick from a fresh map every run
+        for x, y in _dimension_texts(app, real_tk)[:clicks]:
+            app.on_dimension_click(_Event(x, y))
+    return run, clicks
+
+
+def _geometry_case(operation):
+    def setup(app, real_tk, size):
+        objects = generate("soup", size // 2) + generate("grid", size - size // 2)
+
+        def run():
+            for obj in objects:
+                operation(obj)
+        return run, len(objects)
+    return setup
+
+
+def _set_dimension(obj):
+    if isinstance(obj, Line):
+        obj.set_length(obj.length())
+    else:
+        obj.set_width(obj.width())
+
+
+case("geometry/length")(_geometry_case(lambda obj: obj.length() if isinstance(obj, Line) else obj.width()))
+case("geometry/set_dimension")(_geometry_case(_set_dimension))
+case("geometry/bounding_box")(_geometry_case(lambda obj: obj.bounding_box()))
+case("geometry/distance_to")(_geometry_case(lambda obj: obj.distance_to(1.0, 2.0)))
+
+
+@case("model/add")
+def model_add(app, real_tk, size):
+    objects = generate("soup", size)
+
+    def run():
+        drawing = Drawing(lod_index=LodIndex())
+        for obj in objects:
+            drawing.add(obj)
+    return run, len(objects)
+
+
+@case("model/add-cluster")
+def model_add_cluster(app, real_tk, size):
+    # Joining coinciding points where every entity overlaps many others
+    objects = generate("cluster", size)
+
+    def run():
+        drawing = Drawing()
+        for obj in objects:
+            drawing.add(obj)
+    return run, len(objects)
+
+
+def _query_drawing(size):
+    drawing = Drawing(auto_constrain=False)
+    for obj in generate("soup", size // 2) + generate("grid", size - size // 2):
+        drawing.add(obj)
+    return drawing
+
+
+@case("query/intersections")
+def query_intersections(app, real_tk, size):
+    drawing = _query_drawing(size)
+    return lambda: queries.intersections(drawing), 1
+
+
+@case("query/select")
+def query_select(app, real_tk, size):
+    drawing = _query_drawing(size)
+    windows = [(x, y, x + 20, y + 20) for x in range(-60, 60, 20) for y in range(-60, 60, 20)]
+
+    def run():
+        for window in windows:
+            queries.select_window(drawing, *window)
+            queries.select_crossing(drawing, *window)
+    return run, 2 * len(windows)
+
+
+@case("query/nearest")
+def query_nearest(app, real_tk, size):
+    drawing = _query_drawing(size)
+    xs = [i % 100 - 50.0 for i in range(1000)]
+    ys = [i // 10 - 50.0 for i in range(1000)]
+    return lambda: queries.nearest(drawing, xs, ys), len(xs)
+
+
+@case("query/nearest-outside")
+def query_nearest_outside(app, real_tk, size):
+    # Points far outside the drawing, where the search has to cross empty space
+    drawing = _query_drawing(size)
+    angles = [2 * math.pi * i / 100 for i in range(100)]
+    xs = [1e5 * math.cos(angle) for angle in angles]
+    ys = [1e5 * math.sin(angle) for angle in angles]
+    return lambda: queries.nearest(drawing, xs, ys), len(xs)
+
+
+def run_case(app, real_tk, name, size, repeat):
+    run, operations = CASES[name](app, real_tk, size)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        if real_tk:
+            app.canvas.update_idletasks()
+        times.append((time.perf_counter() - start) * 1e3)
+    median = statistics.median(times)
+    return {
+        "median_ms": median,
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "operations": operations,
+        "per_operation_us": median * 1e3 / operations if operations else 0.0,
+    }
+
+
+def check(report, thresholds=None, baseline=None, tolerance=0.25):
+    """Return a list of regression messages for report."""
+    problems = []
+    if thresholds is not None:
+        for name, limit in thresholds["max_median_ms"].items():
+            result = report["results"].get(name)
+            if result is not None and result["median_ms"] > limit:
+                problems.append(f"{name}: median {result['median_ms']:.1f} ms exceeds the threshold of {limit:.1f} ms")
+    if baseline is not None:
+        for name, result in report["results"].items():
+            previous = baseline["results"].get(name)
+            if previous is not None and result["median_ms"] > previous["median_ms"] * (1 + tolerance):
+                problems.append(f"{name}: median {result['median_ms']:.1f} ms is more than {tolerance:.0%} "
+                                f"slower than the baseline's {previous['median_ms']:.1f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000, help="entities per synthetic drawing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", default=[], help="run only cases whose name starts with one of these")
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    app, real_tk = make_app()
+    canvas = "tk" if real_tk else "stub"
+    names = [name for name in CASES if not args.only or name.startswith(tuple(args.only))]
+    askfloat = simpledialog.askfloat
+    results = {}
+    print(f"canvas: {canvas}, {args.size} entities, {args.repeat} runs per case")
+    try:
+        for name in names:
+            results[name] = result = run_case(app, real_tk, name, args.size, args.repeat)
+            print(f"{name:<24} {result['median_ms']:>10.2f} ms  ({result['per_operation_us']:.2f} us per operation)")
+    finally:
+        simpledialog.askfloat = askfloat
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "canvas": canvas,
+        },
+        "parameters": {"size": args.size, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"report written to {args.output}")
+
+    thresholds = None
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+        if thresholds.get("canvas") != canvas or thresholds.get("size") != args.size:
+            print(f"thresholds in {args.thresholds} are for the {thresholds.get('canvas')} canvas "
+                  f"at size {thresholds.get('size')}; not checked")
+            thresholds = None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = check(report, thresholds, baseline, args.tolerance)
+    for problem in problems:
+        print("REGRESSION", problem)
+    if problems:
+        sys.exit(1)
+    if thresholds is not None or baseline is not None:
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Bulk geometry operations over an EntityStore, spread across processes.
+
+BulkProcessor copies the kind and coordinate columns of an EntityStore into
+one multiprocessing.shared_memory block, which it keeps for its lifetime:
+the block has room for more rows than the store holds and is only replaced,
+twice as large, when the store outgrows it, and the store is only copied
+again when its version shows it was edited. Worker processes attach to the
+block on their first task and again only after it was replaced, and each
+task names only an operation and a range of rows (or a chunk of the
+selected row numbers), so no coordinates are pickled between processes.
+Edits are written into the block and copied back into the store's columns
+when the operation returns.
+
+Every operation works row by row with the same arithmetic as geometry.py,
+and sums are taken with math.fsum over per-row values in row order, so the
+results do not depend on the number of workers: workers=1 runs the same
+code in the calling process and gives the same bits.
+
+Layout of the block, for room for n entities::
+
+    kinds       n int8, padded to a multiple of 8 bytes
+    x1 y1 x2 y2 n float64 each
+    results     3 * n float64 of per-row values for measurement_report()
+"""
+
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from entity_store import LINE, RECTANGLE
+from geometry import Point, Line, Rectangle
+
+# Tasks per worker, so that a slow chunk does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+# Results columns of measurement_report(): line length, rectangle perimeter, rectangle area
+_RESULT_COLUMNS = 3
+
+# Rows the first block has room for
+MIN_CAPACITY = 1024
+
+
+class _Columns:
+    """Typed views of a shared block with room for capacity rows."""
+
+    def __init__(self, shm, capacity):
+        self.shm = shm
+        self.capacity = capacity
+        kinds_size = (capacity + 7) & ~7
+        buf = shm.buf
+        self.kinds = buf[:capacity].cast("b")
+        self.coords = [buf[kinds_size + 8 * capacity * k:kinds_size + 8 * capacity * (k + 1)].cast("d")
+                       for k in range(4)]
+        self.results = [buf[kinds_size + 8 * capacity * k:kinds_size + 8 * capacity * (k + 1)].cast("d")
+                        for k in range(4, 4 + _RESULT_COLUMNS)]
+
+    @staticmethod
+    def size(capacity):
+        return ((capacity + 7) & ~7) + 8 * capacity * (4 + _RESULT_COLUMNS)
+
+    def release(self):
+        for view in (self.kinds, *self.coords, *self.results):
+            view.release()
+
+
+# Worker side: the block this process last attached to
+_worker_columns = None
+
+
+def _run(name, capacity, operation, span, args):
+    global _worker_columns
+    if _worker_columns is None or _worker_columns.shm.name != name:
+        if _worker_columns is not None:
+            _worker_columns.release()
+            _worker_columns.shm.close()
+        _worker_columns = _Columns(shared_memory.SharedMemory(name=name), capacity)
+    return _OPERATIONS[operation](_worker_columns, span, *args)
+
+
+# Operations on a span of a _Columns: a (start, stop) range of rows, or for
+# the edits of a selection, that chunk of the selection as bytes of int64
+# row numbers.
+
+def _set_length(columns, rows, value):
+    kinds = columns.kinds
+    x1, y1, x2, y2 = columns.coords
+    for row in array("q", rows):
+        if kinds[row] != LINE:
+            continue
+        # As Line.set_length
+        dx = x2[row] - x1[row]
+        dy = y2[row] - y1[row]
+        length = (dx**2 + dy**2)**0.5
+        if length == 0:
+            if value != 0:
+                x2[row] = x1[row] + value
+                y2[row] = y1[row]
+        elif length != value:
+            ratio = value / length
+            x2[row] = x1[row] + dx * ratio
+            y2[row] = y1[row] + dy * ratio
+
+
+def _set_extent(columns, rows, axis, value):
+    # As Rectangle.set_width (axis 0) and set_height (axis 1)
+    kinds = columns.kinds
+    first, second = columns.coords[axis], columns.coords[2 + axis]
+    for row in array("q", rows):
+        if kinds[row] != RECTANGLE:
+            continue
+        if second[row] >= first[row]:
+            second[row] = first[row] + value
+        else:
+            second[row] = first[row] - value
+
+
+def _translate(columns, span, dx, dy):
+    start, stop = span
+    for column, delta in zip(columns.coords, (dx, dy, dx, dy)):
+        column[start:stop] = array("d", [value + delta for value in column[start:stop].tolist()])
+
+
+def _scale(columns, span, factor, center_x, center_y):
+    start, stop = span
+    for column, center in zip(columns.coords, (center_x, center_y, center_x, center_y)):
+        column[start:stop] = array("d", [center + (value - center) * factor
+                                         for value in column[start:stop].tolist()])
+
+
+def _bounding_box(columns, span):
+    start, stop = span
+    x1, y1, x2, y2 = (column[start:stop].tolist() for column in columns.coords)
+    return min(min(x1), min(x2)), min(min(y1), min(y2)), max(max(x1), max(x2)), max(max(y1), max(y2))
+
+
+def _measure(columns, span):
+    # Per-row values into the results columns; returns (lines, rectangles)
+    start, stop = span
+    lengths, perimeters, areas = columns.results
+    kinds = columns.kinds[start:stop].tolist()
+    x1, y1, x2, y2 = (column[start:stop].tolist() for column in columns.coords)
+    row_lengths, row_perimeters, row_areas = [], [], []
+    for kind, ax, ay, bx, by in zip(kinds, x1, y1, x2, y2):
+        if kind == LINE:
+            row_lengths.append(((bx - ax)**2 + (by - ay)**2)**0.5)
+            row_perimeters.append(0.0)
+            row_areas.append(0.0)
+        else:
+            width, height = abs(bx - ax), abs(by - ay)
+            row_lengths.append(0.0)
+            row_perimeters.append(2 * (width + height))
+            row_areas.append(width * height)
+    lengths[start:stop] = array("d", row_lengths)
+    perimeters[start:stop] = array("d", row_perimeters)
+    areas[start:stop] = array("d", row_areas)
+    lines = kinds.count(LINE)
+    return lines, len(kinds) - lines
+
+
+def _encoder(format_name):
+    if format_name == "dxf":
+        from dxf_io import dxf_entity
+        return dxf_entity
+    if format_name == "svg":
+        from svg_io import svg_element
+        return svg_element
+    from drawing_io import drawing_command
+    return drawing_command
+
+
+def _encode(columns, span, format_name):
+    start, stop = span
+    encode = _encoder(format_name)
+    kinds = columns.kinds[start:stop].tolist()
+    x1, y1, x2, y2 = (column[start:stop].tolist() for column in columns.coords)
+    parts = []
+    for kind, ax, ay, bx, by in zip(kinds, x1, y1, x2, y2):
+        cls = Line if kind == LINE else Rectangle
+        parts.append(encode(cls(Point(ax, ay), Point(bx, by))))
+    return "".join(parts)
+
+
+_OPERATIONS = {
+    "set_length": _set_length,
+    "set_extent": _set_extent,
+    "translate": _translate,
+    "scale": _scale,
+    "bounding_box": _bounding_box,
+    "measure": _measure,
+    "encode": _encode,
+}
+
+
+class BulkProcessor:
+    """Runs bulk operations on an EntityStore with a pool of worker processes.
+
+    workers defaults to the number of CPUs; with workers=1 everything runs in
+    the calling process. Use it as a context manager, or call close(), to
+    stop the workers and free the shared memory. The store may be changed
+    between operations (rows added, entities edited through their views):
+    each operation starts from the store's current contents.
+    """
+
+    def __init__(self, store, workers=None):
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self._shm = None
+        self._columns = None
+        self._version = None # store.version when the block was last made to match it
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._free_block()
+
+    def _free_block(self):
+        if self._columns is not None:
+            self._columns.release()
+            self._columns = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        self._version = None
+
+    def _load(self):
+        # Bring the block up to date with the store, replacing it only when the store outgrew it
+        store = self.store
+        count = len(store)
+        if self._columns is None or self._columns.capacity < count:
+            capacity = max(MIN_CAPACITY, count, 2 * self._columns.capacity if self._columns else 0)
+            self._free_block()
+            self._shm = shared_memory.SharedMemory(create=True, size=_Columns.size(capacity))
+            self._columns = _Columns(self._shm, capacity)
+        if self._version != store.version:
+            self._columns.kinds[:count] = store.kinds
+            for column, store_column in zip(self._columns.coords, store._columns()):
+                column[:count] = store_column
+            self._version = store.version
+        return count
+
+    def _store_back(self, changed, count):
+        # Copy the changed coordinate columns (numbers 0-3) back into the store
+        store_columns = self.store._columns()
+        for k in changed:
+            memoryview(store_columns[k])[:] = self._columns.coords[k][:count]
+        self.store.touch()
+        self._version = self.store.version
+
+    def _chunks(self, count):
+        if self.workers == 1 or not count:
+            return [(0, count)]
+        chunk = max(1, math.ceil(count / (self.workers * CHUNKS_PER_WORKER)))
+        return [(start, min(count, start + chunk)) for start in range(0, count, chunk)]
+
+    def _map(self, operation, count, *args, selection=None):
+        """Run operation over rows 0..count, or over the rows in selection (an
+        array of row numbers), in chunks; returns the chunk results in order."""
+        if selection is None:
+            spans = self._chunks(count)
+        else:
+            spans = [selection[start:stop].tobytes() for start, stop in self._chunks(len(selection))]
+        if len(spans) == 1:
+            return [_OPERATIONS[operation](self._columns, spans[0], *args)]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        name, capacity = self._shm.name, self._columns.capacity
+        futures = [self._pool.submit(_run, name, capacity, operation, span, args) for span in spans]
+        return [future.result() for future in futures]
+
+    def _selection(self, rows):
+        count = self._load()
+        return count, array("q", range(count) if rows is None else rows)
+
+    def set_length(self, value, rows=None):
+        """Set the length of the lines among rows (default: all rows), like Line.set_length."""
+        if value < 0:
+            raise ValueError("The length cannot be negative.")
+        count, selection = self._selection(rows)
+        self._map("set_length", count, value, selection=selection)
+        self._store_back((2, 3), count)
+
+    def set_width(self, value, rows=None):
+        """Set the width of the rectangles among rows, like Rectangle.set_width."""
+        self._set_extent(0, value, rows)
+
+    def set_height(self, value, rows=None):
+        """Set the height of the rectangles among rows, like Rectangle.set_height."""
+        self._set_extent(1, value, rows)
+
+    def _set_extent(self, axis, value, rows):
+        if value < 0:
+            raise ValueError(f"The {('width', 'height')[axis]} cannot be negative.")
+        count, selection = self._selection(rows)
+        self._map("set_extent", count, axis, value, selection=selection)
+        self._store_back((2 + axis,), count)
+
+    def translate(self, dx, dy):
+        count = self._load()
+        self._map("translate", count, dx, dy)
+        self._store_back(range(4), count)
+
+    def scale(self, factor, center_x=0.0, center_y=0.0):
+        count = self._load()
+        self._map("scale", count, factor, center_x, center_y)
+        self._store_back(range(4), count)
+
+    def bounding_box(self):
+        """(min_x, min_y, max_x, max_y) over all entities, or None when empty."""
+        count = self._load()
+        if not count:
+            return None
+        boxes = self._map("bounding_box", count)
+        return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    def measurement_report(self):
+        """Entity counts, total line length, rectangle perimeter and area, and the bounding box."""
+        count = self._load()
+        counts = self._map("measure", count) if count else []
+        lengths, perimeters, areas = self._columns.results
+        return {
+            "lines": sum(lines for lines, _ in counts),
+            "rectangles": sum(rectangles for _, rectangles in counts),
+            "total_length": math.fsum(lengths[:count]),
+            "total_perimeter": math.fsum(perimeters[:count]),
+            "total_area": math.fsum(areas[:count]),
+            "bounding_box": self.bounding_box(),
+        }
+
+    def encode(self, format_name):
+        """The drawing as the text of a "dxf", "svg" or "cad" (command language) file.
+
+        The text is the same as the format's writer in drawing_io produces.
+        """
+        count = self._load()
+        body = "".join(self._map("encode", count, format_name)) if count else ""
+        if format_name == "dxf":
+            from dxf_io import DXF_HEADER, DXF_FOOTER
+            return DXF_HEADER + body + DXF_FOOTER
+        if format_name == "svg":
+            from svg_io import SVG_FOOTER, svg_header
+            return svg_header(self.bounding_box()) + body + SVG_FOOTER
+        return body
+
+    def save(self, path):
+        """Write the store to path, choosing the format like drawing_io.write()."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".izc":
+            # Binary and sorted by cell; written by the single-process writer
+            import native_format
+            return native_format.save(path, self.store)
+        format_name = {".dxf": "dxf", ".svg": "svg"}.get(extension, "cad")
+        with open(path, "w") as f:
+            f.write(self.encode(format_name))
+        return len(self.store)
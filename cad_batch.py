@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Headless batch mode for the CAD tool.
+
+Reads drawing commands from script files (or standard input, so it can sit
+at the end of a pipe), applies them to a Drawing and writes the result. Only
+the geometry model is imported, so no display or Tk is needed.
+
+Commands, one per line (blank lines and lines starting with # are ignored):
+
+    line X1 Y1 X2 Y2             add a line, like "Draw Line (Manual)"
+    rect X1 Y1 X2 Y2             add a rectangle, like "Draw Rectangle (Manual)"
+    set INDEX DIMENSION VALUE    edit the length, width or height of object INDEX
+                                 (0-based, in the order the objects were added),
+                                 like clicking a dimension text
+    constrain KIND INDEX...      constrain objects and move them to satisfy it:
+                                   constrain horizontal|vertical LINE
+                                   constrain equal-width|equal-height RECT RECT
+                                   constrain coincident INDEX POINT INDEX POINT
+                                 where POINT is start or end for lines and p1,
+                                 p2, p1x_p2y or p2x_p1y for rectangles
+    clear                        remove all objects, like "Clear Canvas"
+    undo                         undo the last line, rect, set, constrain, clear
+                                 or load
+    redo                         redo the last undone command
+    load PATH                    add the entities stored in PATH
+    save PATH                    write the current drawing to PATH
+    convert SOURCE DESTINATION   stream SOURCE into DESTINATION, entity by
+                                 entity, without touching the current drawing
+    thumbnail PATH [WIDTH [HEIGHT]]
+                                 render the current drawing, fitted to a
+                                 WIDTH x HEIGHT image (default 256 x 256,
+                                 HEIGHT defaults to WIDTH), to the PNG file
+                                 PATH, as the GUI would show it
+    report PATH [WORKERS]        write the entity counts, total line length,
+                                 rectangle perimeter and area, and bounding
+                                 box of the current drawing to PATH as JSON,
+                                 measured over WORKERS processes (default 1;
+                                 see bulk_ops.py)
+
+Files ending in .dxf, .svg or .izc are read and written as DXF, SVG or the
+native binary format (see drawing_io.py); any other file uses this command language restricted to
+line and rect commands, so the output of one run can be fed to the next.
+Use save and clear in one script to process many parts in a single process;
+load, thumbnail and clear make thumbnails of many parts the same way.
+
+Wherever a command takes an INDEX, #ID names an object by its entity ID
+instead; IDs are kept in .izc files, so they stay the same across runs.
+
+Objects added with coinciding points are joined by coincident constraints,
+and set makes the edited dimension a driving constraint, so connected
+objects follow dimension edits. Constraints are not saved to files.
+"""
+
+import argparse
+import sys
+
+import constraints
+import drawing_io
+from drawing_io import ProgressReporter, write_drawing
+from geometry import Point, Line, Rectangle
+from model import Drawing
+
+
+class BatchError(ValueError):
+    pass
+
+
+def read_drawing(fileobj, progress=None, source="<drawing>"):
+    """Yield the entities of a drawing written by write_drawing."""
+    reporter = ProgressReporter(progress)
+    for lineno, line in enumerate(fileobj, 1):
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        if words[0] not in ("line", "rect"):
+            raise BatchError(f"{source}:{lineno}: only line and rect are allowed in a drawing file")
+        try:
+            x1, y1, x2, y2 = _floats(words[1:], 4)
+        except BatchError as e:
+            raise BatchError(f"{source}:{lineno}: {e}") from None
+        if words[0] == "line":
+            yield Line(Point(x1, y1), Point(x2, y2))
+        else:
+            yield Rectangle(Point(x1, y1), Point(x2, y2))
+        reporter.entity_done()
+    reporter.finish()
+
+
+def load(path, progress=None):
+    with open(path) as f:
+        yield from read_drawing(f, progress, source=path)
+
+
+def save(path, objects, progress=None):
+    with open(path, "w") as f:
+        return write_drawing(objects, f, progress)
+
+
+def _floats(args, count):
+    if len(args) != count:
+        raise BatchError(f"expected {count} numbers, got {len(args)}")
+    try:
+        return [float(arg) for arg in args]
+    except ValueError:
+        raise BatchError(f"invalid number in {' '.join(args)!r}") from None
+
+
+def _sizes(args):
+    try:
+        sizes = [int(arg) for arg in args]
+    except ValueError:
+        raise BatchError(f"invalid size in {' '.join(args)!r}") from None
+    if any(size <= 0 for size in sizes):
+        raise BatchError("image sizes must be positive")
+    return sizes
+
+
+def _object(drawing, arg):
+    try:
+        if arg.startswith("#"):
+            obj = drawing.entity(int(arg[1:]))
+            if obj is None:
+                raise IndexError(arg)
+            return obj
+        return drawing.objects[int(arg)]
+    except (ValueError, IndexError):
+        raise BatchError(f"no object with index {arg}") from None
+
+
+# constrain KIND -> (constraint class, arguments after KIND)
+CONSTRAINT_COMMANDS = {
+    "horizontal": (constraints.Horizontal, "LINE"),
+    "vertical": (constraints.Vertical, "LINE"),
+    "equal-width": (constraints.EqualWidth, "RECT RECT"),
+    "equal-height": (constraints.EqualHeight, "RECT RECT"),
+    "coincident": (constraints.Coincident, "INDEX POINT INDEX POINT"),
+}
+
+
+def _constraint(drawing, args):
+    if not args or args[0] not in CONSTRAINT_COMMANDS:
+        raise BatchError(f"usage: constrain {'|'.join(CONSTRAINT_COMMANDS)} INDEX...")
+    kind, args = args[0], args[1:]
+    cls, usage = CONSTRAINT_COMMANDS[kind]
+    if len(args) != len(usage.split()):
+        raise BatchError(f"usage: constrain {kind} {usage}")
+    if kind == "coincident":
+        a, b = _object(drawing, args[0]), _object(drawing, args[2])
+        try:
+            return cls(a, args[1], b, args[3])
+        except (KeyError, ValueError):
+            raise BatchError(f"no such points: {args[1]}, {args[3]}") from None
+    objs = [_object(drawing, arg) for arg in args]
+    expected = Line if usage.startswith("LINE") else Rectangle
+    if not all(isinstance(obj, expected) for obj in objs):
+        raise BatchError(f"{kind} applies to {expected.__name__.lower()}s")
+    return cls(*objs)
+
+
+def run_command(drawing, line, progress=None):
+    words = line.split()
+    if not words or words[0].startswith("#"):
+        return
+    command, args = words[0], words[1:]
+
+    if command == "line":
+        drawing.add_line(*_floats(args, 4))
+    elif command == "rect":
+        drawing.add_rectangle(*_floats(args, 4))
+    elif command == "set":
+        if len(args) != 3:
+            raise BatchError("usage: set INDEX DIMENSION VALUE")
+        obj = _object(drawing, args[0])
+        value, = _floats(args[2:], 1)
+        try:
+            drawing.set_dimension(obj, args[1], value)
+        except ValueError as e:
+            raise BatchError(str(e)) from None
+    elif command == "constrain":
+        try:
+            drawing.add_constraint(_constraint(drawing, args))
+        except ValueError as e:
+            raise BatchError(str(e)) from None
+    elif command == "clear":
+        drawing.clear()
+    elif command == "undo":
+        if not drawing.journal.can_undo():
+            raise BatchError("nothing to undo")
+        drawing.undo()
+    elif command == "redo":
+        if not drawing.journal.can_redo():
+            raise BatchError("nothing to redo")
+        drawing.redo()
+    elif command == "load":
+        if len(args) != 1:
+            raise BatchError("usage: load PATH")
+        try:
+            with drawing.journal.group():
+                for obj in drawing_io.read(args[0], progress):
+                    drawing.add(obj)
+        except (ValueError, SyntaxError) as e: # SyntaxError covers malformed SVG
+            raise BatchError(f"cannot read {args[0]}: {e}") from None
+    elif command == "save":
+        if len(args) != 1:
+            raise BatchError("usage: save PATH")
+        drawing_io.write(args[0], drawing, progress)
+    elif command == "convert":
+        if len(args) != 2:
+            raise BatchError("usage: convert SOURCE DESTINATION")
+        try:
+            drawing_io.convert(args[0], args[1], progress)
+        except (ValueError, SyntaxError) as e:
+            raise BatchError(f"cannot convert {args[0]}: {e}") from None
+    elif command == "thumbnail":
+        if not 1 <= len(args) <= 3:
+            raise BatchError("usage: thumbnail PATH [WIDTH [HEIGHT]]")
+        sizes = _sizes(args[1:]) or [256]
+        import raster # the renderer is only loaded by scripts that make thumbnails
+        raster.write_thumbnail(args[0], drawing, sizes[0], sizes[-1])
+    elif command == "report":
+        if not 1 <= len(args) <= 2:
+            raise BatchError("usage: report PATH [WORKERS]")
+        try:
+            workers = int(args[1]) if len(args) == 2 else 1
+        except ValueError:
+            raise BatchError(f"invalid worker count {args[1]!r}") from None
+        if workers <= 0:
+            raise BatchError("the worker count must be positive")
+        _write_report(args[0], drawing, workers)
+    else:
+        raise BatchError(f"unknown command {command!r}")
+
+
+def _write_report(path, drawing, workers):
+    import json
+    from bulk_ops import BulkProcessor # with its store, only loaded by scripts that report
+    from entity_store import EntityStore
+    store = EntityStore()
+    store.extend(drawing)
+    with BulkProcessor(store, workers) as processor:
+        report = processor.measurement_report()
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def run_script(lines, drawing=None, source="<script>", progress=None):
+    """Apply every command in lines to drawing (a new one if None) and return it."""
+    if drawing is None:
+        drawing = Drawing()
+    for lineno, line in enumerate(lines, 1):
+        try:
+            run_command(drawing, line, progress)
+        except BatchError as e:
+            raise BatchError(f"{source}:{lineno}: {e}") from None
+    return drawing
+
+
+def _print_progress(entities, bytes_done, bytes_total):
+    if bytes_total:
+        print(f"{entities} entities, {100 * bytes_done / bytes_total:.0f}%", file=sys.stderr)
+    else:
+        print(f"{entities} entities", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and edit drawings without a GUI.")
+    parser.add_argument("scripts", nargs="*", help="command scripts to run in order (default: standard input)")
+    parser.add_argument("-o", "--output", help="write the final drawing here (default: standard output)")
+    parser.add_argument("--progress", action="store_true", help="report progress of file operations on standard error")
+    args = parser.parse_args(argv)
+    progress = _print_progress if args.progress else None
+
+    drawing = Drawing()
+    try:
+        if args.scripts:
+            for path in args.scripts:
+                with open(path) as f:
+                    run_script(f, drawing, source=path, progress=progress)
+        else:
+            run_script(sys.stdin, drawing, source="<stdin>", progress=progress)
+
+        if args.output:
+            drawing_io.write(args.output, drawing, progress)
+        else:
+            write_drawing(drawing, sys.stdout)
+    except (BatchError, OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
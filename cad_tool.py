@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 
 import tkinter as tk
-from tkinter import messagebox, simpledialog
+# The dialog modules (tkinter.messagebox, simpledialog, filedialog) and the
+# file formats (drawing_io) are imported by the methods that use them, so
+# they only load when first needed
+from contextlib import contextmanager
+import logging
 import math
+import os
+from frame_scheduler import DEFAULT_FPS, FrameScheduler
 from geometry import Point, Line, Rectangle
+from layout import (AXIS_COLOR, GRID_COLOR, GRID_MIN_PIXELS, LINE_COLOR, LOD_TILE_COLOR, RECTANGLE_COLOR,
+                    axis_layout, grid_spacing, linear_dimension_layout, object_dimensions, visible_grid_spacing)
+from lod import LodIndex, lod_level
+from metrics import RenderMetrics
+from model import Drawing
+from snap import SnapIndex, snap
+from transform import world_to_screen
+
+log = logging.getLogger("izcad")
+
+# The cursor snaps to points within this many pixels while drawing
+SNAP_PIXELS = 10
+SNAP_COLOR = "#FF8000"
 
 class CADApp:
-    def __init__(self, master):
-        print("CADApp __init__ called.")
+    def __init__(self, master, fps=DEFAULT_FPS):
+        log.debug("app init fps=%s", fps)
         self.master = master
         master.title("CLI CAD - Graphical Interface")
 
@@ -20,6 +39,9 @@ class CADApp:
         self.canvas = tk.Canvas(master, width=self.canvas_width, height=self.canvas_height, bg="white", borderwidth=2, relief="groove")
         self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Pan, zoom and preview events are coalesced and rendered at most fps times a second
+        self.frame_scheduler = FrameScheduler(self.canvas, self._render_frame, fps)
+
         # Bind mouse events for pan and zoom
         self.canvas.bind("<ButtonPress-1>", self.on_button_press)
         self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
@@ -72,13 +94,49 @@ class CADApp:
         self.clear_button = tk.Button(self.input_frame, text="Clear Canvas", command=self.clear_canvas)
         self.clear_button.grid(row=4, column=0, columnspan=4, pady=10)
 
-        self.objects = []
+        self.import_button = tk.Button(self.input_frame, text="Import...", command=self.import_drawing)
+        self.import_button.grid(row=5, column=0, columnspan=2, pady=10)
+
+        self.export_button = tk.Button(self.input_frame, text="Export...", command=self.export_drawing)
+        self.export_button.grid(row=5, column=2, columnspan=2, pady=10)
+
+        self.undo_button = tk.Button(self.input_frame, text="Undo", command=self.undo)
+        self.undo_button.grid(row=6, column=0, columnspan=2, pady=10)
+
+        self.redo_button = tk.Button(self.input_frame, text="Redo", command=self.redo)
+        self.redo_button.grid(row=6, column=2, columnspan=2, pady=10)
+
+        master.bind("<Control-z>", lambda event: self.undo())
+        master.bind("<Control-y>", lambda event: self.redo())
+        master.bind("<Control-Z>", lambda event: self.redo())
+
+        # F3 toggles the performance overlay, Ctrl+F3 saves the frame metrics
+        self.metrics = RenderMetrics()
+        self.overlay_visible = False
+        self.overlay_item = None
+        master.bind("<F3>", lambda event: self.toggle_overlay())
+        master.bind("<Control-F3>", lambda event: self.save_metrics())
+
+        # F9 turns snapping to entity points, the origin and the grid on and off
+        self.snap_enabled = True
+        master.bind("<F9>", lambda event: self.toggle_snap())
+
+        self.drawing = Drawing(lod_index=LodIndex(), snap_index=SnapIndex())
+        self.object_items = {} # obj -> canvas item ids of the objects currently in view
+        self.item_entities = {} # canvas item id -> entity ID, for the items in object_items
+        self.object_dimension_types = {} # obj -> dim_types of the dimensions drawn for it
+        self.lod_tile_items = {} # (level, tx, ty) -> canvas item id of an aggregated tile
+        self.grid_sets = {} # grid spacing -> cached grid lines for that spacing, see _sync_grid
+        self.origin_items = [] # X axis, X label, Y axis, Y label
         self.current_drawing_mode = "none" # "none", "draw_rectangle_interactive"
         self.interactive_start_point_cad = None
-        self.preview_rectangle_id = None
-        self.preview_dim_ids = []
+        self.preview_items = [] # allocated on first use, see _create_preview_items
+        self.preview_shown = False
+        self.snap_marker = None # square around the snapped point, allocated on first use
 
-        self.redraw_all()
+        # The first frame is drawn once the window is up rather than in the
+        # constructor, so the window appears without waiting for it
+        self._startup_redraw = master.after_idle(self.redraw_all)
 
     def cad_to_canvas(self, x_cad, y_cad):
         x_canvas = self.offset_x + x_cad * self.scale
@@ -90,6 +148,9 @@ class CADApp:
         y_cad = (self.offset_y - y_canvas) / self.scale
         return x_cad, y_cad
 
+    def cad_to_canvas_batch(self, xs_cad, ys_cad):
+        return world_to_screen(xs_cad, ys_cad, self.scale, self.offset_x, self.offset_y)
+
     def on_button_press(self, event):
         # Only pan if not in drawing mode
         if self.current_drawing_mode == "none":
@@ -101,90 +162,215 @@ class CADApp:
         if self.current_drawing_mode == "none":
             dx = event.x - self.last_x
             dy = event.y - self.last_y
-            self.offset_x += dx
-            self.offset_y += dy
             self.last_x = event.x
             self.last_y = event.y
-            self.redraw_all()
+            self.frame_scheduler.pan(dx, dy)
 
     def on_mouse_wheel(self, event):
         zoom_factor = 1.1
-        mouse_x_cad_before, mouse_y_cad_before = self.canvas_to_cad(event.x, event.y)
 
         if event.num == 5 or event.delta < 0:
-            self.scale /= zoom_factor
+            self.frame_scheduler.zoom(1 / zoom_factor, event.x, event.y)
         elif event.num == 4 or event.delta > 0:
-            self.scale *= zoom_factor
-        
-        mouse_x_cad_after, mouse_y_cad_after = self.canvas_to_cad(event.x, event.y)
-
-        self.offset_x += (mouse_x_cad_before - mouse_x_cad_after) * self.scale
-        self.offset_y -= (mouse_y_cad_before - mouse_y_cad_after) * self.scale
+            self.frame_scheduler.zoom(zoom_factor, event.x, event.y)
+
+    def _render_frame(self, factor, dx, dy, preview_position):
+        # Called by the frame scheduler with the coalesced events of one frame
+        with self._frame("view", self.frame_scheduler.frame_event_time):
+            if factor != 1 or dx or dy:
+                self._transform_view(factor, dx, dy)
+            if preview_position is not None:
+                self._draw_preview(*preview_position)
+
+    @contextmanager
+    def _frame(self, kind, event_time=None):
+        # Measures the canvas work of the block as one frame, see metrics.py
+        self.metrics.begin_frame(kind, event_time)
+        try:
+            yield
+        finally:
+            if self.metrics.end_frame(self._item_counts) is not None and self.overlay_visible:
+                self._update_overlay()
+
+    def _item_counts(self):
+        return {
+            "entities": len(self.item_entities),
+            "lod_tiles": len(self.lod_tile_items),
+            "grid": sum(len(grid_set["items"]) for grid_set in self.grid_sets.values()),
+            "origin": len(self.origin_items),
+            "preview": len(self.preview_items) + (self.snap_marker is not None),
+        }
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self._update_overlay()
+        elif self.overlay_item is not None:
+            self.canvas.delete(self.overlay_item)
+            self.overlay_item = None
+
+    def _update_overlay(self):
+        stats = self.frame_scheduler.stats()
+        text = f"{self.metrics.overlay_text()}\nevents per frame {stats['events_per_frame']:.1f}"
+        if self.overlay_item is None:
+            self.overlay_item = self.canvas.create_text(10, 10, text=text, anchor=tk.NW, fill="black", font=("Courier", 9), tags="overlay")
+        else:
+            self.canvas.itemconfig(self.overlay_item, text=text)
+            self.canvas.tag_raise(self.overlay_item)
 
-        self.redraw_all()
+    def save_metrics(self):
+        from tkinter import filedialog, messagebox
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            self.metrics.dump(path, scheduler=self.frame_scheduler.stats())
+        except OSError as e:
+            messagebox.showerror("Metrics Error", f"Could not save {path}:\n{e}")
+
+    def _pan_view(self, dx, dy):
+        self._transform_view(1.0, dx, dy)
+
+    def _zoom_view(self, factor, anchor_x, anchor_y):
+        # Zoom keeps the CAD point under the anchor (the mouse cursor) fixed.
+        self._transform_view(factor, anchor_x * (1 - factor), anchor_y * (1 - factor))
+
+    def _transform_view(self, factor, dx, dy):
+        # Maps the view offset o to o * factor + (dx, dy) and the scale by
+        # factor, the combined form of any sequence of pans and zooms.
+        self.scale *= factor
+        self.offset_x = self.offset_x * factor + dx
+        self.offset_y = self.offset_y * factor + dy
+
+        # Existing items are transformed in place instead of redrawn. Geometry
+        # scales exactly with the view; dimensions use fixed pixel offsets, so
+        # their coordinates are recomputed and updated after a zoom.
+        with self.metrics.section("entities"):
+            if factor != 1:
+                self.canvas.scale("geometry", 0, 0, factor, factor)
+            if dx or dy:
+                self.canvas.move("entity", dx, dy)
+        if factor != 1:
+            with self.metrics.section("dimensions"):
+                self._update_dimension_items(list(self.object_items))
+        self._update_background()
+        with self.metrics.section("entities"):
+            self._sync_visible_objects()
 
     def on_canvas_click(self, event):
+        self.frame_scheduler.flush()
         if self.current_drawing_mode == "draw_rectangle_interactive":
-            clicked_cad_x, clicked_cad_y = self.canvas_to_cad(event.x, event.y)
+            clicked_cad_x, clicked_cad_y, _ = self.snap_point(event.x, event.y)
             clicked_point = Point(clicked_cad_x, clicked_cad_y)
 
             if self.interactive_start_point_cad is None:
                 # First click: define start point
                 self.interactive_start_point_cad = clicked_point
-                print(f"First click at CAD: {clicked_point.x:.2f}, {clicked_point.y:.2f}")
+                log.debug("first corner x=%.2f y=%.2f", clicked_point.x, clicked_point.y)
             else:
                 # Second click: define end point and create rectangle
-                print(f"Second click at CAD: {clicked_point.x:.2f}, {clicked_point.y:.2f}")
                 rect = Rectangle(self.interactive_start_point_cad, clicked_point)
-                print(f"Created Rectangle: {rect}")
-                self.objects.append(rect)
-                print(f"Objects after adding rectangle: {self.objects}")
+                self.add_object(rect)
+                log.debug("rectangle added eid=%s second_corner=(%.2f, %.2f) objects=%d",
+                          rect.eid, clicked_point.x, clicked_point.y, len(self.drawing))
                 self.current_drawing_mode = "none"
                 self.interactive_start_point_cad = None
-                self.canvas.delete(self.preview_rectangle_id) # Clear preview
-                for dim_id in self.preview_dim_ids:
-                    self.canvas.delete(dim_id)
-                self.preview_rectangle_id = None
-                self.preview_dim_ids = []
-                self.redraw_all()
+                self._hide_preview()
+                self._show_snap_marker(None)
                 # Unbind drawing events and re-bind pan/zoom events
                 self.canvas.unbind("<Button-1>")
                 self.canvas.bind("<ButtonPress-1>", self.on_button_press)
                 self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
 
     def on_mouse_move(self, event):
-        if self.current_drawing_mode == "draw_rectangle_interactive" and self.interactive_start_point_cad is not None:
-            # Clear previous preview
-            self.canvas.delete(self.preview_rectangle_id)
-            for dim_id in self.preview_dim_ids:
-                self.canvas.delete(dim_id)
-            self.preview_dim_ids = []
-
-            current_cad_x, current_cad_y = self.canvas_to_cad(event.x, event.y)
-            current_point = Point(current_cad_x, current_cad_y)
-
-            temp_rect = Rectangle(self.interactive_start_point_cad, current_point)
-
-            canvas_x1, canvas_y1 = self.cad_to_canvas(min(temp_rect.p1.x, temp_rect.p2.x), max(temp_rect.p1.y, temp_rect.p2.y))
-            canvas_x2, canvas_y2 = self.cad_to_canvas(max(temp_rect.p1.x, temp_rect.p2.x), min(temp_rect.p1.y, temp_rect.p2.y))
-
-            self.preview_rectangle_id = self.canvas.create_rectangle(canvas_x1, canvas_y1, canvas_x2, canvas_y2, outline="gray", dash=(5, 5))
-
-            # Display dynamic dimensions for preview
-            p_bl = Point(min(temp_rect.p1.x, temp_rect.p2.x), min(temp_rect.p1.y, temp_rect.p2.y))
-            p_br = Point(max(temp_rect.p1.x, temp_rect.p2.x), min(temp_rect.p1.y, temp_rect.p2.y))
-            p_tl = Point(min(temp_rect.p1.x, temp_rect.p2.x), max(temp_rect.p1.y, temp_rect.p2.y))
-
-            # Width dimension
-            dim_id_w = self._draw_linear_dimension_preview(p_bl, p_br, temp_rect.width(), "gray", offset_direction="down")
-            self.preview_dim_ids.append(dim_id_w)
-            # Height dimension
-            dim_id_h = self._draw_linear_dimension_preview(p_bl, p_tl, temp_rect.height(), "gray", offset_direction="left")
-            self.preview_dim_ids.append(dim_id_h)
+        if self.current_drawing_mode == "draw_rectangle_interactive":
+            self.frame_scheduler.preview(event.x, event.y)
+
+    def snap_point(self, x_canvas, y_canvas):
+        """CAD (x, y, kind) of the point the cursor at the canvas position snaps
+        to; kind is None (and the point unsnapped) if there is none in reach."""
+        x, y = self.canvas_to_cad(x_canvas, y_canvas)
+        if not self.snap_enabled:
+            return x, y, None
+        return snap(x, y, SNAP_PIXELS / self.scale, self.drawing.snap_index, visible_grid_spacing(self.scale))
+
+    def toggle_snap(self):
+        self.snap_enabled = not self.snap_enabled
+        log.info("snapping %s", "on" if self.snap_enabled else "off")
+        if not self.snap_enabled:
+            self._show_snap_marker(None)
+
+    def _show_snap_marker(self, position):
+        # position is the canvas position of the snapped point, or None to hide the marker
+        if position is None:
+            if self.snap_marker is not None:
+                self.canvas.itemconfig(self.snap_marker, state="hidden")
+            return
+        x, y = position
+        half = SNAP_PIXELS / 2
+        if self.snap_marker is None:
+            self.snap_marker = self.canvas.create_rectangle(0, 0, 0, 0, outline=SNAP_COLOR, width=2, state="hidden", tags="snap_marker")
+        self.canvas.coords(self.snap_marker, x - half, y - half, x + half, y + half)
+        self.canvas.itemconfig(self.snap_marker, state="normal")
+        self.canvas.tag_raise(self.snap_marker)
+
+    def _draw_preview(self, x, y):
+        # The preview items are created once and then moved with coords for
+        # every motion event, so a drag does not add canvas items.
+        if self.current_drawing_mode != "draw_rectangle_interactive":
+            return
+        current_cad_x, current_cad_y, kind = self.snap_point(x, y)
+        self._show_snap_marker(None if kind is None else self.cad_to_canvas(current_cad_x, current_cad_y))
+        if self.interactive_start_point_cad is not None:
+            temp_rect = Rectangle(self.interactive_start_point_cad, Point(current_cad_x, current_cad_y))
+            min_x, min_y, max_x, max_y = temp_rect.bounding_box()
+            (canvas_left, canvas_right), (canvas_bottom, canvas_top) = self.cad_to_canvas_batch([min_x, max_x], [min_y, max_y])
+
+            if not self.preview_items:
+                self._create_preview_items()
+            self.canvas.coords(self.preview_items[0], canvas_left, canvas_top, canvas_right, canvas_bottom)
+
+            dimensions = [
+                ((canvas_left, canvas_bottom), (canvas_right, canvas_bottom), temp_rect.width(), "down"),
+                ((canvas_left, canvas_bottom), (canvas_left, canvas_top), temp_rect.height(), "left"),
+            ]
+            for j, (canvas_start, canvas_end, value, offset_direction) in enumerate(dimensions):
+                ext1_id, ext2_id, dim_line_id, text_id = self.preview_items[1 + 4 * j:5 + 4 * j]
+                ext1, ext2, dim_line, text_pos = linear_dimension_layout(canvas_start, canvas_end, offset_direction=offset_direction)
+                self.canvas.coords(ext1_id, *ext1)
+                self.canvas.coords(ext2_id, *ext2)
+                self.canvas.coords(dim_line_id, *dim_line)
+                self.canvas.coords(text_id, *text_pos)
+                self.canvas.itemconfig(text_id, text=f"{value:.2f}")
+
+            if not self.preview_shown:
+                self.canvas.itemconfig("preview", state="normal")
+                self.preview_shown = True
+
+    def _create_preview_items(self):
+        # [rectangle, then ext1, ext2, dim_line, text for the width and the height]
+        color = "gray"
+        self.preview_items = [self.canvas.create_rectangle(0, 0, 0, 0, outline=color, dash=(5, 5), state="hidden", tags="preview")]
+        for _ in range(2):
+            self.preview_items += [
+                self.canvas.create_line(0, 0, 0, 0, fill=color, dash=(3, 3), state="hidden", tags="preview"),
+                self.canvas.create_line(0, 0, 0, 0, fill=color, dash=(3, 3), state="hidden", tags="preview"),
+                self.canvas.create_line(0, 0, 0, 0, fill=color, arrow=tk.BOTH, arrowshape=(8, 10, 3), state="hidden", tags="preview"),
+                self.canvas.create_text(0, 0, text="", fill=color, font=("Arial", 10, "bold"), state="hidden", tags="preview"),
+            ]
+        self.preview_shown = False
+
+    def _hide_preview(self):
+        if self.preview_shown:
+            self.canvas.itemconfig("preview", state="hidden")
+            self.preview_shown = False
 
     def activate_interactive_rectangle_drawing(self):
+        from tkinter import messagebox
         self.current_drawing_mode = "draw_rectangle_interactive"
         self.interactive_start_point_cad = None
+        # Build the snap grids for this zoom now rather than on the first motion event
+        self.drawing.snap_index.prepare(SNAP_PIXELS / self.scale)
         messagebox.showinfo("Interactive Drawing", "Click on the canvas to define the first corner of the rectangle.")
         # Bind drawing events and unbind pan/zoom events
         self.canvas.bind("<Button-1>", self.on_canvas_click)
@@ -193,227 +379,334 @@ class CADApp:
 
 
     def clear_canvas(self):
+        self.overlay_item = None
+        self.snap_marker = None
         self.canvas.delete("all")
-        self.objects = []
+        self.drawing.clear()
+        self.object_items = {}
+        self.item_entities = {}
+        self.object_dimension_types = {}
+        self.lod_tile_items = {}
         self.current_drawing_mode = "none"
         self.interactive_start_point_cad = None
-        self.preview_rectangle_id = None
-        self.preview_dim_ids = []
         self.redraw_all()
 
-    def redraw_all(self):
-        self.canvas.delete("all")
-        self._draw_grid()
-        self._draw_origin()
-        for obj in self.objects:
-            if isinstance(obj, Line):
-                self._draw_line_on_canvas(obj)
-            elif isinstance(obj, Rectangle):
-                self._draw_rectangle_on_canvas(obj)
-
-    def _draw_grid(self):
-        grid_color = "#E0E0E0"
-        grid_line_width = 1
-
-        cad_grid_spacing = 1.0
-        if self.scale < 5:
-            cad_grid_spacing = 10.0
-        elif self.scale < 20:
-            cad_grid_spacing = 5.0
+    def add_object(self, obj):
+        self.drawing.add(obj)
+        with self._frame("edit"):
+            if not self._show_object(obj):
+                self._sync_lod_tiles(self._visible_region_cad())
+
+    def refresh_objects(self, objs):
+        # Recreate the canvas items of objects after the drawing updated them.
+        # An edit can move an object between being drawn and being part of a
+        # level-of-detail tile, or out of its old tile, so the tiles are
+        # synced as well.
+        with self._frame("edit"):
+            for obj in objs:
+                self._forget_object(obj)
+                if obj in self.drawing.spatial_index:
+                    self._show_object(obj)
+            self._sync_lod_tiles(self._visible_region_cad())
+
+    def undo(self):
+        if self.drawing.journal.can_undo():
+            self._show_changes(self.drawing.undo())
+
+    def redo(self):
+        if self.drawing.journal.can_redo():
+            self._show_changes(self.drawing.redo())
+
+    def _show_changes(self, objs):
+        # objs as returned by Drawing.undo(): the changed objects, or None for all of them
+        if objs is None:
+            self.redraw_all()
         else:
-            cad_grid_spacing = 1.0
+            self.refresh_objects(objs)
+
+    def _show_object(self, obj):
+        # Draw obj if it is in view and large enough to be drawn on its own;
+        # returns whether it was drawn. Smaller objects are shown by the
+        # level-of-detail tiles, see _sync_lod_tiles.
+        if self._is_visible(obj) and self.drawing.lod_index.size_class(obj) > self._lod_level():
+            self._draw_object(obj)
+            return True
+        return False
+
+    def _forget_object(self, obj):
+        item_ids = self.object_items.pop(obj, ())
+        self.canvas.delete(*item_ids)
+        for item_id in item_ids:
+            del self.item_entities[item_id]
+        self.object_dimension_types.pop(obj, None)
 
+    def redraw_all(self):
+        if self._startup_redraw is not None:
+            self.master.after_cancel(self._startup_redraw)
+            self._startup_redraw = None
+        with self._frame("redraw"):
+            self.canvas.delete("all")
+            self.object_items = {}
+            self.item_entities = {}
+            self.object_dimension_types = {}
+            self.lod_tile_items = {}
+            self.grid_sets = {}
+            self.origin_items = []
+            self.preview_items = []
+            self.preview_shown = False
+            self.snap_marker = None
+            self.overlay_item = None
+            self._update_background()
+            with self.metrics.section("entities"):
+                region = self._visible_region_cad()
+                self._draw_objects(self._visible_objects(region))
+                self._sync_lod_tiles(region)
+
+    def _viewport_cad(self):
         x_min_cad, y_max_cad = self.canvas_to_cad(0, 0)
         x_max_cad, y_min_cad = self.canvas_to_cad(self.canvas_width, self.canvas_height)
-
-        start_x = math.floor(x_min_cad / cad_grid_spacing) * cad_grid_spacing
-        end_x = math.ceil(x_max_cad / cad_grid_spacing) * cad_grid_spacing
-        for x_cad in self._frange(start_x, end_x + cad_grid_spacing, cad_grid_spacing):
-            x_canvas, _ = self.cad_to_canvas(x_cad, 0)
-            self.canvas.create_line(x_canvas, 0, x_canvas, self.canvas_height, fill=grid_color, width=grid_line_width)
-
-        start_y = math.floor(y_min_cad / cad_grid_spacing) * cad_grid_spacing
-        end_y = math.ceil(y_max_cad / cad_grid_spacing) * cad_grid_spacing
-        for y_cad in self._frange(start_y, end_y + cad_grid_spacing, cad_grid_spacing):
-            _, y_canvas = self.cad_to_canvas(0, y_cad)
-            self.canvas.create_line(0, y_canvas, self.canvas_width, y_canvas, fill=grid_color, width=grid_line_width)
-
-    def _frange(self, start, stop, step):
-        while start < stop:
-            yield start
-            start += step
-
-    def _draw_origin(self):
-        origin_x_canvas, origin_y_canvas = self.cad_to_canvas(0, 0)
-
-        self.canvas.create_line(0, origin_y_canvas, self.canvas_width, origin_y_canvas, fill="gray", width=2, arrow=tk.LAST)
-        self.canvas.create_text(self.canvas_width - 20, origin_y_canvas - 10, text="X", fill="gray", font=("Arial", 10, "bold"))
-
-        self.canvas.create_line(origin_x_canvas, self.canvas_height, origin_x_canvas, 0, fill="gray", width=2, arrow=tk.LAST)
-        self.canvas.create_text(origin_x_canvas + 10, 20, text="Y", fill="gray", font=("Arial", 10, "bold"))
-
-    def _draw_line_on_canvas(self, line_obj):
-        canvas_x1, canvas_y1 = self.cad_to_canvas(line_obj.start.x, line_obj.start.y)
-        canvas_x2, canvas_y2 = self.cad_to_canvas(line_obj.end.x, line_obj.end.y)
-        self.canvas.create_line(canvas_x1, canvas_y1, canvas_x2, canvas_y2, fill="blue", width=2)
-
-        self._draw_linear_dimension(line_obj.start, line_obj.end, line_obj.length(), "red", obj=line_obj, dim_type="length")
-
-    def _draw_rectangle_on_canvas(self, rect_obj):
-        print(f"_draw_rectangle_on_canvas called for {rect_obj}")
-        p_bl = Point(min(rect_obj.p1.x, rect_obj.p2.x), min(rect_obj.p1.y, rect_obj.p2.y))
-        p_br = Point(max(rect_obj.p1.x, rect_obj.p2.x), min(rect_obj.p1.y, rect_obj.p2.y))
-        p_tl = Point(min(rect_obj.p1.x, rect_obj.p2.x), max(rect_obj.p1.y, rect_obj.p2.y))
-        p_tr = Point(max(rect_obj.p1.x, rect_obj.p2.x), max(rect_obj.p1.y, rect_obj.p2.y))
-
-        canvas_x1, canvas_y1 = self.cad_to_canvas(p_bl.x, p_tl.y)
-        canvas_x2, canvas_y2 = self.cad_to_canvas(p_br.x, p_bl.y)
-
-        self.canvas.create_rectangle(canvas_x1, canvas_y1, canvas_x2, canvas_y2, outline="green", width=2)
-        print(f"Canvas coordinates for rectangle: ({canvas_x1}, {canvas_y1}) to ({canvas_x2}, {canvas_y2})")
-
-        self._draw_linear_dimension(p_bl, p_br, rect_obj.width(), "purple", offset_direction="down", obj=rect_obj, dim_type="width")
-        self._draw_linear_dimension(p_bl, p_tl, rect_obj.height(), "purple", offset_direction="left", obj=rect_obj, dim_type="height")
-
-    def _draw_linear_dimension(self, p_start_cad, p_end_cad, value, color, offset_distance=20, offset_direction="auto", obj=None, dim_type=None):
-        canvas_x1, canvas_y1 = self.cad_to_canvas(p_start_cad.x, p_start_cad.y)
-        canvas_x2, canvas_y2 = self.cad_to_canvas(p_end_cad.x, p_end_cad.y)
-
-        angle = math.atan2(canvas_y2 - canvas_y1, canvas_x2 - canvas_x1)
-
-        if offset_direction == "auto":
-            if -math.pi/4 < angle <= math.pi/4:
-                offset_dx = 0
-                offset_dy = offset_distance
-            elif math.pi/4 < angle <= 3*math.pi/4:
-                offset_dx = -offset_distance
-                offset_dy = 0
-            elif -3*math.pi/4 < angle <= -math.pi/4:
-                offset_dx = offset_distance
-                offset_dy = 0
+        return x_min_cad, y_min_cad, x_max_cad, y_max_cad
+
+    def _visible_region_cad(self):
+        # Viewport grown by the pixel extent of dimension lines and texts, so
+        # an object just outside the view still shows its dimensions.
+        margin = 50 / self.scale
+        x_min_cad, y_min_cad, x_max_cad, y_max_cad = self._viewport_cad()
+        return x_min_cad - margin, y_min_cad - margin, x_max_cad + margin, y_max_cad + margin
+
+    def _is_visible(self, obj):
+        min_x, min_y, max_x, max_y = obj.bounding_box()
+        x_min_cad, y_min_cad, x_max_cad, y_max_cad = self._visible_region_cad()
+        return min_x <= x_max_cad and max_x >= x_min_cad and min_y <= y_max_cad and max_y >= y_min_cad
+
+    def _lod_level(self):
+        return lod_level(self.scale)
+
+    def _visible_objects(self, region):
+        # Objects in region large enough to be drawn individually at the current zoom
+        self.drawing.materialize(*region)
+        return self.drawing.lod_index.large_entities(self._lod_level(), *region)
+
+    def _sync_visible_objects(self):
+        # Drop the items of objects that left the view and draw the ones that entered it.
+        region = self._visible_region_cad()
+        visible = self._visible_objects(region)
+        visible_keys = {id(obj) for obj in visible}
+        for obj in [obj for obj in self.object_items if id(obj) not in visible_keys]:
+            self._forget_object(obj)
+        self._draw_objects([obj for obj in visible if obj not in self.object_items])
+        self._sync_lod_tiles(region)
+
+    def _sync_lod_tiles(self, region):
+        # Entities too small to draw are shown as one filled tile per occupied
+        # tile of the current level, so their item count is bounded by the
+        # canvas size rather than the drawing size.
+        level = self._lod_level()
+        wanted = {(level, tx, ty) for tx, ty in self.drawing.lod_index.tiles(level, *region)}
+        for key in [key for key in self.lod_tile_items if key not in wanted]:
+            self.canvas.delete(self.lod_tile_items.pop(key))
+
+        new_keys = [key for key in wanted if key not in self.lod_tile_items]
+        size = 2.0 ** level
+        xs, ys = self.cad_to_canvas_batch(
+            [x for _, tx, _ in new_keys for x in (tx * size, (tx + 1) * size)],
+            [y for _, _, ty in new_keys for y in ((ty + 1) * size, ty * size)])
+        for i, key in enumerate(new_keys):
+            self.lod_tile_items[key] = self.canvas.create_rectangle(
+                xs[2 * i], ys[2 * i], xs[2 * i + 1], ys[2 * i + 1],
+                fill=LOD_TILE_COLOR, outline="", tags=("entity", "geometry", "lod"))
+
+    def _update_background(self):
+        with self.metrics.section("grid"):
+            self._sync_grid()
+        with self.metrics.section("origin"):
+            self._sync_origin()
+
+    def _draw_object(self, obj):
+        self._draw_objects([obj])
+
+    def _canvas_anchor_points(self, objs):
+        # Two points per object, transformed in one batch: the ends of a line,
+        # or the bottom-left and top-right corners of a rectangle.
+        xs_cad = []
+        ys_cad = []
+        for obj in objs:
+            if isinstance(obj, Line):
+                xs_cad += (obj.start.x, obj.end.x)
+                ys_cad += (obj.start.y, obj.end.y)
             else:
-                offset_dx = -offset_distance
-                offset_dy = 0
-        elif offset_direction == "down":
-            offset_dx = 0
-            offset_dy = offset_distance
-        elif offset_direction == "up":
-            offset_dx = 0
-            offset_dy = -offset_distance
-        elif offset_direction == "left":
-            offset_dx = -offset_distance
-            offset_dy = 0
-        elif offset_direction == "right":
-            offset_dx = offset_distance
-            offset_dy = 0
-        else:
-            offset_dx = 0
-            offset_dy = offset_distance
-
-        dim_line_x1 = canvas_x1 + offset_dx
-        dim_line_y1 = canvas_y1 + offset_dy
-        dim_line_x2 = canvas_x2 + offset_dx
-        dim_line_y2 = canvas_y2 + offset_dy
-
-        self.canvas.create_line(canvas_x1, canvas_y1, dim_line_x1, dim_line_y1, fill=color, dash=(3, 3))
-        self.canvas.create_line(canvas_x2, canvas_y2, dim_line_x2, dim_line_y2, fill=color, dash=(3, 3))
+                min_x, min_y, max_x, max_y = obj.bounding_box()
+                xs_cad += (min_x, max_x)
+                ys_cad += (min_y, max_y)
+        return self.cad_to_canvas_batch(xs_cad, ys_cad)
+
+    def _draw_objects(self, objs):
+        with self.metrics.section("entities"):
+            xs, ys = self._canvas_anchor_points(objs)
+            for i, obj in enumerate(objs):
+                anchors = (xs[2 * i], ys[2 * i], xs[2 * i + 1], ys[2 * i + 1])
+                dimensions = object_dimensions(obj, anchors)
+                if isinstance(obj, Line):
+                    item_ids = self._draw_line_on_canvas(obj, anchors, dimensions)
+                elif isinstance(obj, Rectangle):
+                    item_ids = self._draw_rectangle_on_canvas(obj, anchors, dimensions)
+                else:
+                    continue
+                self.object_items[obj] = item_ids
+                for item_id in item_ids:
+                    self.item_entities[item_id] = obj.eid
+                self.object_dimension_types[obj] = tuple(dimension[5] for dimension in dimensions)
+
+    def _sync_grid(self):
+        # The grid is periodic, so each spacing level keeps one set of lines
+        # laid out from one period before the canvas edge. Its position only
+        # depends on the offset modulo the period: a pan is a single move of
+        # the set by the change in that phase, and lines are created only when
+        # a level is first shown or needs more lines to cover the canvas.
+        spacing = grid_spacing(self.scale)
+        period = spacing * self.scale
+        if period < GRID_MIN_PIXELS:
+            spacing = None
+        for other, grid_set in self.grid_sets.items():
+            if other != spacing and grid_set["shown"]:
+                self.canvas.itemconfig(grid_set["tag"], state="hidden")
+                grid_set["shown"] = False
+        if spacing is None:
+            return
 
-        self.canvas.create_line(dim_line_x1, dim_line_y1, dim_line_x2, dim_line_y2, fill=color, arrow=tk.BOTH, arrowshape=(8, 10, 3))
+        grid_set = self.grid_sets.get(spacing)
+        if grid_set is None:
+            grid_set = self.grid_sets[spacing] = {
+                "tag": f"grid_{spacing:g}", "items": [], "period": None, "phase": None, "shown": True,
+            }
+        phase = (self.offset_x % period - period, self.offset_y % period - period)
+        if grid_set["period"] != period:
+            self._layout_grid_set(grid_set, period, phase)
+        elif grid_set["phase"] != phase:
+            self.canvas.move(grid_set["tag"], phase[0] - grid_set["phase"][0], phase[1] - grid_set["phase"][1])
+            grid_set["phase"] = phase
+        if not grid_set["shown"]:
+            self.canvas.itemconfig(grid_set["tag"], state="normal")
+            grid_set["shown"] = True
+
+    def _layout_grid_set(self, grid_set, period, phase):
+        # Lines at phase + i * period, enough of them to cover the canvas for any phase in [-period, 0)
+        x0, y0 = phase
+        x_count = math.ceil(self.canvas_width / period) + 2
+        y_count = math.ceil(self.canvas_height / period) + 2
+        x_end = x0 + (x_count - 1) * period
+        y_end = y0 + (y_count - 1) * period
+        lines = [(x0 + i * period, y0, x0 + i * period, y_end) for i in range(x_count)]
+        lines += [(x0, y0 + i * period, x_end, y0 + i * period) for i in range(y_count)]
+
+        items = grid_set["items"]
+        if len(items) > len(lines):
+            self.canvas.delete(*items[len(lines):])
+            del items[len(lines):]
+        for item_id, line in zip(items, lines):
+            self.canvas.coords(item_id, *line)
+        if len(items) < len(lines):
+            state = "normal" if grid_set["shown"] else "hidden"
+            for line in lines[len(items):]:
+                items.append(self.canvas.create_line(*line, fill=GRID_COLOR, width=1, state=state, tags=("grid", grid_set["tag"])))
+            self.canvas.tag_lower("grid")
+        grid_set["period"] = period
+        grid_set["phase"] = phase
+
+    def _sync_origin(self):
+        origin_x_canvas, origin_y_canvas = self.cad_to_canvas(0, 0)
+        coords = axis_layout(origin_x_canvas, origin_y_canvas, self.canvas_width, self.canvas_height)
+        if self.origin_items:
+            for item_id, item_coords in zip(self.origin_items, coords):
+                self.canvas.coords(item_id, *item_coords)
+            return
 
-        text_x = (dim_line_x1 + dim_line_x2) / 2
-        text_y = (dim_line_y1 + dim_line_y2) / 2
-        
-        return self.canvas.create_text(
-            text_x, text_y - 10,
+        self.origin_items = [
+            self.canvas.create_line(*coords[0], fill=AXIS_COLOR, width=2, arrow=tk.LAST, tags="origin"),
+            self.canvas.create_text(*coords[1], text="X", fill=AXIS_COLOR, font=("Arial", 10, "bold"), tags="origin"),
+            self.canvas.create_line(*coords[2], fill=AXIS_COLOR, width=2, arrow=tk.LAST, tags="origin"),
+            self.canvas.create_text(*coords[3], text="Y", fill=AXIS_COLOR, font=("Arial", 10, "bold"), tags="origin"),
+        ]
+
+    def _draw_line_on_canvas(self, line_obj, anchors, dimensions):
+        item_ids = [self.canvas.create_line(*anchors, fill=LINE_COLOR, width=2, tags=("entity", "geometry"))]
+        item_ids.extend(self._draw_dimensions(dimensions))
+        return item_ids
+
+    def _draw_rectangle_on_canvas(self, rect_obj, anchors, dimensions):
+        canvas_left, canvas_bottom, canvas_right, canvas_top = anchors
+
+        item_ids = [self.canvas.create_rectangle(canvas_left, canvas_top, canvas_right, canvas_bottom, outline=RECTANGLE_COLOR, width=2, tags=("entity", "geometry"))]
+        log.debug("rectangle drawn eid=%s canvas=(%.1f, %.1f, %.1f, %.1f)", rect_obj.eid, canvas_left, canvas_top, canvas_right, canvas_bottom)
+        item_ids.extend(self._draw_dimensions(dimensions))
+        return item_ids
+
+    def _draw_dimensions(self, dimensions):
+        item_ids = []
+        if dimensions:
+            with self.metrics.section("dimensions"):
+                for canvas_start, canvas_end, value, color, offset_direction, dim_type in dimensions:
+                    item_ids.extend(self._draw_linear_dimension(canvas_start, canvas_end, value, color, offset_direction=offset_direction, dim_type=dim_type))
+        return item_ids
+
+    def _update_dimension_items(self, objs):
+        # Item IDs are [geometry, ext1, ext2, dim_line, text, ext1, ...] as built by _draw_objects.
+        # Objects whose set of readable dimensions changed are recreated instead.
+        xs, ys = self._canvas_anchor_points(objs)
+        coords = self.canvas.coords
+        recreate = []
+        for i, obj in enumerate(objs):
+            anchors = (xs[2 * i], ys[2 * i], xs[2 * i + 1], ys[2 * i + 1])
+            dimensions = object_dimensions(obj, anchors)
+            if tuple(dimension[5] for dimension in dimensions) != self.object_dimension_types[obj]:
+                recreate.append(obj)
+                continue
+            dim_item_ids = self.object_items[obj][1:]
+            for j, (canvas_start, canvas_end, _, _, offset_direction, _) in enumerate(dimensions):
+                ext1_id, ext2_id, dim_line_id, text_id = dim_item_ids[4 * j:4 * j + 4]
+                ext1, ext2, dim_line, text_pos = linear_dimension_layout(canvas_start, canvas_end, offset_direction=offset_direction)
+                coords(ext1_id, *ext1)
+                coords(ext2_id, *ext2)
+                coords(dim_line_id, *dim_line)
+                coords(text_id, *text_pos)
+        for obj in recreate:
+            self._forget_object(obj)
+        self._draw_objects(recreate)
+
+    def _draw_linear_dimension(self, canvas_start, canvas_end, value, color, offset_distance=20, offset_direction="auto", dim_type=None):
+        ext1, ext2, dim_line, text_pos = linear_dimension_layout(canvas_start, canvas_end, offset_distance, offset_direction)
+
+        ext1_id = self.canvas.create_line(*ext1, fill=color, dash=(3, 3), tags=("entity", "dimension"))
+        ext2_id = self.canvas.create_line(*ext2, fill=color, dash=(3, 3), tags=("entity", "dimension"))
+
+        dim_line_id = self.canvas.create_line(*dim_line, fill=color, arrow=tk.BOTH, arrowshape=(8, 10, 3), tags=("entity", "dimension"))
+
+        text_id = self.canvas.create_text(
+            *text_pos,
             text=f"{value:.2f}",
             fill=color,
             font=("Arial", 10, "bold"),
-            tags=("dimension_text", f"obj_{id(obj)}", dim_type)
-        )
-
-    def _draw_linear_dimension_preview(self, p_start_cad, p_end_cad, value, color, offset_distance=20, offset_direction="auto"):
-        # This is a simplified version for preview, does not bind to object
-        canvas_x1, canvas_y1 = self.cad_to_canvas(p_start_cad.x, p_start_cad.y)
-        canvas_x2, canvas_y2 = self.cad_to_canvas(p_end_cad.x, p_end_cad.y)
-
-        angle = math.atan2(canvas_y2 - canvas_y1, canvas_x2 - canvas_x1)
-
-        if offset_direction == "auto":
-            if -math.pi/4 < angle <= math.pi/4:
-                offset_dx = 0
-                offset_dy = offset_distance
-            elif math.pi/4 < angle <= 3*math.pi/4:
-                offset_dx = -offset_distance
-                offset_dy = 0
-            elif -3*math.pi/4 < angle <= -math.pi/4:
-                offset_dx = offset_distance
-                offset_dy = 0
-            else:
-                offset_dx = -offset_distance
-                offset_dy = 0
-        elif offset_direction == "down":
-            offset_dx = 0
-            offset_dy = offset_distance
-        elif offset_direction == "up":
-            offset_dx = 0
-            offset_dy = -offset_distance
-        elif offset_direction == "left":
-            offset_dx = -offset_distance
-            offset_dy = 0
-        elif offset_direction == "right":
-            offset_dx = offset_distance
-            offset_dy = 0
-        else:
-            offset_dx = 0
-            offset_dy = offset_distance
-
-        dim_line_x1 = canvas_x1 + offset_dx
-        dim_line_y1 = canvas_y1 + offset_dy
-        dim_line_x2 = canvas_x2 + offset_dx
-        dim_line_y2 = canvas_y2 + offset_dy
-
-        self.canvas.create_line(canvas_x1, canvas_y1, dim_line_x1, dim_line_y1, fill=color, dash=(3, 3))
-        self.canvas.create_line(canvas_x2, canvas_y2, dim_line_x2, dim_line_y2, fill=color, dash=(3, 3))
-
-        self.canvas.create_line(dim_line_x1, dim_line_y1, dim_line_x2, dim_line_y2, fill=color, arrow=tk.BOTH, arrowshape=(8, 10, 3))
-
-        text_x = (dim_line_x1 + dim_line_x2) / 2
-        text_y = (dim_line_y1 + dim_line_y2) / 2
-        
-        return self.canvas.create_text(
-            text_x, text_y - 10,
-            text=f"{value:.2f}",
-            fill=color,
-            font=("Arial", 10, "bold")
+            tags=("entity", "dimension", "dimension_text", dim_type)
         )
+        return ext1_id, ext2_id, dim_line_id, text_id
 
     def on_dimension_click(self, event):
+        self.frame_scheduler.flush()
         item_id = self.canvas.find_closest(event.x, event.y)[0]
         tags = self.canvas.gettags(item_id)
         
-        obj_id = None
+        eid = self.item_entities.get(item_id)
         dim_type = None
         for tag in tags:
-            if tag.startswith("obj_"):
-                obj_id = int(tag.split("_")[1])
-            elif tag in ["length", "width", "height"]:
+            if tag in ["length", "width", "height"]:
                 dim_type = tag
         
-        if obj_id and dim_type:
-            target_obj = None
-            for obj in self.objects:
-                if id(obj) == obj_id:
-                    target_obj = obj
-                    break
+        if eid and dim_type:
+            target_obj = self.drawing.entity(eid)
             
             if target_obj:
-                current_value = 0.0
-                if dim_type == "length" and isinstance(target_obj, Line):
-                    current_value = target_obj.length()
-                elif dim_type == "width" and isinstance(target_obj, Rectangle):
-                    current_value = target_obj.width()
-                elif dim_type == "height" and isinstance(target_obj, Rectangle):
-                    current_value = target_obj.height()
+                from tkinter import messagebox, simpledialog
+                current_value = self.drawing.dimension_value(target_obj, dim_type)
                 
                 new_value = simpledialog.askfloat(
                     f"Edit {dim_type.capitalize()}",
@@ -422,19 +715,55 @@ class CADApp:
                 )
                 
                 if new_value is not None:
-                    print(f"New {dim_type} for {target_obj.__class__.__name__} (ID: {obj_id}): {new_value}")
-                    if dim_type == "length" and isinstance(target_obj, Line):
-                        target_obj.set_length(new_value)
-                    elif dim_type == "width" and isinstance(target_obj, Rectangle):
-                        target_obj.set_width(new_value)
-                    elif dim_type == "height" and isinstance(target_obj, Rectangle):
-                        target_obj.set_height(new_value)
-                    
-                    self.redraw_all()
+                    log.info("dimension edit eid=%s type=%s %s=%s", eid, target_obj.__class__.__name__, dim_type, new_value)
+                    try:
+                        moved = self.drawing.set_dimension(target_obj, dim_type, new_value)
+                    except ValueError as e:
+                        messagebox.showerror("Constraint Error", str(e))
+                        return
+                    # Connected geometry follows the edit through its constraints
+                    self.refresh_objects(moved)
             else:
-                print(f"Error: Object with ID {obj_id} not found.")
+                log.warning("dimension click on missing entity eid=%s", eid)
         else:
-            print("Clicked item is not a dimension text or missing tags.")
+            log.debug("click item=%s is not a dimension text", item_id)
+
+    def _show_file_progress(self, entities, bytes_done, bytes_total):
+        percent = f" ({100 * bytes_done / bytes_total:.0f}%)" if bytes_total else ""
+        self.master.title(f"CLI CAD - Graphical Interface - {entities} entities{percent}")
+        self.master.update_idletasks()
+
+    def import_drawing(self):
+        from tkinter import filedialog, messagebox
+        import drawing_io
+        path = filedialog.askopenfilename(filetypes=[("DXF", "*.dxf"), ("SVG", "*.svg"), ("Native", "*.izc"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            if path.lower().endswith(".izc") and not len(self.drawing):
+                # Map native files into an empty drawing instead of reading them:
+                # only the entities in view are loaded.
+                self.drawing.open_mapped(path)
+            else:
+                with self.drawing.journal.group(): # undone as one step
+                    for obj in drawing_io.read(path, self._show_file_progress):
+                        self.drawing.add(obj)
+        except (OSError, ValueError, SyntaxError) as e: # SyntaxError covers malformed SVG
+            messagebox.showerror("Import Error", f"Could not import {path}:\n{e}")
+        self.master.title("CLI CAD - Graphical Interface")
+        self.redraw_all()
+
+    def export_drawing(self):
+        from tkinter import filedialog, messagebox
+        import drawing_io
+        path = filedialog.asksaveasfilename(defaultextension=".dxf", filetypes=[("DXF", "*.dxf"), ("SVG", "*.svg"), ("Native", "*.izc")])
+        if not path:
+            return
+        try:
+            drawing_io.write(path, self.drawing, self._show_file_progress)
+        except OSError as e:
+            messagebox.showerror("Export Error", f"Could not export {path}:\n{e}")
+        self.master.title("CLI CAD - Graphical Interface")
 
     def draw_line_manual(self):
         try:
@@ -443,14 +772,14 @@ class CADApp:
             x2 = float(self.x2_entry.get())
             y2 = float(self.y2_entry.get())
         except ValueError:
+            from tkinter import messagebox
             messagebox.showerror("Input Error", "Please enter valid numbers for coordinates.")
             return
 
         p1 = Point(x1, y1)
         p2 = Point(x2, y2)
         line = Line(p1, p2)
-        self.objects.append(line)
-        self.redraw_all()
+        self.add_object(line)
 
     def draw_rectangle_manual(self):
         try:
@@ -459,16 +788,19 @@ class CADApp:
             x2 = float(self.x2_entry.get())
             y2 = float(self.y2_entry.get())
         except ValueError:
+            from tkinter import messagebox
             messagebox.showerror("Input Error", "Please enter valid numbers for coordinates.")
             return
 
         p1 = Point(x1, y1)
         p2 = Point(x2, y2)
         rect = Rectangle(p1, p2)
-        self.objects.append(rect)
-        self.redraw_all()
+        self.add_object(rect)
 
-    if __name__ == "__main__":
+if __name__ == "__main__":
+    # IZCAD_LOG_LEVEL=DEBUG (or INFO) shows the diagnostics of the izcad logger
+    logging.basicConfig(level=os.environ.get("IZCAD_LOG_LEVEL", "WARNING").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     root = tk.Tk()
     app = CADApp(root)
     root.mainloop()
\ No newline at end of file
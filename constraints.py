@@ -0,0 +1,376 @@
+"""Geometric constraints between entities and a sparse solver for them.
+
+Every entity has four coordinates, numbered as in geometry.coordinates():
+x1, y1, x2, y2. A point of an entity is a pair of coordinate numbers, named
+in POINTS. Each constraint is a set of residuals that are zero when it holds,
+with their derivatives by (entity, coordinate number).
+
+The solver runs Gauss-Newton steps over the constraints of one connected
+component. Each step is the smallest coordinate change that satisfies the
+linearised constraints, dx = -J^T y with (J J^T) y = r solved by conjugate
+gradients without forming J J^T, so geometry that does not need to move
+stays put and the cost of a step follows the number of constraint terms in
+the component, not the size of the drawing.
+"""
+
+import math
+
+from geometry import Line, Rectangle, coordinates
+
+# Point name -> (x coordinate number, y coordinate number)
+POINTS = {
+    Line: {"start": (0, 1), "end": (2, 3)},
+    Rectangle: {"p1": (0, 1), "p2": (2, 3), "p1x_p2y": (0, 3), "p2x_p1y": (2, 1)},
+}
+
+# Points closer than this are joined by a coincident constraint when an entity is added
+COINCIDENT_TOLERANCE = 1e-9
+
+
+def entity_points(obj):
+    for cls, points in POINTS.items():
+        if isinstance(obj, cls):
+            return points
+    raise ValueError(f"{obj!r} has no points.")
+
+
+def _sign(value):
+    return -1.0 if value < 0 else 1.0
+
+
+class Constraint:
+    """Base class: entities is the tuple of constrained entities."""
+
+    kind = None
+
+    def __init__(self, *entities):
+        self.entities = entities
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}{self.entities!r}"
+
+    def residuals(self, values):
+        """[(residual, {(entity, coordinate number): derivative}), ...] where
+        values maps (entity, coordinate number) to its current value."""
+        raise NotImplementedError
+
+
+class Coincident(Constraint):
+    kind = "coincident"
+
+    def __init__(self, a, a_point, b, b_point):
+        super().__init__(a, b)
+        self.a_point = a_point
+        self.b_point = b_point
+        self._a = entity_points(a)[a_point]
+        self._b = entity_points(b)[b_point]
+
+    def __repr__(self):
+        a, b = self.entities
+        return f"Coincident({a!r}.{self.a_point}, {b!r}.{self.b_point})"
+
+    def residuals(self, values):
+        a, b = self.entities
+        return [
+            (values[a, i] - values[b, j], {(a, i): 1.0, (b, j): -1.0})
+            for i, j in zip(self._a, self._b)
+        ]
+
+
+class Length(Constraint):
+    kind = "length"
+
+    def __init__(self, line, value):
+        super().__init__(line)
+        self.value = value
+
+    def residuals(self, values):
+        line, = self.entities
+        dx = values[line, 2] - values[line, 0]
+        dy = values[line, 3] - values[line, 1]
+        length = math.hypot(dx, dy)
+        # A zero-length line has no direction; grow it along x like Line.set_length
+        ux, uy = (dx / length, dy / length) if length else (1.0, 0.0)
+        return [(length - self.value, {(line, 0): -ux, (line, 1): -uy, (line, 2): ux, (line, 3): uy})]
+
+
+class _Extent(Constraint):
+    # |x2 - x1| (axis 0) or |y2 - y1| (axis 1) of a rectangle
+    axis = 0
+
+    def _extent(self, values, obj):
+        extent = values[obj, 2 + self.axis] - values[obj, self.axis]
+        sign = _sign(extent)
+        return abs(extent), {(obj, self.axis): -sign, (obj, 2 + self.axis): sign}
+
+
+class Width(_Extent):
+    kind = "width"
+
+    def __init__(self, rect, value):
+        super().__init__(rect)
+        self.value = value
+
+    def residuals(self, values):
+        extent, derivatives = self._extent(values, self.entities[0])
+        return [(extent - self.value, derivatives)]
+
+
+class Height(Width):
+    kind = "height"
+    axis = 1
+
+
+class EqualWidth(_Extent):
+    kind = "equal-width"
+
+    def residuals(self, values):
+        a, b = self.entities
+        extent_a, derivatives = self._extent(values, a)
+        extent_b, derivatives_b = self._extent(values, b)
+        for var, derivative in derivatives_b.items():
+            derivatives[var] = derivatives.get(var, 0.0) - derivative
+        return [(extent_a - extent_b, derivatives)]
+
+
+class EqualHeight(EqualWidth):
+    kind = "equal-height"
+    axis = 1
+
+
+class Horizontal(Constraint):
+    kind = "horizontal"
+    axis = 1
+
+    def residuals(self, values):
+        line, = self.entities
+        a = self.axis
+        return [(values[line, 2 + a] - values[line, a], {(line, a): -1.0, (line, 2 + a): 1.0})]
+
+
+class Vertical(Horizontal):
+    kind = "vertical"
+    axis = 0
+
+
+# Constraints driven by the dimension of the same name
+DIMENSION_CONSTRAINTS = {"length": Length, "width": Width, "height": Height}
+
+
+class ConstraintSystem:
+    """The constraints of a drawing, indexed by entity."""
+
+    def __init__(self, tolerance=1e-12, max_iterations=50):
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.clear()
+
+    def clear(self):
+        self._by_entity = {} # entity -> [constraint, ...]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, constraint):
+        for obj in set(constraint.entities):
+            self._by_entity.setdefault(obj, []).append(constraint)
+        self._count += 1
+
+    def remove(self, constraint):
+        for obj in set(constraint.entities):
+            constraints = self._by_entity[obj]
+            constraints.remove(constraint)
+            if not constraints:
+                del self._by_entity[obj]
+        self._count -= 1
+
+    def constraints_of(self, obj):
+        return list(self._by_entity.get(obj, ()))
+
+    def dimension_constraint(self, obj, dim_type):
+        for constraint in self._by_entity.get(obj, ()):
+            if constraint.kind == dim_type:
+                return constraint
+        return None
+
+    def component(self, obj):
+        """The entities and constraints connected to obj through constraints."""
+        entities = {obj}
+        constraints = []
+        seen = set()
+        stack = [obj]
+        while stack:
+            for constraint in self._by_entity.get(stack.pop(), ()):
+                if id(constraint) in seen:
+                    continue
+                seen.add(id(constraint))
+                constraints.append(constraint)
+                for other in constraint.entities:
+                    if other not in entities:
+                        entities.add(other)
+                        stack.append(other)
+        return entities, constraints
+
+    def solve(self, obj, fixed=()):
+        """Solve the component of obj, keeping the (entity, coordinate number)
+        variables in fixed unchanged.
+
+        Returns {entity: new coordinates} for the entities that moved; the
+        entities themselves are not changed. Raises ValueError if the
+        constraints cannot be satisfied.
+        """
+        entities, constraints = self.component(obj)
+        values = {}
+        for entity in entities:
+            for k, value in enumerate(coordinates(entity)):
+                values[entity, k] = value
+        fixed = set(fixed)
+        scale = max(1.0, max(abs(value) for value in values.values()))
+        tolerance = self.tolerance * scale
+
+        # Coincident points share one variable instead of adding residual rows
+        alias, groups = self._merge_coincident(obj, constraints, values, fixed, tolerance)
+        constraints = [constraint for constraint in constraints if not isinstance(constraint, Coincident)]
+
+        rows, r = self._linearise(constraints, values, fixed, alias)
+        norm = _norm(r)
+        iterations = 0
+        while max(map(abs, r), default=0.0) > tolerance:
+            iterations += 1
+            if iterations > self.max_iterations:
+                raise ValueError("The constraints cannot be satisfied.")
+            step = _min_norm_step(rows, r)
+            # Halve the step until the residual decreases (Gauss-Newton may overshoot)
+            alpha = 1.0
+            while True:
+                trial = dict(values)
+                for var, delta in step.items():
+                    value = trial[var] - alpha * delta
+                    for member in groups.get(var, (var,)):
+                        trial[member] = value
+                trial_rows, trial_r = self._linearise(constraints, trial, fixed, alias)
+                trial_norm = _norm(trial_r)
+                if trial_norm < norm or alpha < 1e-6:
+                    break
+                alpha /= 2
+            if trial_norm >= norm:
+                raise ValueError("The constraints cannot be satisfied.")
+            values, rows, r, norm = trial, trial_rows, trial_r, trial_norm
+
+        # Coordinates that only moved by rounding noise keep their old value
+        moved = {}
+        for entity in entities:
+            old = coordinates(entity)
+            new = tuple(values[entity, k] if abs(values[entity, k] - value) > tolerance else value
+                        for k, value in enumerate(old))
+            if new != old:
+                moved[entity] = new
+        return moved
+
+    @staticmethod
+    def _merge_coincident(obj, constraints, values, fixed, tolerance):
+        # Union the variables joined by coincident constraints. Returns
+        # (alias, groups): alias maps each merged variable to its group's
+        # representative, groups maps a representative to its members. The
+        # members get a common starting value, taken from a fixed member,
+        # else from obj (the entity being edited), else their mean; the
+        # representative of a group with a fixed member is added to fixed.
+        parent = {}
+
+        def find(var):
+            # With path halving, so that the many points meeting at one
+            # spot (a fan of lines) do not form a long chain of parents
+            while var in parent:
+                if parent[var] in parent:
+                    parent[var] = parent[parent[var]]
+                var = parent[var]
+            return var
+
+        for constraint in constraints:
+            if isinstance(constraint, Coincident):
+                a, b = constraint.entities
+                for i, j in zip(constraint._a, constraint._b):
+                    root_a, root_b = find((a, i)), find((b, j))
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+
+        groups = {}
+        for var in values:
+            if var in parent:
+                groups.setdefault(find(var), []).append(var)
+        alias = {}
+        for representative, members in groups.items():
+            members.append(representative)
+            fixed_members = [var for var in members if var in fixed]
+            if fixed_members:
+                value = values[fixed_members[0]]
+                if any(abs(values[var] - value) > tolerance for var in fixed_members):
+                    raise ValueError("The constraints cannot be satisfied.")
+                fixed.add(representative)
+            else:
+                own = [var for var in members if var[0] is obj]
+                value = values[own[0]] if own else sum(values[var] for var in members) / len(members)
+            for var in members:
+                values[var] = value
+                alias[var] = representative
+        return alias, groups
+
+    @staticmethod
+    def _linearise(constraints, values, fixed, alias):
+        rows = []
+        r = []
+        for constraint in constraints:
+            for residual, derivatives in constraint.residuals(values):
+                r.append(residual)
+                row = {}
+                for var, d in derivatives.items():
+                    var = alias.get(var, var)
+                    if d and var not in fixed:
+                        row[var] = row.get(var, 0.0) + d
+                rows.append(row)
+        return rows, r
+
+
+def _norm(r):
+    return math.sqrt(sum(value * value for value in r))
+
+
+def _min_norm_step(rows, r, damping=1e-15):
+    """dx = J^T y with (J J^T + damping I) y = r, by conjugate gradients.
+
+    rows holds the sparse rows of J as {var: derivative}. The small damping
+    keeps redundant constraints (dependent rows) from stalling CG.
+    """
+    def transpose_product(y):
+        t = {}
+        for row, y_i in zip(rows, y):
+            if y_i:
+                for var, d in row.items():
+                    t[var] = t.get(var, 0.0) + d * y_i
+        return t
+
+    def normal_product(y):
+        t = transpose_product(y)
+        return [sum(d * t.get(var, 0.0) for var, d in row.items()) + damping * y_i
+                for row, y_i in zip(rows, y)]
+
+    y = [0.0] * len(r)
+    residual = list(r)
+    direction = list(r)
+    rr = sum(value * value for value in residual)
+    limit = rr * 1e-28
+    for _ in range(2 * len(r) + 10):
+        if rr <= limit:
+            break
+        product = normal_product(direction)
+        curvature = sum(p * d for p, d in zip(product, direction))
+        if curvature <= 0:
+            break
+        alpha = rr / curvature
+        y = [y_i + alpha * d for y_i, d in zip(y, direction)]
+        residual = [res - alpha * p for res, p in zip(residual, product)]
+        new_rr = sum(value * value for value in residual)
+        direction = [res + new_rr / rr * d for res, d in zip(residual, direction)]
+        rr = new_rr
+    return transpose_product(y)
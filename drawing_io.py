@@ -0,0 +1,112 @@
+"""Loading, saving and converting drawing files.
+
+Readers are generators that yield Line and Rectangle objects one at a time,
+and writers consume any iterable of them, so a conversion between two files
+streams entity by entity and its memory use does not grow with the file size.
+
+The format is chosen from the file extension: ``.dxf``, ``.svg``, ``.izc``
+(the native binary format, see native_format.py), or the batch command
+language (see cad_batch.py) for anything else. Format modules are imported
+on first use. The command language writer, write_drawing(), lives here so
+that library code can produce drawing files without importing the batch
+entry point.
+
+Progress callbacks are called as ``progress(entities, bytes_done, bytes_total)``
+every PROGRESS_INTERVAL entities and once more when the file is done.
+``bytes_total`` is None when the size of the stream is unknown.
+"""
+
+import os
+
+from geometry import Line, Rectangle
+
+PROGRESS_INTERVAL = 10000
+
+
+class ProgressReporter:
+    """Counts entities and forwards progress to a callback (which may be None).
+
+    position is a callable returning the number of bytes processed so far; it
+    is only called when a report is due, so it may be relatively expensive.
+    """
+
+    def __init__(self, callback, bytes_total=None, position=None, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.bytes_total = bytes_total
+        self.position = position
+        self.interval = interval
+        self.entities = 0
+
+    def _report(self):
+        bytes_done = self.position() if self.position is not None else 0
+        self.callback(self.entities, bytes_done, self.bytes_total)
+
+    def entity_done(self):
+        self.entities += 1
+        if self.callback is not None and self.entities % self.interval == 0:
+            self._report()
+
+    def finish(self):
+        if self.callback is not None:
+            self._report()
+
+
+def drawing_command(obj):
+    """The line or rect command that adds obj, or None if there is none."""
+    if isinstance(obj, Line):
+        coords = (obj.start.x, obj.start.y, obj.end.x, obj.end.y)
+        return "line " + " ".join(repr(float(c)) for c in coords) + "\n"
+    if isinstance(obj, Rectangle):
+        coords = (obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y)
+        return "rect " + " ".join(repr(float(c)) for c in coords) + "\n"
+    return None
+
+
+def write_drawing(objects, fileobj, progress=None):
+    """Write objects as line/rect commands and return the entity count."""
+    reporter = ProgressReporter(progress)
+    for obj in objects:
+        command = drawing_command(obj)
+        if command is None:
+            continue
+        fileobj.write(command)
+        reporter.entity_done()
+    reporter.finish()
+    return reporter.entities
+
+
+def stream_size(fileobj):
+    try:
+        return os.fstat(fileobj.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _format_module(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".dxf":
+        import dxf_io
+        return dxf_io
+    if extension == ".svg":
+        import svg_io
+        return svg_io
+    if extension == ".izc":
+        import native_format
+        return native_format
+    import cad_batch
+    return cad_batch
+
+
+def read(path, progress=None):
+    """Yield the entities stored in path one at a time."""
+    yield from _format_module(path).load(path, progress)
+
+
+def write(path, objects, progress=None):
+    """Write objects (any iterable, consumed once) to path and return the entity count."""
+    return _format_module(path).save(path, objects, progress)
+
+
+def convert(source, destination, progress=None):
+    """Stream the entities of source into destination without holding them all."""
+    return write(destination, read(source, progress))
@@ -0,0 +1,126 @@
+"""Streaming DXF import and export.
+
+Only the ENTITIES section is read. LINE entities become Line objects. Closed,
+axis-aligned four-vertex LWPOLYLINEs become Rectangle objects; every other
+LWPOLYLINE is split into one Line per segment. Other entity types are
+skipped. Rectangles are written as closed LWPOLYLINEs.
+"""
+
+from drawing_io import ProgressReporter, stream_size
+from geometry import Point, Line, Rectangle
+
+
+def _polyline_entities(vertices, closed):
+    if len(vertices) == 5 and vertices[0] == vertices[4]:
+        vertices = vertices[:4]
+        closed = True
+    if closed and len(vertices) == 4:
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = vertices
+        if (x0 == x1 and y1 == y2 and x2 == x3 and y3 == y0) or \
+                (y0 == y1 and x1 == x2 and y2 == y3 and x3 == x0):
+            yield Rectangle(Point(x0, y0), Point(x2, y2))
+            return
+    if closed and len(vertices) > 2:
+        vertices = vertices + [vertices[0]]
+    for (x1, y1), (x2, y2) in zip(vertices, vertices[1:]):
+        yield Line(Point(x1, y1), Point(x2, y2))
+
+
+def _build_entities(entity_type, groups):
+    if entity_type == b"LINE":
+        values = dict(groups)
+        yield Line(Point(float(values.get(10, 0)), float(values.get(20, 0))),
+                   Point(float(values.get(11, 0)), float(values.get(21, 0))))
+        return
+
+    # LWPOLYLINE: each vertex is a 10 (x) group followed by a 20 (y) group
+    closed = False
+    vertices = []
+    x = None
+    for code, value in groups:
+        if code == 70:
+            closed = bool(int(value) & 1)
+        elif code == 10:
+            x = float(value)
+        elif code == 20 and x is not None:
+            vertices.append((x, float(value)))
+            x = None
+    yield from _polyline_entities(vertices, closed)
+
+
+def read_dxf(fileobj, progress=None):
+    """Yield the Line and Rectangle entities of a binary-mode DXF stream."""
+    reporter = ProgressReporter(progress, stream_size(fileobj), getattr(fileobj, "tell", None))
+
+    # Group codes and values alternate line by line. Values stay bytes:
+    # int() and float() accept them directly, which saves decoding every line.
+    lines = iter(fileobj)
+    in_entities = False
+    expect_section_name = False
+    current = None # (entity type, [(code, value), ...]) of the entity being read
+    for code_line, value_line in zip(lines, lines):
+        code = int(code_line)
+        value = value_line.strip()
+        if code == 0:
+            if current is not None:
+                for entity in _build_entities(*current):
+                    yield entity
+                    reporter.entity_done()
+                current = None
+            if value == b"SECTION":
+                expect_section_name = True
+            elif value == b"ENDSEC":
+                in_entities = False
+            elif value == b"EOF":
+                break
+            elif in_entities and value in (b"LINE", b"LWPOLYLINE"):
+                current = (value, [])
+        elif expect_section_name and code == 2:
+            in_entities = value == b"ENTITIES"
+            expect_section_name = False
+        elif current is not None:
+            current[1].append((code, value))
+    reporter.finish()
+
+
+DXF_HEADER = "0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1015\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n"
+DXF_FOOTER = "0\nENDSEC\n0\nEOF\n"
+
+
+def dxf_entity(obj):
+    """The DXF text of a Line or Rectangle, or None for anything else."""
+    if isinstance(obj, Line):
+        return (f"0\nLINE\n8\n0\n10\n{obj.start.x!r}\n20\n{obj.start.y!r}\n30\n0.0\n"
+                f"11\n{obj.end.x!r}\n21\n{obj.end.y!r}\n31\n0.0\n")
+    if isinstance(obj, Rectangle):
+        x1, y1, x2, y2 = obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y
+        return (f"0\nLWPOLYLINE\n8\n0\n90\n4\n70\n1\n"
+                f"10\n{x1!r}\n20\n{y1!r}\n10\n{x2!r}\n20\n{y1!r}\n"
+                f"10\n{x2!r}\n20\n{y2!r}\n10\n{x1!r}\n20\n{y2!r}\n")
+    return None
+
+
+def write_dxf(objects, fileobj, progress=None):
+    """Write objects to a text-mode stream as DXF and return the entity count."""
+    reporter = ProgressReporter(progress)
+    write = fileobj.write
+    write(DXF_HEADER)
+    for obj in objects:
+        text = dxf_entity(obj)
+        if text is None:
+            continue
+        write(text)
+        reporter.entity_done()
+    write(DXF_FOOTER)
+    reporter.finish()
+    return reporter.entities
+
+
+def load(path, progress=None):
+    with open(path, "rb") as f:
+        yield from read_dxf(f, progress)
+
+
+def save(path, objects, progress=None):
+    with open(path, "w") as f:
+        return write_dxf(objects, f, progress)
@@ -0,0 +1,235 @@
+import math
+import weakref
+from array import array
+
+from _lazy import load_numpy
+from geometry import Point, Line, Rectangle
+
+# Values of the kind column
+LINE = 1
+RECTANGLE = 2
+
+
+class EntityStore:
+    """Columnar storage for lines and rectangles.
+
+    Every entity is one row: a kind code, a stable ID and two points
+    (x1, y1, x2, y2) held in contiguous float64 arrays. A line's row holds its
+    start and end, a rectangle's row its two corners p1 and p2. Bulk operations
+    work on whole columns, vectorised with NumPy when it is installed.
+
+    entity(row) returns a LineView or RectangleView, which are Line/Rectangle
+    subclasses reading and writing the columns, so existing code such as
+    length(), set_length(), width() and set_width() works unchanged. Views
+    are created on demand and dropped once nothing refers to them, so
+    iterating the store does not leave an object per row behind.
+
+    version changes whenever the store is edited through its methods or its
+    views, so bulk_ops can tell whether its copy of the columns is current.
+    Code that writes the column arrays directly must call touch().
+
+    The store stands on its own: Drawing, the GUI and the batch mode keep
+    Line/Rectangle objects, and the store is used by bulk_ops.BulkProcessor
+    and by scripts that build one from a drawing with extend().
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.ids = array("q")
+        self.x1 = array("d")
+        self.y1 = array("d")
+        self.x2 = array("d")
+        self.y2 = array("d")
+        self._next_id = 1
+        self.version = getattr(self, "version", 0) + 1
+        self._views = weakref.WeakValueDictionary() # row -> live view, so a row maps to one object at a time
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        for row in range(len(self.kinds)):
+            yield self.entity(row)
+
+    def touch(self):
+        """Record that the columns were changed directly."""
+        self.version += 1
+
+    def _append(self, kind, x1, y1, x2, y2):
+        self.version += 1
+        self.kinds.append(kind)
+        self.ids.append(self._next_id)
+        self._next_id += 1
+        self.x1.append(x1)
+        self.y1.append(y1)
+        self.x2.append(x2)
+        self.y2.append(y2)
+        return len(self.kinds) - 1
+
+    def add_line(self, x1, y1, x2, y2):
+        return self._append(LINE, x1, y1, x2, y2)
+
+    def add_rectangle(self, x1, y1, x2, y2):
+        return self._append(RECTANGLE, x1, y1, x2, y2)
+
+    def add(self, obj):
+        """Copy a Line or Rectangle into the store and return its row."""
+        if isinstance(obj, Line):
+            return self.add_line(obj.start.x, obj.start.y, obj.end.x, obj.end.y)
+        if isinstance(obj, Rectangle):
+            return self.add_rectangle(obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y)
+        raise ValueError(f"Cannot store {obj!r}.")
+
+    def extend(self, objects):
+        for obj in objects:
+            self.add(obj)
+
+    def entity(self, row):
+        view = self._views.get(row)
+        if view is None:
+            if self.kinds[row] == LINE:
+                view = LineView(self, row)
+            else:
+                view = RectangleView(self, row)
+            self._views[row] = view
+        return view
+
+    def clear(self):
+        self.__init__()
+
+    # Bulk operations
+
+    def _columns(self):
+        return self.x1, self.y1, self.x2, self.y2
+
+    def translate(self, dx, dy):
+        self.version += 1
+        np = load_numpy()
+        if np is not None:
+            for column, delta in zip(self._columns(), (dx, dy, dx, dy)):
+                np.frombuffer(column, dtype=np.float64)[:] += delta
+            return
+        for column, delta in zip(self._columns(), (dx, dy, dx, dy)):
+            column[:] = array("d", [value + delta for value in column])
+
+    def scale(self, factor, center_x=0.0, center_y=0.0):
+        self.version += 1
+        np = load_numpy()
+        if np is not None:
+            for column, center in zip(self._columns(), (center_x, center_y, center_x, center_y)):
+                values = np.frombuffer(column, dtype=np.float64)
+                values[:] = center + (values - center) * factor
+            return
+        for column, center in zip(self._columns(), (center_x, center_y, center_x, center_y)):
+            column[:] = array("d", [center + (value - center) * factor for value in column])
+
+    def bounding_box(self):
+        """(min_x, min_y, max_x, max_y) over all entities, or None when empty."""
+        if not self.kinds:
+            return None
+        np = load_numpy()
+        if np is not None:
+            x1, y1, x2, y2 = (np.frombuffer(column, dtype=np.float64) for column in self._columns())
+            return (float(min(x1.min(), x2.min())), float(min(y1.min(), y2.min())),
+                    float(max(x1.max(), x2.max())), float(max(y1.max(), y2.max())))
+        return (min(min(self.x1), min(self.x2)), min(min(self.y1), min(self.y2)),
+                max(max(self.x1), max(self.x2)), max(max(self.y1), max(self.y2)))
+
+    def lengths(self):
+        """Length of every line; rows holding rectangles get 0.0.
+
+        The lengths come back as a NumPy array when NumPy is installed and as
+        an array('d') otherwise; both can be indexed, iterated and passed to
+        numpy.asarray() or memoryview().
+        """
+        np = load_numpy()
+        if np is not None:
+            x1, y1, x2, y2 = (np.frombuffer(column, dtype=np.float64) for column in self._columns())
+            kinds = np.frombuffer(self.kinds, dtype=np.int8)
+            return np.where(kinds == LINE, np.hypot(x2 - x1, y2 - y1), 0.0)
+        return array("d", [((bx - ax)**2 + (by - ay)**2)**0.5 if kind == LINE else 0.0
+                           for kind, ax, ay, bx, by in zip(self.kinds, *self._columns())])
+
+    def total_length(self):
+        lengths = self.lengths()
+        if isinstance(lengths, array):
+            return math.fsum(lengths)
+        return float(lengths.sum())
+
+
+class StorePoint(Point):
+    """A point whose coordinates live in two columns of an EntityStore."""
+
+    __slots__ = ("_store", "_xs", "_ys", "_row")
+
+    def __init__(self, store, xs, ys, row):
+        self._store = store
+        self._xs = xs
+        self._ys = ys
+        self._row = row
+
+    @property
+    def x(self):
+        return self._xs[self._row]
+
+    @x.setter
+    def x(self, value):
+        self._xs[self._row] = value
+        self._store.version += 1
+
+    @property
+    def y(self):
+        return self._ys[self._row]
+
+    @y.setter
+    def y(self, value):
+        self._ys[self._row] = value
+        self._store.version += 1
+
+
+class LineView(Line):
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+        self._start = StorePoint(store, store.x1, store.y1, row)
+        self._end = StorePoint(store, store.x2, store.y2, row)
+
+    @property
+    def start(self):
+        return self._start
+
+    @start.setter
+    def start(self, point):
+        self._start.x, self._start.y = point.x, point.y
+
+    @property
+    def end(self):
+        return self._end
+
+    @end.setter
+    def end(self, point):
+        self._end.x, self._end.y = point.x, point.y
+
+
+class RectangleView(Rectangle):
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+        self._p1 = StorePoint(store, store.x1, store.y1, row)
+        self._p2 = StorePoint(store, store.x2, store.y2, row)
+
+    @property
+    def p1(self):
+        return self._p1
+
+    @p1.setter
+    def p1(self, point):
+        self._p1.x, self._p1.y = point.x, point.y
+
+    @property
+    def p2(self):
+        return self._p2
+
+    @p2.setter
+    def p2(self, point):
+        self._p2.x, self._p2.y = point.x, point.y
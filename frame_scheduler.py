@@ -0,0 +1,89 @@
+import time
+
+DEFAULT_FPS = 60
+
+
+class FrameScheduler:
+    """Coalesces view input events and renders them at most fps times a second.
+
+    Event handlers only record what happened: pan deltas and zoom steps are
+    folded into one view change, and only the latest preview cursor position
+    is kept. The first event after an idle period schedules a frame through
+    widget.after(); every event up to that frame joins it.
+
+    A pan by (dx, dy) maps the view offset o to o + d and a zoom by f about
+    anchor a maps it to a + (o - a) * f, so any sequence of them is
+    o -> o * factor + (dx, dy). render is called as
+    render(factor, dx, dy, preview_position) with the combined change and
+    the last preview position (or None). During render, frame_event_time
+    is the time.perf_counter() time of the frame's first event, so the
+    renderer can measure input latency.
+    """
+
+    def __init__(self, widget, render, fps=DEFAULT_FPS):
+        self.widget = widget
+        self.render = render
+        self.fps = fps
+        self.events_received = 0
+        self.frames_rendered = 0
+        self._frame_pending = False
+        self._after_id = None
+        self._last_frame = 0.0
+        self._first_event_time = None
+        self.frame_event_time = None
+        self._reset()
+
+    def _reset(self):
+        self._factor = 1.0
+        self._dx = 0.0
+        self._dy = 0.0
+        self._preview_position = None
+
+    def pan(self, dx, dy):
+        self._dx += dx
+        self._dy += dy
+        self._event()
+
+    def zoom(self, factor, anchor_x, anchor_y):
+        self._factor *= factor
+        self._dx = anchor_x + (self._dx - anchor_x) * factor
+        self._dy = anchor_y + (self._dy - anchor_y) * factor
+        self._event()
+
+    def preview(self, x, y):
+        self._preview_position = (x, y)
+        self._event()
+
+    def _event(self):
+        self.events_received += 1
+        if not self._frame_pending:
+            self._frame_pending = True
+            self._first_event_time = time.perf_counter()
+            delay = self._last_frame + 1 / self.fps - self._first_event_time
+            self._after_id = self.widget.after(max(0, round(delay * 1000)), self._frame)
+
+    def _frame(self):
+        self._frame_pending = False
+        self._after_id = None
+        self._last_frame = time.perf_counter()
+        factor, dx, dy, preview_position = self._factor, self._dx, self._dy, self._preview_position
+        self._reset()
+        if factor == 1 and dx == 0 and dy == 0 and preview_position is None:
+            return
+        self.frames_rendered += 1
+        self.frame_event_time = self._first_event_time
+        self.render(factor, dx, dy, preview_position)
+
+    def flush(self):
+        """Render pending events now, e.g. before a click reads the view."""
+        if self._frame_pending:
+            if self._after_id is not None:
+                self.widget.after_cancel(self._after_id)
+            self._frame()
+
+    def stats(self):
+        return {
+            "events_received": self.events_received,
+            "frames_rendered": self.frames_rendered,
+            "events_per_frame": self.events_received / self.frames_rendered if self.frames_rendered else 0.0,
+        }
@@ -1,6 +1,8 @@
 import math
 
 class Point:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -8,7 +10,19 @@ class Point:
     def __repr__(self):
         return f"Point({self.x}, {self.y})"
 
+def _segment_distance(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - x1, py - y1)
+    # Project the point onto the segment and clamp to its ends
+    t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
 class Line:
+    eid = None # entity ID, given by the Drawing the line is added to
+
     def __init__(self, start_point, end_point):
         if not isinstance(start_point, Point) or not isinstance(end_point, Point):
             raise ValueError("Start and end points must be instances of Point.")
@@ -21,6 +35,13 @@ class Line:
     def length(self):
         return ((self.end.x - self.start.x)**2 + (self.end.y - self.start.y)**2)**0.5
 
+    def bounding_box(self):
+        return (min(self.start.x, self.end.x), min(self.start.y, self.end.y),
+                max(self.start.x, self.end.x), max(self.start.y, self.end.y))
+
+    def distance_to(self, x, y):
+        return _segment_distance(x, y, self.start.x, self.start.y, self.end.x, self.end.y)
+
     def set_length(self, new_length):
         if self.length() == 0: # Avoid division by zero if line has no length
             if new_length == 0:
@@ -44,6 +65,8 @@ class Line:
         self.end.y = self.start.y + dy * ratio
 
 class Rectangle:
+    eid = None # entity ID, given by the Drawing the rectangle is added to
+
     def __init__(self, p1, p2):
         if not isinstance(p1, Point) or not isinstance(p2, Point):
             raise ValueError("Corner points must be instances of Point.")
@@ -59,6 +82,20 @@ class Rectangle:
     def height(self):
         return abs(self.p2.y - self.p1.y)
 
+    def bounding_box(self):
+        return (min(self.p1.x, self.p2.x), min(self.p1.y, self.p2.y),
+                max(self.p1.x, self.p2.x), max(self.p1.y, self.p2.y))
+
+    def distance_to(self, x, y):
+        # Distance to the outline, not the filled area
+        min_x, min_y, max_x, max_y = self.bounding_box()
+        return min(
+            _segment_distance(x, y, min_x, min_y, max_x, min_y),
+            _segment_distance(x, y, max_x, min_y, max_x, max_y),
+            _segment_distance(x, y, max_x, max_y, min_x, max_y),
+            _segment_distance(x, y, min_x, max_y, min_x, min_y),
+        )
+
     def set_width(self, new_width):
         # Adjust p2.x based on p1.x and new_width
         if self.p2.x >= self.p1.x:
@@ -71,4 +108,16 @@ class Rectangle:
         if self.p2.y >= self.p1.y:
             self.p2.y = self.p1.y + new_height
         else:
-            self.p2.y = self.p1.y - new_height
\ No newline at end of file
+            self.p2.y = self.p1.y - new_height
+
+
+def coordinates(obj):
+    """(x1, y1, x2, y2): a line's start and end, or a rectangle's p1 and p2."""
+    if isinstance(obj, Line):
+        return obj.start.x, obj.start.y, obj.end.x, obj.end.y
+    return obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y
+
+
+def set_coordinates(obj, values):
+    first, second = (obj.start, obj.end) if isinstance(obj, Line) else (obj.p1, obj.p2)
+    first.x, first.y, second.x, second.y = values
@@ -0,0 +1,88 @@
+from collections import deque
+from contextlib import contextmanager
+
+
+class Journal:
+    """Undo/redo history of drawing edits.
+
+    Each step holds the deltas of one edit, as recorded by the Drawing: a
+    single delta, or a ("group", [delta, ...]) for edits made inside
+    group(). Deltas name the entities they touch and store just the changed
+    coordinates, so a step costs memory in proportion to the edit and
+    unchanged entities are shared by every point in the history.
+
+    A checkpoint is the id of the last applied step, so taking one copies
+    nothing; Drawing.restore() undoes or redoes steps back to it.
+    """
+
+    def __init__(self, max_steps=None):
+        self.max_steps = max_steps
+        self.reset()
+
+    def reset(self):
+        self._done = deque() # (step id, delta) of applied steps, oldest first
+        self._undone = [] # (step id, delta) of undone steps, most recently undone last
+        self._next_id = 1
+        self._group = None
+        self._dropped = False # whether max_steps dropped the oldest steps
+
+    def __len__(self):
+        return len(self._done)
+
+    def record(self, delta):
+        if self._group is not None:
+            self._group.append(delta)
+            return
+        self._done.append((self._next_id, delta))
+        self._next_id += 1
+        self._undone.clear()
+        if self.max_steps is not None and len(self._done) > self.max_steps:
+            self._done.popleft()
+            self._dropped = True
+
+    @contextmanager
+    def group(self):
+        """Record every delta made inside the block as one step."""
+        if self._group is not None:
+            yield
+            return
+        self._group = []
+        try:
+            yield
+        finally:
+            deltas, self._group = self._group, None
+            if len(deltas) == 1:
+                self.record(deltas[0])
+            elif deltas:
+                self.record(("group", deltas))
+
+    def can_undo(self):
+        return bool(self._done)
+
+    def can_redo(self):
+        return bool(self._undone)
+
+    def checkpoint(self):
+        return self._done[-1][0] if self._done else 0
+
+    def pop_undo(self):
+        step = self._done.pop()
+        self._undone.append(step)
+        return step[1]
+
+    def pop_redo(self):
+        step = self._undone.pop()
+        self._done.append(step)
+        return step[1]
+
+    def steps_to(self, checkpoint):
+        """Number of steps to undo (negative: redo) to get back to checkpoint."""
+        for steps, (step_id, _) in enumerate(reversed(self._done)):
+            if step_id == checkpoint:
+                return steps
+        if checkpoint == 0 and not self._dropped:
+            return len(self._done)
+        for steps, (step_id, _) in enumerate(reversed(self._undone), 1):
+            if step_id == checkpoint:
+                return -steps
+        raise ValueError(f"Checkpoint {checkpoint} is no longer in the history.")
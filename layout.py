@@ -0,0 +1,124 @@
+"""Screen layout of a drawing, shared by the Tk canvas and the offscreen renderer.
+
+Everything here works in canvas pixels (y pointing down) and does not
+import Tk, so cad_tool.py and raster.py lay out the grid, the axes and
+the dimensions identically.
+"""
+
+import math
+
+from geometry import Line
+
+LINE_COLOR = "blue"
+RECTANGLE_COLOR = "green"
+AXIS_COLOR = "gray"
+LINE_DIMENSION_COLOR = "red"
+RECTANGLE_DIMENSION_COLOR = "purple"
+# Fill of the level-of-detail tiles standing in for entities too small to draw
+LOD_TILE_COLOR = "#808080"
+
+# Dimensions shorter than this many pixels are not drawn
+DIMENSION_MIN_PIXELS = 30
+
+GRID_COLOR = "#E0E0E0"
+# The grid is hidden when its lines would be closer together than this many pixels
+GRID_MIN_PIXELS = 8
+
+
+def grid_spacing(scale):
+    """Grid spacing in drawing units at scale pixels per unit."""
+    if scale < 5:
+        return 10.0
+    elif scale < 20:
+        return 5.0
+    return 1.0
+
+
+def visible_grid_spacing(scale):
+    """grid_spacing(scale), or None if the grid is hidden at that scale."""
+    spacing = grid_spacing(scale)
+    if spacing * scale < GRID_MIN_PIXELS:
+        return None
+    return spacing
+
+
+def axis_layout(origin_x, origin_y, width, height):
+    """Canvas coordinates of the X axis, its label anchor, the Y axis and its
+    label anchor for the origin at (origin_x, origin_y) on a width x height
+    canvas. The axes run to the right and top edges, where their arrows are."""
+    return (
+        (0, origin_y, width, origin_y),
+        (width - 20, origin_y - 10),
+        (origin_x, height, origin_x, 0),
+        (origin_x + 10, 20),
+    )
+
+
+def object_dimensions(obj, anchors):
+    """(canvas start, canvas end, value, color, offset_direction, dim_type) for
+    each dimension of obj that is long enough on screen for its text to be
+    readable. anchors are the canvas coordinates of the ends of a line, or of
+    the bottom-left and top-right corners of a rectangle."""
+    if isinstance(obj, Line):
+        canvas_x1, canvas_y1, canvas_x2, canvas_y2 = anchors
+        dimensions = [((canvas_x1, canvas_y1), (canvas_x2, canvas_y2), obj.length(), LINE_DIMENSION_COLOR, "auto", "length")]
+    else:
+        canvas_left, canvas_bottom, canvas_right, canvas_top = anchors
+        dimensions = [
+            ((canvas_left, canvas_bottom), (canvas_right, canvas_bottom), obj.width(), RECTANGLE_DIMENSION_COLOR, "down", "width"),
+            ((canvas_left, canvas_bottom), (canvas_left, canvas_top), obj.height(), RECTANGLE_DIMENSION_COLOR, "left", "height"),
+        ]
+    return [dimension for dimension in dimensions
+            if math.dist(dimension[0], dimension[1]) >= DIMENSION_MIN_PIXELS]
+
+
+def linear_dimension_layout(canvas_start, canvas_end, offset_distance=20, offset_direction="auto"):
+    """Canvas coordinates of the two extension lines, the dimension line and the text anchor."""
+    canvas_x1, canvas_y1 = canvas_start
+    canvas_x2, canvas_y2 = canvas_end
+
+    angle = math.atan2(canvas_y2 - canvas_y1, canvas_x2 - canvas_x1)
+
+    if offset_direction == "auto":
+        if -math.pi/4 < angle <= math.pi/4:
+            offset_dx = 0
+            offset_dy = offset_distance
+        elif math.pi/4 < angle <= 3*math.pi/4:
+            offset_dx = -offset_distance
+            offset_dy = 0
+        elif -3*math.pi/4 < angle <= -math.pi/4:
+            offset_dx = offset_distance
+            offset_dy = 0
+        else:
+            offset_dx = -offset_distance
+            offset_dy = 0
+    elif offset_direction == "down":
+        offset_dx = 0
+        offset_dy = offset_distance
+    elif offset_direction == "up":
+        offset_dx = 0
+        offset_dy = -offset_distance
+    elif offset_direction == "left":
+        offset_dx = -offset_distance
+        offset_dy = 0
+    elif offset_direction == "right":
+        offset_dx = offset_distance
+        offset_dy = 0
+    else:
+        offset_dx = 0
+        offset_dy = offset_distance
+
+    dim_line_x1 = canvas_x1 + offset_dx
+    dim_line_y1 = canvas_y1 + offset_dy
+    dim_line_x2 = canvas_x2 + offset_dx
+    dim_line_y2 = canvas_y2 + offset_dy
+
+    text_x = (dim_line_x1 + dim_line_x2) / 2
+    text_y = (dim_line_y1 + dim_line_y2) / 2
+
+    return (
+        (canvas_x1, canvas_y1, dim_line_x1, dim_line_y1),
+        (canvas_x2, canvas_y2, dim_line_x2, dim_line_y2),
+        (dim_line_x1, dim_line_y1, dim_line_x2, dim_line_y2),
+        (text_x, text_y - 10),
+    )
@@ -0,0 +1,122 @@
+import math
+
+from spatial_index import SpatialIndex
+
+# Entities smaller than about this many pixels are drawn as aggregated tiles of this size
+LOD_TILE_PIXELS = 4
+
+
+def lod_level(scale):
+    """The LOD level for a view of scale pixels per unit: entities of size
+    class <= this level are at most about LOD_TILE_PIXELS across."""
+    return math.floor(math.log2(LOD_TILE_PIXELS / scale))
+
+
+class LodIndex:
+    """Level-of-detail buckets for rendering zoomed-out views.
+
+    Entities are grouped by size class: class k holds the entities whose
+    bounding box is at most 2**k units across. At LOD level L the renderer
+    draws classes above L individually and replaces every smaller entity with
+    the tile of size 2**L containing its centre. Each level's tile occupancy
+    is built on first use and then kept up to date on every insert and
+    remove, so switching between zoom levels costs only the tile lookups of
+    the viewport.
+    """
+
+    def __init__(self, min_level=-10, max_level=40):
+        self.min_level = min_level
+        self.max_level = max_level
+        self.clear()
+
+    def clear(self):
+        self._classes = {} # size class -> SpatialIndex of that class's entities
+        self._members = {} # size class -> {id(obj): obj}
+        self._entries = {} # id(obj) -> (size class, centre x, centre y)
+        self._tiles = {}   # level -> {(tx, ty): entity count}, for levels built so far
+
+    def __len__(self):
+        return len(self._entries)
+
+    def size_class(self, obj):
+        min_x, min_y, max_x, max_y = obj.bounding_box()
+        extent = max(max_x - min_x, max_y - min_y)
+        if extent <= 0:
+            return self.min_level
+        return max(self.min_level, min(self.max_level, math.ceil(math.log2(extent))))
+
+    def insert(self, obj):
+        size_class = self.size_class(obj)
+        min_x, min_y, max_x, max_y = obj.bounding_box()
+        center_x, center_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+        key = id(obj)
+        self._entries[key] = (size_class, center_x, center_y)
+        index = self._classes.get(size_class)
+        if index is None:
+            index = self._classes[size_class] = SpatialIndex(cell_size=2.0 ** size_class)
+            self._members[size_class] = {}
+        index.insert(obj)
+        self._members[size_class][key] = obj
+        for level, tiles in self._tiles.items():
+            if level >= size_class:
+                tile = self._tile(level, center_x, center_y)
+                tiles[tile] = tiles.get(tile, 0) + 1
+
+    def remove(self, obj):
+        key = id(obj)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        size_class, center_x, center_y = entry
+        self._classes[size_class].remove(obj)
+        del self._members[size_class][key]
+        if not self._members[size_class]:
+            del self._classes[size_class]
+            del self._members[size_class]
+        for level, tiles in self._tiles.items():
+            if level >= size_class:
+                tile = self._tile(level, center_x, center_y)
+                if tiles[tile] == 1:
+                    del tiles[tile]
+                else:
+                    tiles[tile] -= 1
+
+    def update(self, obj):
+        self.remove(obj)
+        self.insert(obj)
+
+    @staticmethod
+    def _tile(level, x, y):
+        size = 2.0 ** level
+        return math.floor(x / size), math.floor(y / size)
+
+    def large_entities(self, level, min_x, min_y, max_x, max_y):
+        """Entities above size class level whose bounding box meets the window."""
+        result = []
+        for size_class, index in self._classes.items():
+            if size_class > level:
+                result.extend(index.query(min_x, min_y, max_x, max_y))
+        return result
+
+    def tiles(self, level, min_x, min_y, max_x, max_y):
+        """(tx, ty) of the level tiles in the window holding entities of class <= level.
+
+        Tile (tx, ty) covers [tx * 2**level, (tx + 1) * 2**level) on x and the
+        same on y.
+        """
+        if level < self.min_level:
+            return []
+        tiles = self._tiles.get(level)
+        if tiles is None:
+            tiles = self._tiles[level] = {}
+            for size_class, members in self._members.items():
+                if size_class <= level:
+                    for key in members:
+                        tile = self._tile(level, *self._entries[key][1:])
+                        tiles[tile] = tiles.get(tile, 0) + 1
+
+        tx1, ty1 = self._tile(level, min_x, min_y)
+        tx2, ty2 = self._tile(level, max_x, max_y)
+        if (tx2 - tx1 + 1) * (ty2 - ty1 + 1) > len(tiles):
+            return [tile for tile in tiles if tx1 <= tile[0] <= tx2 and ty1 <= tile[1] <= ty2]
+        return [(tx, ty) for tx in range(tx1, tx2 + 1) for ty in range(ty1, ty2 + 1) if (tx, ty) in tiles]
@@ -0,0 +1,130 @@
+"""Frame timing, canvas item counts and event latency for the GUI.
+
+A frame is one burst of canvas work: a coalesced pan/zoom/preview frame, a
+full redraw or an edit. Within a frame, time is split into SECTIONS; a
+section started inside another one pauses it, so the sections of a frame
+never overlap and whatever falls outside all of them is reported as
+"other". Latency is measured from the first input event that led to the
+frame to the end of the frame.
+
+Recording only reads time.perf_counter(), so it stays on all the time; the
+last `history` frames are kept for the overlay and for dump().
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+SECTIONS = ("grid", "origin", "entities", "dimensions")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RenderMetrics:
+    def __init__(self, history=1000):
+        self.frames = deque(maxlen=history) # per-frame records, oldest first
+        self._frame = None # record of the frame being measured
+        self._depth = 0 # nesting of begin_frame calls; only the outermost one counts
+        self._sections = [] # open section names, innermost last
+        self._mark = 0.0 # when the innermost open section last started or resumed
+
+    def begin_frame(self, kind, event_time=None):
+        """Start a frame of the given kind; event_time is the perf_counter()
+        time of the input event behind it, if there was one."""
+        self._depth += 1
+        if self._depth > 1:
+            return
+        now = time.perf_counter()
+        self._frame = {"kind": kind, "start": now, "event_time": now if event_time is None else event_time}
+        for name in SECTIONS:
+            self._frame[name] = 0.0
+
+    def end_frame(self, item_counts):
+        """Finish the frame; item_counts is called for {category: canvas item count}.
+
+        Returns the frame's record, or None if this closed a nested frame.
+        """
+        self._depth -= 1
+        if self._depth:
+            return None
+        now = time.perf_counter()
+        frame, self._frame = self._frame, None
+        total = now - frame["start"]
+        record = {"kind": frame["kind"], "time": time.time(), "total_ms": total * 1e3}
+        for name in SECTIONS:
+            record[f"{name}_ms"] = frame[name] * 1e3
+        record["other_ms"] = (total - sum(frame[name] for name in SECTIONS)) * 1e3
+        record["latency_ms"] = (now - frame["event_time"]) * 1e3
+        counts = item_counts()
+        record["items"] = sum(counts.values())
+        for category, count in counts.items():
+            record[f"items_{category}"] = count
+        self.frames.append(record)
+        return record
+
+    @contextmanager
+    def section(self, name):
+        """Attribute the time spent in the block to section name of the current frame."""
+        if self._frame is None:
+            yield
+            return
+        now = time.perf_counter()
+        if self._sections:
+            self._frame[self._sections[-1]] += now - self._mark
+        self._sections.append(name)
+        self._mark = now
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._frame[self._sections.pop()] += now - self._mark
+            self._mark = now
+
+    def summary(self):
+        """Mean, 95th percentile and maximum of every timing over the kept frames."""
+        frames = list(self.frames)
+        result = {"frames": len(frames)}
+        for key in ["total_ms", *(f"{name}_ms" for name in SECTIONS), "other_ms", "latency_ms"]:
+            values = [frame[key] for frame in frames]
+            result[key] = {
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p95": _percentile(values, 0.95),
+                "max": max(values, default=0.0),
+            }
+        result["items"] = frames[-1]["items"] if frames else 0
+        return result
+
+    def overlay_text(self):
+        if not self.frames:
+            return "no frames yet"
+        last = self.frames[-1]
+        summary = self.summary()
+        sections = " ".join(f"{name} {last[f'{name}_ms']:.1f}" for name in SECTIONS)
+        return (f"{last['kind']} frame {last['total_ms']:.1f} ms: {sections} other {last['other_ms']:.1f}\n"
+                f"mean {summary['total_ms']['mean']:.1f} ms, p95 {summary['total_ms']['p95']:.1f} ms "
+                f"over {summary['frames']} frames\n"
+                f"latency {last['latency_ms']:.1f} ms (p95 {summary['latency_ms']['p95']:.1f} ms)\n"
+                f"canvas items {last['items']}")
+
+    def dump(self, path, **extra):
+        """Write the kept frames to path: CSV (one row per frame) if it ends in
+        .csv, otherwise JSON with the summary, the frames and the extra entries."""
+        frames = list(self.frames)
+        if path.lower().endswith(".csv"):
+            import csv
+            fields = []
+            for frame in frames:
+                fields += [key for key in frame if key not in fields]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fields, restval=0)
+                writer.writeheader()
+                writer.writerows(frames)
+            return
+        import json
+        with open(path, "w") as f:
+            json.dump({"summary": self.summary(), **extra, "frames": frames}, f, indent=1)
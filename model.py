@@ -0,0 +1,398 @@
+import copy
+
+from constraints import COINCIDENT_TOLERANCE, DIMENSION_CONSTRAINTS, Coincident, ConstraintSystem, entity_points
+from geometry import Point, Line, Rectangle, coordinates, set_coordinates
+from journal import Journal
+from spatial_index import PointHash, SpatialIndex
+
+# Dimension types each entity type supports, as used in the dimension text tags
+DIMENSION_TYPES = {
+    Line: ("length",),
+    Rectangle: ("width", "height"),
+}
+
+
+class Drawing:
+    """The geometry model behind the GUI and the batch mode.
+
+    Holds the drawn objects and keeps the spatial index in step with every
+    add, edit and clear. It does not import Tk, so it can be used on machines
+    without a display.
+
+    A drawing opened with open_mapped() is backed by a memory-mapped native
+    file. Its entities only join objects (and the index) once materialize()
+    is called for a region containing them; iterating the drawing still
+    yields every entity.
+
+    Pass a LodIndex to have it maintained alongside the spatial index; the
+    GUI uses it to render zoomed-out views. A SnapIndex passed as snap_index
+    is maintained the same way, for snapping the cursor to entity points.
+
+    Entities are kept connected by constraints (see constraints.py). add()
+    joins the points of a new entity to coinciding points of existing ones
+    when auto_constrain is set, looking them up in a PointHash of entity
+    points that the first such add() builds. Points already joined to each
+    other form a group, and a new point is joined to one point of each group
+    it meets, so k entities meeting at a point get k - 1 coincident
+    constraints rather than one per pair. set_dimension() turns the edited
+    dimension into a driving constraint and re-solves only the entities
+    connected to the edited one.
+
+    Every entity in objects has an entity ID (its eid attribute), unique
+    within the drawing and kept across edits, undo and redo, and saving to
+    and loading from the native format. entity() looks an entity up by ID.
+    An added entity keeps the ID it already has unless another entity of
+    the drawing holds it.
+
+    add(), set_dimension(), add_constraint() and clear() are recorded in the
+    journal and can be undone and redone. Undoing a clear swaps the previous
+    objects, indexes and constraints back in, so neither clearing nor undoing
+    it copies the drawing.
+    """
+
+    def __init__(self, lod_index=None, journal=None, auto_constrain=True, snap_index=None):
+        self.objects = []
+        self.spatial_index = SpatialIndex()
+        self.lod_index = lod_index
+        self.snap_index = snap_index
+        self.constraints = ConstraintSystem()
+        self.entities = {} # entity ID -> entity, for the entities in objects
+        self.source = None # MappedDrawing with not yet materialised entities
+        self.point_index = None # PointHash of (entity, point name), built by the first auto-constrained add
+        self.point_groups = None # union-find parents of the points joined by coincident constraints, built on demand
+        self._next_eid = 1
+        self.journal = journal if journal is not None else Journal()
+        self.auto_constrain = auto_constrain
+
+    def __len__(self):
+        if self.source is None:
+            return len(self.objects)
+        return len(self.objects) + len(self.source) - len(self.source.materialized)
+
+    def __iter__(self):
+        yield from self.objects
+        if self.source is not None:
+            materialized = self.source.materialized
+            for i in range(len(self.source)):
+                if i not in materialized:
+                    yield self.source.record_entity(i)
+
+    def add(self, obj):
+        with self.journal.group():
+            self._insert(obj)
+            self.journal.record(("add", obj))
+            if self.auto_constrain:
+                self._connect(obj)
+        return obj
+
+    def _connect(self, obj):
+        # Join each point of obj to one point of every group of coinciding
+        # points of other entities that it is not joined to yet
+        if self.point_index is None:
+            self.point_index = PointHash(COINCIDENT_TOLERANCE)
+            for other in self.objects:
+                self._index_points(other)
+        values = coordinates(obj)
+        for name, (i, j) in entity_points(obj).items():
+            for other, other_name in self.point_index.near(values[i], values[j]):
+                if other is not obj and self._point_group((obj, name)) != self._point_group((other, other_name)):
+                    constraint = Coincident(obj, name, other, other_name)
+                    self.constraints.add(constraint)
+                    self._join_points(constraint)
+                    self.journal.record(("constrain", constraint))
+
+    def _point_group(self, point):
+        # The representative of the group of (entity, point name)
+        if self.point_groups is None:
+            self.point_groups = {}
+            for obj in self.objects:
+                for constraint in self.constraints.constraints_of(obj):
+                    if constraint.entities[0] is obj:
+                        self._join_points(constraint)
+        parent = self.point_groups
+        while point in parent:
+            if parent[point] in parent:
+                parent[point] = parent[parent[point]]
+            point = parent[point]
+        return point
+
+    def _join_points(self, constraint):
+        # Merge the groups of the points joined by a coincident constraint
+        if self.point_groups is None or not isinstance(constraint, Coincident):
+            return
+        a, b = constraint.entities
+        root_a = self._point_group((a, constraint.a_point))
+        root_b = self._point_group((b, constraint.b_point))
+        if root_a != root_b:
+            self.point_groups[root_b] = root_a
+
+    def _index_points(self, obj):
+        values = coordinates(obj)
+        for name, (i, j) in entity_points(obj).items():
+            self.point_index.insert((obj, name), values[i], values[j])
+
+    def _unindex_points(self, obj):
+        for name in entity_points(obj):
+            self.point_index.remove((obj, name))
+
+    def entity(self, eid):
+        """The entity with ID eid, or None if it is not in objects."""
+        return self.entities.get(eid)
+
+    def _insert(self, obj):
+        if obj.eid is None or self.entities.get(obj.eid, obj) is not obj:
+            obj.eid = self._next_eid
+        self._next_eid = max(self._next_eid, obj.eid + 1)
+        self.entities[obj.eid] = obj
+        self.objects.append(obj)
+        self.spatial_index.insert(obj)
+        if self.lod_index is not None:
+            self.lod_index.insert(obj)
+        if self.snap_index is not None:
+            self.snap_index.insert(obj)
+        if self.point_index is not None:
+            self._index_points(obj)
+
+    def _remove(self, obj):
+        # Undo removes the most recently added object, which is normally last
+        if self.objects and self.objects[-1] is obj:
+            self.objects.pop()
+        else:
+            self.objects.remove(obj)
+        # obj keeps its ID, so redoing its add brings it back under the same one
+        del self.entities[obj.eid]
+        self.spatial_index.remove(obj)
+        if self.lod_index is not None:
+            self.lod_index.remove(obj)
+        if self.snap_index is not None:
+            self.snap_index.remove(obj)
+        if self.point_index is not None:
+            self._unindex_points(obj)
+
+    def add_line(self, x1, y1, x2, y2):
+        return self.add(Line(Point(x1, y1), Point(x2, y2)))
+
+    def add_rectangle(self, x1, y1, x2, y2):
+        return self.add(Rectangle(Point(x1, y1), Point(x2, y2)))
+
+    def update(self, obj):
+        # Call after the geometry of obj was changed outside of set_dimension
+        self.spatial_index.update(obj)
+        if self.lod_index is not None:
+            self.lod_index.update(obj)
+        if self.snap_index is not None:
+            self.snap_index.update(obj)
+        if self.point_index is not None:
+            self._index_points(obj)
+
+    def clear(self):
+        before = self._contents()
+        self._reset_contents()
+        # Redo reinstalls the same empty containers, which later steps of the history refer to
+        self.journal.record(("clear", before, self._contents()))
+
+    def _contents(self):
+        return (self.objects, self.spatial_index, self.lod_index, self.snap_index, self.point_index,
+                self.constraints, self.entities, self.source)
+
+    def _reset_contents(self):
+        # The old containers may be kept by the journal, so new ones are made
+        # instead of clearing them. A shallow copy keeps the index settings
+        # and clear() then gives the copy its own empty tables.
+        self.objects = []
+        self.spatial_index = copy.copy(self.spatial_index)
+        self.spatial_index.clear()
+        if self.lod_index is not None:
+            self.lod_index = copy.copy(self.lod_index)
+            self.lod_index.clear()
+        if self.snap_index is not None:
+            self.snap_index = copy.copy(self.snap_index)
+            self.snap_index.clear()
+        self.point_index = None
+        self.point_groups = None
+        self.constraints = copy.copy(self.constraints)
+        self.constraints.clear()
+        self.entities = {}
+        self.source = None
+
+    def open_mapped(self, path):
+        """Replace the contents with the native drawing file at path, loaded lazily.
+
+        This starts a new history: the previous contents cannot be restored.
+        """
+        from native_format import MappedDrawing
+        mapped = MappedDrawing(path)
+        if self.source is not None:
+            self.source.close()
+        self._reset_contents()
+        self.journal.reset()
+        self.source = mapped
+        # IDs are never reused, so new entities cannot clash with unmaterialised ones
+        self._next_eid = max(self._next_eid, mapped.next_eid)
+
+    def materialize(self, min_x, min_y, max_x, max_y):
+        """Add the mapped entities touching the window to objects and the index."""
+        if self.source is None:
+            return
+        materialized = self.source.materialized
+        for i in self.source.query(min_x, min_y, max_x, max_y):
+            if i not in materialized:
+                self._insert(self.source.entity(i))
+
+    def dimension_value(self, obj, dim_type):
+        self._check_dimension(obj, dim_type)
+        if dim_type == "length":
+            return obj.length()
+        elif dim_type == "width":
+            return obj.width()
+        return obj.height()
+
+    def set_dimension(self, obj, dim_type, value):
+        """Set a dimension of obj and move the entities connected to it to match.
+
+        The dimension becomes a driving constraint of obj, and the start or
+        p1 of obj stays in place. Returns the set of objects that moved.
+        Raises ValueError if the constraints cannot be satisfied.
+        """
+        self._check_dimension(obj, dim_type)
+        if value < 0:
+            raise ValueError(f"The {dim_type} cannot be negative.")
+        before = coordinates(obj)
+        constraint = self.constraints.dimension_constraint(obj, dim_type)
+        if constraint is None:
+            constraint = DIMENSION_CONSTRAINTS[dim_type](obj, value)
+            self.constraints.add(constraint)
+            delta = ("constrain", constraint)
+        else:
+            delta = ("dimension", constraint, constraint.value, value)
+            constraint.value = value
+
+        # The direct edit is where the solve starts, and already its answer
+        # for an entity without other constraints.
+        if dim_type == "length":
+            obj.set_length(value)
+        elif dim_type == "width":
+            obj.set_width(value)
+        else:
+            obj.set_height(value)
+        try:
+            moved = self.constraints.solve(obj, fixed=[(obj, 0), (obj, 1)])
+        except ValueError:
+            set_coordinates(obj, before)
+            if delta[0] == "constrain":
+                self.constraints.remove(constraint)
+            else:
+                constraint.value = delta[2]
+            raise
+        moved.setdefault(obj, coordinates(obj))
+        set_coordinates(obj, before)
+
+        with self.journal.group():
+            self.journal.record(delta)
+            for entity, values in moved.items():
+                self._move(entity, values)
+        return set(moved)
+
+    def add_constraint(self, constraint):
+        """Add a constraint and move its entities to satisfy it.
+
+        The start or p1 of the first constrained entity stays in place.
+        Returns the set of objects that moved. Raises ValueError if the
+        constraints cannot be satisfied.
+        """
+        self.constraints.add(constraint)
+        first = constraint.entities[0]
+        try:
+            moved = self.constraints.solve(first, fixed=[(first, 0), (first, 1)])
+        except ValueError:
+            self.constraints.remove(constraint)
+            raise
+        self._join_points(constraint)
+        with self.journal.group():
+            self.journal.record(("constrain", constraint))
+            for entity, values in moved.items():
+                self._move(entity, values)
+        return set(moved)
+
+    def _move(self, obj, values):
+        before = coordinates(obj)
+        if values != before:
+            set_coordinates(obj, values)
+            self.update(obj)
+            self.journal.record(("move", obj, before, values))
+
+    def undo(self):
+        """Undo the last recorded edit.
+
+        Returns the objects whose geometry or membership changed, or None
+        if the whole drawing changed (an undone or redone clear).
+        """
+        return self._apply(self.journal.pop_undo(), undo=True)
+
+    def redo(self):
+        """Redo the last undone edit; returns like undo()."""
+        return self._apply(self.journal.pop_redo(), undo=False)
+
+    def checkpoint(self):
+        """A token for the current state, to pass to restore() later."""
+        return self.journal.checkpoint()
+
+    def restore(self, checkpoint):
+        """Undo or redo back to checkpoint; returns like undo()."""
+        steps = self.journal.steps_to(checkpoint)
+        changed = set()
+        for _ in range(abs(steps)):
+            objs = self.undo() if steps > 0 else self.redo()
+            if objs is None or changed is None:
+                changed = None
+            else:
+                changed.update(objs)
+        return changed
+
+    def _apply(self, delta, undo):
+        kind = delta[0]
+        if kind == "group":
+            changed = set()
+            for part in (reversed(delta[1]) if undo else delta[1]):
+                objs = self._apply(part, undo)
+                changed = None if objs is None or changed is None else changed | objs
+            return changed
+        if kind == "add":
+            obj = delta[1]
+            if undo:
+                self._remove(obj)
+            else:
+                self._insert(obj)
+            return {obj}
+        if kind == "move":
+            obj, before, after = delta[1:]
+            set_coordinates(obj, before if undo else after)
+            self.update(obj)
+            return {obj}
+        if kind == "constrain":
+            if undo:
+                self.constraints.remove(delta[1])
+                # Groups cannot be split, so they are rebuilt when next needed
+                if isinstance(delta[1], Coincident):
+                    self.point_groups = None
+            else:
+                self.constraints.add(delta[1])
+                self._join_points(delta[1])
+            return set()
+        if kind == "dimension":
+            constraint, before, after = delta[1:]
+            constraint.value = before if undo else after
+            return set()
+        # clear
+        (self.objects, self.spatial_index, self.lod_index, self.snap_index, self.point_index,
+         self.constraints, self.entities, self.source) = delta[1] if undo else delta[2]
+        self.point_groups = None
+        return None
+
+    def _check_dimension(self, obj, dim_type):
+        for cls, dim_types in DIMENSION_TYPES.items():
+            if isinstance(obj, cls):
+                if dim_type not in dim_types:
+                    raise ValueError(f"{obj.__class__.__name__} has no {dim_type} dimension.")
+                return
+        raise ValueError(f"{obj!r} has no dimensions.")
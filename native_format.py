@@ -0,0 +1,363 @@
+"""Compact binary drawing format (.izc), opened through mmap.
+
+Layout, all little-endian::
+
+    header      HEADER struct, see below
+    type table  one signed byte per entity (entity_store.LINE / RECTANGLE),
+                padded to a multiple of 8 bytes
+    records     four float64 per entity: x1, y1, x2, y2 (a line's start and
+                end, or a rectangle's corners p1 and p2)
+    ids         one int64 entity ID per entity (0: none), since version 2
+    directory   five int64 per grid cell: level, cx, cy, first record, record
+                count (version 1 and 2: four, without the level)
+
+Records are filed by size class: an entity goes to the lowest level whose
+cells, cell_size * 2**level wide, are at least as large as the entity, and
+there to the cell containing its bounding-box centre. Records are sorted by
+(level, cx, cy), as is the directory, so the records of any cell form one
+contiguous run. A viewport query binary-searches the directory of each
+level, widened by half a cell of that level, and so touches only the
+records near the viewport: one long line does not make every query scan
+the whole file. Opening a file reads just the header, whatever the drawing
+size, and entities become Line/Rectangle objects only when a query or an
+edit needs them. Entity IDs (see model.Drawing) are
+stored with the records, so they survive saving and loading. save() gives
+entities without an ID the next free ones. Records without a stored ID
+(every record of a version 1 file, which predates them, and ID 0 in version
+2) get the file's next ID plus their record index, and next_eid is moved
+past them, so every entity read from a file has an ID. Version 1
+and 2 files file every entity under one level and widen each query by the
+largest half extent of any entity.
+"""
+
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from drawing_io import ProgressReporter
+from entity_store import LINE, RECTANGLE
+from geometry import Point, Line, Rectangle
+
+MAGIC = b"IZCAD\x00\x00\x00"
+VERSION = 3
+
+# magic, version, number of levels (reserved before version 3), entity count,
+# cell size, max half width and height of any entity, then offsets of the type
+# table, records, IDs and directory, the number of directory entries and one
+# more than the largest ID
+HEADER = struct.Struct("<8sIIQdddQQQQQQ")
+# Version 1 had no IDs: no ID offset and no next ID
+HEADER_V1 = struct.Struct("<8sIIQdddQQQQ")
+
+# Aim for this many entities per directory cell when choosing the cell size
+_ENTITIES_PER_CELL = 16
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def save(path, objects, progress=None):
+    """Write objects to path and return the entity count.
+
+    The file is written next to path and then renamed over it, so a drawing
+    that is currently open from path through mmap stays readable. Unlike the
+    text writers this one is not streaming: records are sorted by cell, and
+    the cell size depends on the extent of the whole drawing, so the entities
+    are first collected as compact columns (41 bytes each, plus their sort
+    keys) and written once all are known.
+    """
+    reporter = ProgressReporter(progress)
+    kinds = array("b")
+    coords = array("d")
+    ids = array("q")
+    for obj in objects:
+        if isinstance(obj, Line):
+            kinds.append(LINE)
+            coords.extend((obj.start.x, obj.start.y, obj.end.x, obj.end.y))
+        elif isinstance(obj, Rectangle):
+            kinds.append(RECTANGLE)
+            coords.extend((obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y))
+        else:
+            continue
+        ids.append(obj.eid or 0)
+        reporter.entity_done()
+    count = len(kinds)
+    next_eid = max(ids, default=0) + 1
+    for k, eid in enumerate(ids):
+        if not eid:
+            ids[k] = next_eid
+            next_eid += 1
+
+    x1s, y1s, x2s, y2s = coords[0::4], coords[1::4], coords[2::4], coords[3::4]
+    if count:
+        min_x, max_x = min(min(x1s), min(x2s)), max(max(x1s), max(x2s))
+        min_y, max_y = min(min(y1s), min(y2s)), max(max(y1s), max(y2s))
+        area = max(max_x - min_x, 1e-9) * max(max_y - min_y, 1e-9)
+        cell_size = math.sqrt(area * _ENTITIES_PER_CELL / count)
+        half_width = max(abs(b - a) for a, b in zip(x1s, x2s)) / 2
+        half_height = max(abs(b - a) for a, b in zip(y1s, y2s)) / 2
+    else:
+        cell_size, half_width, half_height = 1.0, 0.0, 0.0
+
+    cells = [] # (level, cx, cy) of every record
+    levels = 0
+    for a, b, c, d in zip(x1s, x2s, y1s, y2s):
+        extent = max(abs(b - a), abs(d - c))
+        level, size = 0, cell_size
+        while extent > size:
+            level, size = level + 1, size * 2
+        levels = max(levels, level + 1)
+        cells.append((level, math.floor((a + b) / 2 / size), math.floor((c + d) / 2 / size)))
+    order = sorted(range(count), key=cells.__getitem__)
+
+    sorted_kinds = array("b", [kinds[i] for i in order])
+    sorted_coords = array("d")
+    for i in order:
+        sorted_coords.extend(coords[4 * i:4 * i + 4])
+    sorted_ids = array("q", [ids[i] for i in order])
+    directory = array("q")
+    for position, i in enumerate(order):
+        level, cx, cy = cells[i]
+        if directory and directory[-5] == level and directory[-4] == cx and directory[-3] == cy:
+            directory[-1] += 1
+        else:
+            directory.extend((level, cx, cy, position, 1))
+    if sys.byteorder != "little":
+        sorted_coords.byteswap()
+        sorted_ids.byteswap()
+        directory.byteswap()
+
+    kinds_offset = HEADER.size
+    coords_offset = _align(kinds_offset + count)
+    ids_offset = coords_offset + 32 * count
+    directory_offset = ids_offset + 8 * count
+    header = HEADER.pack(MAGIC, VERSION, levels, count, cell_size, half_width, half_height,
+                         kinds_offset, coords_offset, ids_offset, directory_offset, len(directory) // 5,
+                         next_eid)
+
+    directory_name = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory_name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(sorted_kinds.tobytes())
+            f.write(b"\0" * (coords_offset - kinds_offset - count))
+            f.write(sorted_coords.tobytes())
+            f.write(sorted_ids.tobytes())
+            f.write(directory.tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    reporter.finish()
+    return count
+
+
+class MappedDrawing:
+    """A native drawing file opened through mmap.
+
+    Entities are addressed by record index. entity(i) materialises record i
+    as a Line or Rectangle the first time it is asked for and returns the same
+    object afterwards, so edits made to it are kept. Entities carry the
+    entity ID stored in the file, or one assigned from their record index
+    (see the module docstring); next_eid is above all of them.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Native drawings can only be memory-mapped on little-endian machines.")
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER_V1.size:
+                raise ValueError(f"{path} is not a native drawing file.")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        magic, version = struct.unpack_from("<8sI", self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a native drawing file.")
+        if version == 1:
+            (_, _, _, self.count, self.cell_size, self._half_width, self._half_height,
+             kinds_offset, coords_offset, directory_offset, directory_count) = HEADER_V1.unpack_from(self._map)
+            ids_offset, self.next_eid = None, 1
+            self._levels, self._stride = None, 4
+        elif version in (2, VERSION) and size >= HEADER.size:
+            (_, _, levels, self.count, self.cell_size, self._half_width, self._half_height,
+             kinds_offset, coords_offset, ids_offset, directory_offset, directory_count,
+             self.next_eid) = HEADER.unpack_from(self._map)
+            if version == 2:
+                self._levels, self._stride = None, 4
+            else:
+                self._levels, self._stride = levels, 5
+        else:
+            self.close()
+            raise ValueError(f"{path} has unsupported version {version}.")
+
+        # Every table must lie inside the file, or the views below would be
+        # short and cast() would fail with a TypeError
+        ends = [kinds_offset + self.count, coords_offset + 32 * self.count,
+                directory_offset + 8 * self._stride * directory_count]
+        if ids_offset is not None:
+            ends.append(ids_offset + 8 * self.count)
+        if max(ends) > size or not (self.cell_size > 0 and math.isfinite(self.cell_size)) or \
+                not (math.isfinite(self._half_width) and math.isfinite(self._half_height)):
+            self.close()
+            raise ValueError(f"{path} is truncated or corrupt.")
+
+        # First ID of the records stored without one; only older versions have them
+        self._unnamed_eid = self.next_eid
+        if version < VERSION:
+            self.next_eid += self.count
+
+        view = memoryview(self._map)
+        self._kinds = view[kinds_offset:kinds_offset + self.count]
+        self._coords = view[coords_offset:coords_offset + 32 * self.count].cast("d")
+        self._ids = None if ids_offset is None else view[ids_offset:ids_offset + 8 * self.count].cast("q")
+        self._directory = view[directory_offset:directory_offset + 8 * self._stride * directory_count].cast("q")
+        self._directory_count = directory_count
+        self.materialized = {} # record index -> Line/Rectangle
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for attr in ("_kinds", "_coords", "_ids", "_directory"):
+            view = getattr(self, attr, None)
+            if view is not None:
+                view.release()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def record(self, i):
+        """(kind, x1, y1, x2, y2) of record i, without materialising it."""
+        c = self._coords
+        return self._kinds[i], c[4 * i], c[4 * i + 1], c[4 * i + 2], c[4 * i + 3]
+
+    def record_entity(self, i):
+        """A new object for record i, not shared with entity(i)."""
+        kind, x1, y1, x2, y2 = self.record(i)
+        if kind == LINE:
+            obj = Line(Point(x1, y1), Point(x2, y2))
+        else:
+            obj = Rectangle(Point(x1, y1), Point(x2, y2))
+        eid = self._ids[i] if self._ids is not None else 0
+        obj.eid = eid or self._unnamed_eid + i
+        return obj
+
+    def entity(self, i):
+        obj = self.materialized.get(i)
+        if obj is None:
+            obj = self.materialized[i] = self.record_entity(i)
+        return obj
+
+    def iter_entities(self):
+        """Every entity in file order: materialised objects where they exist,
+        fresh unshared objects otherwise."""
+        for i in range(self.count):
+            obj = self.materialized.get(i)
+            yield obj if obj is not None else self.record_entity(i)
+
+    def _entry_key(self, j):
+        # (level, cx, cy) of directory entry j; files before version 3 have one level
+        d, k = self._directory, self._stride * j
+        if self._levels is None:
+            return 0, d[k], d[k + 1]
+        return d[k], d[k + 1], d[k + 2]
+
+    def _find_entry(self, key, lo=0, hi=None):
+        # Index of the first directory entry not ordered before key
+        if hi is None:
+            hi = self._directory_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry_key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _directory_runs(self, level, lo, hi, cx1, cy1, cx2, cy2):
+        # (first record, count) of the cells of level within the cell range;
+        # the level's entries are lo to hi
+        d, stride = self._directory, self._stride
+        if (cx2 - cx1 + 1) > hi - lo:
+            # Zoomed far out: walking the level's whole directory is cheaper
+            for j in range(lo, hi):
+                _, cx, cy = self._entry_key(j)
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    yield d[stride * j + stride - 2], d[stride * j + stride - 1]
+            return
+        for cx in range(cx1, cx2 + 1):
+            j = self._find_entry((level, cx, cy1), lo, hi)
+            while j < hi:
+                _, entry_cx, entry_cy = self._entry_key(j)
+                if entry_cx != cx or entry_cy > cy2:
+                    break
+                yield d[stride * j + stride - 2], d[stride * j + stride - 1]
+                j += 1
+
+    def _level_searches(self):
+        # (level, cell size, half width, half height) to search: records are
+        # filed under their centre cell, so each level's search is widened by
+        # the largest half extent of the entities in it
+        if self._levels is None:
+            yield 0, self.cell_size, self._half_width, self._half_height
+            return
+        size = self.cell_size
+        for level in range(self._levels):
+            yield level, size, size / 2, size / 2
+            size *= 2
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """Yield the indices of records whose bounding box meets the window."""
+        if not self.count:
+            return
+        c = self._coords
+        lo = 0
+        for level, size, half_width, half_height in self._level_searches():
+            if lo == self._directory_count:
+                break
+            hi = self._find_entry((level + 1,), lo)
+            if lo == hi:
+                continue
+            cx1 = math.floor((min_x - half_width) / size)
+            cx2 = math.floor((max_x + half_width) / size)
+            cy1 = math.floor((min_y - half_height) / size)
+            cy2 = math.floor((max_y + half_height) / size)
+            for start, run_length in self._directory_runs(level, lo, hi, cx1, cy1, cx2, cy2):
+                if start < 0 or run_length < 0 or start + run_length > self.count:
+                    raise ValueError(f"{self.path} is corrupt.")
+                for i in range(start, start + run_length):
+                    x1, y1, x2, y2 = c[4 * i], c[4 * i + 1], c[4 * i + 2], c[4 * i + 3]
+                    if min(x1, x2) <= max_x and max(x1, x2) >= min_x and \
+                            min(y1, y2) <= max_y and max(y1, y2) >= min_y:
+                        yield i
+            lo = hi
+
+
+def load(path, progress=None):
+    """Yield every entity of a native file as a new object."""
+    with MappedDrawing(path) as mapped:
+        reporter = ProgressReporter(progress, os.path.getsize(path))
+        for obj in mapped.iter_entities():
+            yield obj
+            reporter.entity_done()
+        reporter.finish()
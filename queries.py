@@ -0,0 +1,273 @@
+"""Queries over a whole Drawing: selection, intersections, measurements and nearest entities.
+
+Results come back as arrays: entity IDs as array("q") and coordinates,
+lengths and distances as array("d"), so large results stay compact and
+can be handed to NumPy with numpy.frombuffer() without copying.
+
+Selection and nearest-entity queries go through the drawing's spatial
+index; for a drawing opened with open_mapped() they materialise the
+region they look at first (for nearest() without max_distance, a square
+around each point grown until it holds the nearest entity).
+intersections() and the aggregates look at every entity of the drawing.
+Every entity has an ID, including those read from older native files
+(see native_format.py).
+"""
+
+import math
+from array import array
+from collections import namedtuple
+
+from geometry import Line, Rectangle
+
+# Pairs of entities that meet, and where: first[i] and second[i] (first < second) meet at (x[i], y[i])
+Intersections = namedtuple("Intersections", "first second x y")
+
+# A segment whose y range covers more buckets than this is checked against every active segment
+_MAX_BUCKETS_PER_SEGMENT = 64
+
+
+def _segments(obj):
+    # The segments an entity is drawn with: a line itself, the four sides of a rectangle
+    if isinstance(obj, Line):
+        return [(obj.start.x, obj.start.y, obj.end.x, obj.end.y)]
+    if isinstance(obj, Rectangle):
+        min_x, min_y, max_x, max_y = obj.bounding_box()
+        return [(min_x, min_y, max_x, min_y), (max_x, min_y, max_x, max_y),
+                (max_x, max_y, min_x, max_y), (min_x, max_y, min_x, min_y)]
+    return []
+
+
+def _materialize(drawing, min_x, min_y, max_x, max_y):
+    if drawing.source is not None:
+        drawing.materialize(min_x, min_y, max_x, max_y)
+
+
+def _nearest_mapped(drawing, x, y, obj):
+    # obj is the nearest materialised entity, or None; unmaterialised ones
+    # may lie closer. Load squares around the point, doubling from one cell
+    # of the file, until one holds an entity within its reach or reaches
+    # obj, then search again.
+    source = drawing.source
+    distance = math.inf if obj is None else obj.distance_to(x, y)
+    reach = source.cell_size or 1.0
+    while len(source.materialized) < len(source):
+        if distance <= reach:
+            drawing.materialize(x - distance, y - distance, x + distance, y + distance)
+            break
+        drawing.materialize(x - reach, y - reach, x + reach, y + reach)
+        if drawing.spatial_index.nearest(x, y, reach) is not None:
+            break
+        reach *= 2
+    return drawing.spatial_index.nearest(x, y)
+
+
+def _segment_crosses_window(x1, y1, x2, y2, min_x, min_y, max_x, max_y):
+    # Liang-Barsky: is some part of the segment inside the window?
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in ((-dx, x1 - min_x), (dx, max_x - x1), (-dy, y1 - min_y), (dy, max_y - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return False
+    return True
+
+
+def select_window(drawing, min_x, min_y, max_x, max_y):
+    """IDs of the entities lying entirely inside the window, in ascending order."""
+    _materialize(drawing, min_x, min_y, max_x, max_y)
+    ids = []
+    for obj in drawing.spatial_index.query(min_x, min_y, max_x, max_y):
+        bx1, by1, bx2, by2 = obj.bounding_box()
+        if min_x <= bx1 and bx2 <= max_x and min_y <= by1 and by2 <= max_y:
+            ids.append(obj.eid)
+    return array("q", sorted(ids))
+
+
+def select_crossing(drawing, min_x, min_y, max_x, max_y):
+    """IDs of the entities inside the window or crossing its edge, in ascending order.
+
+    Rectangles are outlines: a window inside a rectangle that touches none
+    of its sides does not select it.
+    """
+    _materialize(drawing, min_x, min_y, max_x, max_y)
+    ids = []
+    for obj in drawing.spatial_index.query(min_x, min_y, max_x, max_y):
+        if any(_segment_crosses_window(*segment, min_x, min_y, max_x, max_y) for segment in _segments(obj)):
+            ids.append(obj.eid)
+    return array("q", sorted(ids))
+
+
+def _intersect(a, b):
+    # Points where segments a and b meet: none, one, or the two ends of a
+    # collinear overlap (one if they only touch end to end). The segments
+    # are taken in a fixed order, so the rounding of the result does not
+    # depend on which one came first.
+    if b < a:
+        a, b = b, a
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+    rx, ry = ax2 - ax1, ay2 - ay1
+    sx, sy = bx2 - bx1, by2 - by1
+    denominator = rx * sy - ry * sx
+    qx, qy = bx1 - ax1, by1 - ay1
+    if denominator != 0:
+        t = (qx * sy - qy * sx) / denominator
+        u = (qx * ry - qy * rx) / denominator
+        if 0 <= t <= 1 and 0 <= u <= 1:
+            return [(ax1 + t * rx, ay1 + t * ry)]
+        return []
+    if qx * ry - qy * rx != 0:
+        return [] # parallel, on different lines
+    length2 = rx * rx + ry * ry
+    if length2 == 0:
+        # a is a point; it meets b if it lies on it
+        if sx * sx + sy * sy == 0:
+            return [(ax1, ay1)] if (ax1, ay1) == (bx1, by1) else []
+        u = (-qx * sx - qy * sy) / (sx * sx + sy * sy)
+        return [(ax1, ay1)] if 0 <= u <= 1 else []
+    # Collinear: the shared stretch runs between end points of a and b,
+    # which are reported as given rather than recomputed
+    def position(x, y):
+        return ((x - ax1) * rx + (y - ay1) * ry) / length2
+    tb1, tb2 = position(bx1, by1), position(bx2, by2)
+    low, high = max(min(tb1, tb2), 0.0), min(max(tb1, tb2), 1.0)
+    if low > high:
+        return []
+    ends = {0.0: (ax1, ay1), 1.0: (ax2, ay2), tb1: (bx1, by1), tb2: (bx2, by2)}
+    return [ends[low]] if low == high else [ends[low], ends[high]]
+
+
+def intersections(drawing):
+    """Every point where two different entities meet, as Intersections arrays.
+
+    Lines and rectangle sides are tested against each other, so this covers
+    line-line, line-rectangle and rectangle-rectangle contacts, including
+    end points that merely touch. Collinear overlaps are reported by the two
+    ends of the shared stretch. Pairs are sorted by (first, second, x, y).
+
+    A sweep over x keeps the segments whose x range contains the sweep
+    position, bucketed by y, so each segment is only compared with active
+    segments in its y buckets: the cost grows with the number of segments
+    whose bounding boxes overlap rather than with the square of the drawing.
+    """
+    segments = [] # (entity number, entity ID, segment)
+    for n, obj in enumerate(drawing):
+        for segment in _segments(obj):
+            segments.append((n, obj.eid, segment))
+    if not segments:
+        return Intersections(array("q"), array("q"), array("d"), array("d"))
+
+    # Bucket height: about the typical segment height, so most segments span few buckets
+    heights = sorted(abs(s[3] - s[1]) for _, _, s in segments)
+    bucket = heights[len(heights) // 2] or heights[-1] / math.sqrt(len(heights)) or 1.0
+
+    # Enter events sort before exit events at the same x, so touching segments meet
+    events = []
+    for i, (_, _, (x1, _, x2, _)) in enumerate(segments):
+        events.append((min(x1, x2), 0, i))
+        events.append((max(x1, x2), 1, i))
+    events.sort()
+
+    active = {}    # bucket -> {segment index}
+    oversized = set() # active segments spanning too many buckets
+    spans = {}     # active segment index -> its buckets, or None if oversized
+    found = set()
+    for _, kind, i in events:
+        n, eid, segment = segments[i]
+        y_low, y_high = min(segment[1], segment[3]), max(segment[1], segment[3])
+        if kind == 1:
+            cells = spans.pop(i)
+            if cells is None:
+                oversized.discard(i)
+            else:
+                for cell in cells:
+                    active[cell].discard(i)
+            continue
+
+        first, last = math.floor(y_low / bucket), math.floor(y_high / bucket)
+        if last - first + 1 > _MAX_BUCKETS_PER_SEGMENT:
+            candidates = set(spans)
+        else:
+            candidates = set(oversized)
+            for cell in range(first, last + 1):
+                candidates.update(active.get(cell, ()))
+        for j in candidates:
+            other_n, other_eid, other = segments[j]
+            if other_n == n or max(other[1], other[3]) < y_low or min(other[1], other[3]) > y_high:
+                continue
+            pair = (eid, other_eid) if eid < other_eid else (other_eid, eid)
+            for x, y in _intersect(segment, other):
+                found.add((*pair, x, y))
+
+        if last - first + 1 > _MAX_BUCKETS_PER_SEGMENT:
+            oversized.add(i)
+            spans[i] = None
+        else:
+            cells = range(first, last + 1)
+            for cell in cells:
+                active.setdefault(cell, set()).add(i)
+            spans[i] = cells
+
+    found = sorted(found)
+    return Intersections(array("q", [f[0] for f in found]), array("q", [f[1] for f in found]),
+                         array("d", [f[2] for f in found]), array("d", [f[3] for f in found]))
+
+
+def lengths(drawing):
+    """(IDs, lengths) of the lines of the drawing, in drawing order."""
+    ids, values = array("q"), array("d")
+    for obj in drawing:
+        if isinstance(obj, Line):
+            ids.append(obj.eid)
+            values.append(obj.length())
+    return ids, values
+
+
+def areas(drawing):
+    """(IDs, areas) of the rectangles of the drawing, in drawing order."""
+    ids, values = array("q"), array("d")
+    for obj in drawing:
+        if isinstance(obj, Rectangle):
+            ids.append(obj.eid)
+            values.append(obj.width() * obj.height())
+    return ids, values
+
+
+def total_length(drawing):
+    """Sum of the lengths of the lines, accurate however many there are."""
+    return math.fsum(lengths(drawing)[1])
+
+
+def total_area(drawing):
+    """Sum of the areas of the rectangles, accurate however many there are."""
+    return math.fsum(areas(drawing)[1])
+
+
+def nearest(drawing, xs, ys, max_distance=None):
+    """(IDs, distances) of the entity nearest to each point (xs[i], ys[i]).
+
+    Where no entity lies within max_distance the ID is 0 and the distance
+    inf. Distances are to lines and to rectangle outlines.
+    """
+    ids, distances = array("q"), array("d")
+    for x, y in zip(xs, ys):
+        if max_distance is not None:
+            _materialize(drawing, x - max_distance, y - max_distance, x + max_distance, y + max_distance)
+        obj = drawing.spatial_index.nearest(x, y, max_distance)
+        if max_distance is None and drawing.source is not None:
+            obj = _nearest_mapped(drawing, x, y, obj)
+        if obj is None:
+            ids.append(0)
+            distances.append(math.inf)
+        else:
+            ids.append(obj.eid)
+            distances.append(obj.distance_to(x, y))
+    return ids, distances
@@ -0,0 +1,508 @@
+"""Offscreen rendering of drawings to PNG, without Tk.
+
+Rasterises what redraw_all() puts on the canvas (grid, axes, lines,
+rectangles and their dimensions, laid out by layout.py, and the
+level-of-detail tiles that stand in for entities too small to draw at the
+view's zoom) into RGB pixels and writes them as PNG with zlib and struct
+only. The drawing's LodIndex is used when it has one; otherwise entities
+are sorted into size classes as they are collected, with the same cutoff. Lines are drawn with
+integer Bresenham stepping, text with a tiny built-in bitmap font that
+covers dimension values and the axis labels.
+
+A TileRenderer splits the image into square tiles and renders them on a
+thread pool. Each tile first becomes a display list (the primitives that
+touch it, in tile coordinates); the tile cache is keyed by a hash of that
+list and the zoom, so a tile is only rasterised again when something
+visible in it changed, and panning by whole tiles reuses the rest.
+Rasterising is pure Python and holds the GIL, so the pool mostly overlaps
+the zlib compression of tiles (write_tiles()), which releases it.
+
+The drawing must not change while a render is in progress.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from geometry import Line, Rectangle
+from layout import (AXIS_COLOR, GRID_COLOR, LINE_COLOR, LOD_TILE_COLOR, RECTANGLE_COLOR, axis_layout,
+                    linear_dimension_layout, object_dimensions, visible_grid_spacing)
+from lod import LodIndex, lod_level
+from transform import world_to_screen
+
+# RGB of the Tk color names used by layout.py
+COLORS = {
+    "white": (255, 255, 255),
+    "blue": (0, 0, 255),
+    "green": (0, 255, 0),
+    "red": (255, 0, 0),
+    "purple": (160, 32, 240),
+    "gray": (190, 190, 190),
+}
+
+# Dimensions and labels reach this many pixels beyond their entity
+MARGIN_PIXELS = 64
+# Display list coordinates are rounded to this fraction of a pixel, so that
+# the same content at a slightly different floating-point offset hashes alike
+SUBPIXELS = 64
+
+# 3x5 glyphs, one string of three pixels per row
+FONT = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "001", "001", "001"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    ".": ("000", "000", "000", "000", "010"),
+    "-": ("000", "000", "111", "000", "000"),
+    "X": ("101", "101", "010", "101", "101"),
+    "Y": ("101", "101", "010", "010", "010"),
+}
+FONT_SCALE = 2 # font pixels per glyph pixel, so text is about as tall as the canvas font
+
+
+def rgb(color):
+    """(r, g, b) of a Tk color name from COLORS or a "#RRGGBB" string."""
+    if color.startswith("#"):
+        return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return COLORS[color]
+
+
+def encode_png(width, height, pixels):
+    """PNG file contents for 8-bit RGB pixels, rows top to bottom."""
+    stride = width * 3
+    raw = b"".join(b"\x00" + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+class Raster:
+    """An RGB image with the drawing primitives the renderer needs.
+
+    Coordinates are pixels with y pointing down, like canvas coordinates;
+    everything is clipped to the image.
+    """
+
+    def __init__(self, width, height, background="white", pixels=None):
+        self.width = width
+        self.height = height
+        if pixels is None:
+            pixels = bytearray(bytes(rgb(background)) * (width * height))
+        self.pixels = pixels
+
+    def png(self):
+        return encode_png(self.width, self.height, self.pixels)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.png())
+
+    def fill_rect(self, x1, y1, x2, y2, color):
+        """Fill the pixels with x1 <= x < x2 and y1 <= y < y2."""
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, self.width), min(y2, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        span = bytes(color) * (x2 - x1)
+        stride = self.width * 3
+        pixels = self.pixels
+        for y in range(y1, y2):
+            start = y * stride + x1 * 3
+            pixels[start:start + len(span)] = span
+
+    def line(self, x1, y1, x2, y2, color, width=1, dash=0):
+        """Draw a line width pixels thick; dash is the length of its dashes
+        and of the gaps between them in pixels, or 0 for a solid line.
+
+        The pixels are the ones Bresenham's algorithm picks for the rounded
+        end points, computed per step from the first end point, so a line
+        cut by the image edge continues exactly in the neighbouring tile.
+        """
+        x1, y1, x2, y2 = round(x1), round(y1), round(x2), round(y2)
+        color = bytes(color)
+        low, high = (width - 1) // 2, width // 2 # thickness on either side of the centre pixel
+        dx, dy = x2 - x1, y2 - y1
+        if not dash and (dx == 0 or dy == 0):
+            self.fill_rect(min(x1, x2) - low * (dx == 0), min(y1, y2) - low * (dy == 0),
+                           max(x1, x2) + 1 + high * (dx == 0), max(y1, y2) + 1 + high * (dy == 0), color)
+            return
+
+        pixels = self.pixels
+        w, h = self.width, self.height
+        if abs(dx) >= abs(dy):
+            if dx < 0:
+                x1, y1, x2, y2, dx, dy = x2, y2, x1, y1, -dx, -dy
+            for x in range(max(x1, 0), min(x2, w - 1) + 1):
+                if dash and (x - x1) // dash % 2:
+                    continue
+                y = y1 + (2 * (x - x1) * dy + dx) // (2 * dx)
+                for py in range(max(y - low, 0), min(y + high, h - 1) + 1):
+                    i = (py * w + x) * 3
+                    pixels[i:i + 3] = color
+        else:
+            if dy < 0:
+                x1, y1, x2, y2, dx, dy = x2, y2, x1, y1, -dx, -dy
+            for y in range(max(y1, 0), min(y2, h - 1) + 1):
+                if dash and (y - y1) // dash % 2:
+                    continue
+                x = x1 + (2 * (y - y1) * dx + dy) // (2 * dy)
+                for px in range(max(x - low, 0), min(x + high, w - 1) + 1):
+                    i = (y * w + px) * 3
+                    pixels[i:i + 3] = color
+
+    def arrow_head(self, tip_x, tip_y, from_x, from_y, color, length=10, half_width=4):
+        """Fill the triangular arrow head at (tip_x, tip_y) of a line coming from (from_x, from_y)."""
+        distance = math.hypot(tip_x - from_x, tip_y - from_y)
+        if distance == 0:
+            return
+        ux, uy = (tip_x - from_x) / distance, (tip_y - from_y) / distance
+        base_x, base_y = tip_x - ux * length, tip_y - uy * length
+        corners = ((tip_x, tip_y),
+                   (base_x - uy * half_width, base_y + ux * half_width),
+                   (base_x + uy * half_width, base_y - ux * half_width))
+        self._fill_triangle(corners, bytes(color))
+
+    def _fill_triangle(self, corners, color):
+        # Pixels whose centre lies inside the triangle, found with edge functions
+        (ax, ay), (bx, by), (cx, cy) = corners
+        area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+        if area == 0:
+            return
+        sign = 1 if area > 0 else -1
+        edges = [(ax, ay, bx, by), (bx, by, cx, cy), (cx, cy, ax, ay)]
+        pixels = self.pixels
+        for y in range(max(math.floor(min(ay, by, cy)), 0), min(math.ceil(max(ay, by, cy)), self.height)):
+            for x in range(max(math.floor(min(ax, bx, cx)), 0), min(math.ceil(max(ax, bx, cx)), self.width)):
+                px, py = x + 0.5, y + 0.5
+                if all(sign * ((x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)) >= 0 for x1, y1, x2, y2 in edges):
+                    i = (y * self.width + x) * 3
+                    pixels[i:i + 3] = color
+
+    def text(self, x, y, text, color):
+        """Draw text centred on (x, y) in the bitmap font; unknown characters are left blank."""
+        s = FONT_SCALE
+        advance = 4 * s
+        left = round(x - (len(text) * advance - s) / 2)
+        top = round(y - 5 * s / 2)
+        for n, char in enumerate(text):
+            glyph = FONT.get(char)
+            if glyph is None:
+                continue
+            gx = left + n * advance
+            for row, bits in enumerate(glyph):
+                for column, bit in enumerate(bits):
+                    if bit == "1":
+                        self.fill_rect(gx + column * s, top + row * s, gx + (column + 1) * s, top + (row + 1) * s, color)
+
+    def paste(self, other, x, y):
+        """Copy the pixels of other into this image with its top-left corner at (x, y)."""
+        stride = self.width * 3
+        row_bytes = other.width * 3
+        for row in range(other.height):
+            start = (y + row) * stride + x * 3
+            self.pixels[start:start + row_bytes] = other.pixels[row * row_bytes:(row + 1) * row_bytes]
+
+
+def display_list(drawing, width, height, scale, offset_x, offset_y, x0, y0, x1, y1):
+    """The primitives the canvas would show in the pixel window x0 <= x < x1,
+    y0 <= y < y1 of a width x height view, in coordinates relative to (x0, y0).
+
+    Primitives are ("line", x1, y1, x2, y2, color, width, dash, arrow) with
+    arrow None, "last" or "both", ("text", x, y, text, color) and
+    ("rect", x1, y1, x2, y2, color) for a filled level-of-detail tile, in
+    drawing order, with coordinates rounded to 1/SUBPIXELS of a pixel.
+    """
+    primitives = []
+
+    spacing = visible_grid_spacing(scale)
+    if spacing is not None:
+        # Grid lines lie where the canvas puts them: at the offset plus multiples of the period
+        period = spacing * scale
+        for k in range(math.ceil((x0 - 1 - offset_x) / period), math.floor((x1 - offset_x) / period) + 1):
+            x = offset_x + k * period - x0
+            primitives.append(("line", x, -1, x, y1 - y0, GRID_COLOR, 1, 0, None))
+        for k in range(math.ceil((y0 - 1 - offset_y) / period), math.floor((y1 - offset_y) / period) + 1):
+            y = offset_y + k * period - y0
+            primitives.append(("line", -1, y, x1 - x0, y, GRID_COLOR, 1, 0, None))
+
+    # The axes are cut to the tile (plus room for the arrow) so that the
+    # display list of a tile does not depend on where the view ends
+    x_axis, x_label, y_axis, y_label = axis_layout(offset_x, offset_y, width, height)
+    reach = 16
+    if y0 - reach <= offset_y <= y1 + reach:
+        start, end = max(x_axis[0], x0 - reach), min(x_axis[2], x1 + reach)
+        if start <= end:
+            primitives.append(("line", start - x0, offset_y - y0, end - x0, offset_y - y0, AXIS_COLOR, 2, 0,
+                               "last" if end == x_axis[2] else None))
+    if x0 - reach <= offset_x <= x1 + reach:
+        start, end = min(y_axis[1], y1 + reach), max(y_axis[3], y0 - reach)
+        if start >= end:
+            primitives.append(("line", offset_x - x0, start - y0, offset_x - x0, end - y0, AXIS_COLOR, 2, 0,
+                               "last" if end == y_axis[3] else None))
+    for label, (x, y) in (("X", x_label), ("Y", y_label)):
+        if x0 - reach <= x <= x1 + reach and y0 - reach <= y <= y1 + reach:
+            primitives.append(("text", x - x0, y - y0, label, AXIS_COLOR))
+
+    min_x, max_x = (x0 - MARGIN_PIXELS - offset_x) / scale, (x1 + MARGIN_PIXELS - offset_x) / scale
+    min_y, max_y = (offset_y - y1 - MARGIN_PIXELS) / scale, (offset_y - y0 + MARGIN_PIXELS) / scale
+    level = lod_level(scale)
+    objs, tiles = _level_of_detail(drawing, level, min_x, min_y, max_x, max_y)
+    objs = sorted(objs, key=lambda obj: obj.eid or 0)
+    xs_cad, ys_cad = [], []
+    for obj in objs:
+        if isinstance(obj, Line):
+            xs_cad += (obj.start.x, obj.end.x)
+            ys_cad += (obj.start.y, obj.end.y)
+        else:
+            bx1, by1, bx2, by2 = obj.bounding_box()
+            xs_cad += (bx1, bx2)
+            ys_cad += (by1, by2)
+    xs, ys = world_to_screen(xs_cad, ys_cad, scale, offset_x - x0, offset_y - y0)
+    for i, obj in enumerate(objs):
+        anchors = (xs[2 * i], ys[2 * i], xs[2 * i + 1], ys[2 * i + 1])
+        if isinstance(obj, Line):
+            primitives.append(("line", *anchors, LINE_COLOR, 2, 0, None))
+        elif isinstance(obj, Rectangle):
+            left, bottom, right, top = anchors
+            for edge in ((left, top, right, top), (right, top, right, bottom),
+                         (right, bottom, left, bottom), (left, bottom, left, top)):
+                primitives.append(("line", *edge, RECTANGLE_COLOR, 2, 0, None))
+        else:
+            continue
+        for canvas_start, canvas_end, value, color, offset_direction, _ in object_dimensions(obj, anchors):
+            ext1, ext2, dim_line, text_pos = linear_dimension_layout(canvas_start, canvas_end, offset_direction=offset_direction)
+            primitives.append(("line", *ext1, color, 1, 3, None))
+            primitives.append(("line", *ext2, color, 1, 3, None))
+            primitives.append(("line", *dim_line, color, 1, 0, "both"))
+            primitives.append(("text", *text_pos, f"{value:.2f}", color))
+
+    # Drawn over the entities, as redraw_all() adds them last
+    size = 2.0 ** level * scale
+    for tx, ty in sorted(tiles):
+        primitives.append(("rect", offset_x + tx * size - x0, offset_y - (ty + 1) * size - y0,
+                           offset_x + (tx + 1) * size - x0, offset_y - ty * size - y0, LOD_TILE_COLOR))
+    return [_quantised(primitive) for primitive in primitives]
+
+
+# Only for LodIndex.size_class() on drawings without a LodIndex
+_SIZE_CLASSES = LodIndex()
+
+
+def _level_of_detail(drawing, level, min_x, min_y, max_x, max_y):
+    # (entities drawn on their own, (tx, ty) of the level tiles) in the window,
+    # split at level as redraw_all() splits them
+    lod_index = drawing.lod_index
+    if lod_index is not None:
+        return (lod_index.large_entities(level, min_x, min_y, max_x, max_y),
+                lod_index.tiles(level, min_x, min_y, max_x, max_y))
+    size = 2.0 ** level
+    tx1, ty1, tx2, ty2 = (math.floor(c / size) for c in (min_x, min_y, max_x, max_y))
+    objs, tiles = [], set()
+    # A small entity counts for the tile holding its centre, which can lie
+    # in the window while the entity itself is up to a tile outside it
+    for obj in drawing.spatial_index.query(min_x - size, min_y - size, max_x + size, max_y + size):
+        bx1, by1, bx2, by2 = obj.bounding_box()
+        extent = max(bx2 - bx1, by2 - by1)
+        # As size_class(obj) > level, which is only called where the extent
+        # is close to the cutoff; classes are clamped to the index's levels
+        if level < _SIZE_CLASSES.min_level or extent > 2 * size and level < _SIZE_CLASSES.max_level or \
+                extent * 2 >= size and _SIZE_CLASSES.size_class(obj) > level:
+            if bx1 <= max_x and bx2 >= min_x and by1 <= max_y and by2 >= min_y:
+                objs.append(obj)
+        else:
+            tile = (math.floor((bx1 + bx2) / 2 / size), math.floor((by1 + by2) / 2 / size))
+            if tx1 <= tile[0] <= tx2 and ty1 <= tile[1] <= ty2:
+                tiles.add(tile)
+    return objs, tiles
+
+
+def _quantised(primitive):
+    if primitive[0] in ("line", "rect"):
+        coords, rest = primitive[1:5], primitive[5:]
+    else:
+        coords, rest = primitive[1:3], primitive[3:]
+    return (primitive[0], *(round(c * SUBPIXELS) / SUBPIXELS for c in coords), *rest)
+
+
+def rasterise(primitives, width, height):
+    """A width x height Raster with the primitives of display_list() drawn on white."""
+    raster = Raster(width, height)
+    for primitive in primitives:
+        if primitive[0] == "line":
+            _, px1, py1, px2, py2, color, line_width, dash, arrow = primitive
+            color = rgb(color)
+            raster.line(px1, py1, px2, py2, color, line_width, dash)
+            if arrow is not None:
+                raster.arrow_head(px2, py2, px1, py1, color)
+            if arrow == "both":
+                raster.arrow_head(px1, py1, px2, py2, color)
+        elif primitive[0] == "rect":
+            # Rounded half up, so a tile cut by a tile edge continues exactly in the next tile
+            _, px1, py1, px2, py2, color = primitive
+            raster.fill_rect(*(math.floor(c + 0.5) for c in (px1, py1, px2, py2)), rgb(color))
+        else:
+            _, x, y, text, color = primitive
+            raster.text(x, y, text, rgb(color))
+    return raster
+
+
+class TileCache:
+    """Least recently used cache of rendered tile pixels, safe to share between threads."""
+
+    def __init__(self, max_tiles=256):
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict() # key -> (width, height, pixels)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get(self, key):
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key, tile):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+
+class TileRenderer:
+    """Renders views of a drawing tile by tile on a thread pool, through a TileCache.
+
+    Use it as a context manager, or call close() when done, to stop the
+    worker threads.
+    """
+
+    def __init__(self, tile_size=256, workers=None, cache=None):
+        self.tile_size = tile_size
+        self.cache = cache if cache is not None else TileCache()
+        self._pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _tile_windows(self, width, height):
+        size = self.tile_size
+        return {(tx, ty): (tx * size, ty * size, min((tx + 1) * size, width), min((ty + 1) * size, height))
+                for ty in range(math.ceil(height / size)) for tx in range(math.ceil(width / size))}
+
+    def _render_tile(self, drawing, view, window):
+        x0, y0, x1, y1 = window
+        primitives = display_list(drawing, *view, x0, y0, x1, y1)
+        digest = hashlib.sha1(repr((x1 - x0, y1 - y0, primitives)).encode()).hexdigest()
+        key = (digest, view[2]) # content hash and zoom
+        tile = self.cache.get(key)
+        if tile is None:
+            raster = rasterise(primitives, x1 - x0, y1 - y0)
+            tile = (raster.width, raster.height, bytes(raster.pixels))
+            self.cache.put(key, tile)
+        return Raster(*tile[:2], pixels=tile[2])
+
+    def tiles(self, drawing, width, height, scale, offset_x, offset_y):
+        """{(tx, ty): Raster} of the tiles of a width x height view at scale
+        pixels per unit with the origin at (offset_x, offset_y), like the
+        canvas view of the GUI. Tile (tx, ty) starts at pixel (tx, ty) * tile_size."""
+        view = (width, height, scale, offset_x, offset_y)
+        if drawing.source is not None:
+            # Materialising changes the drawing, so it happens before the workers start
+            drawing.materialize((-MARGIN_PIXELS - offset_x) / scale, (offset_y - height - MARGIN_PIXELS) / scale,
+                                (width + MARGIN_PIXELS - offset_x) / scale, (offset_y + MARGIN_PIXELS) / scale)
+        futures = {key: self._pool.submit(self._render_tile, drawing, view, window)
+                   for key, window in self._tile_windows(width, height).items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def render(self, drawing, width, height, scale, offset_x, offset_y):
+        """The whole view as one Raster, assembled from its tiles."""
+        image = Raster(width, height)
+        for (tx, ty), tile in self.tiles(drawing, width, height, scale, offset_x, offset_y).items():
+            image.paste(tile, tx * self.tile_size, ty * self.tile_size)
+        return image
+
+    def write_tiles(self, directory, drawing, width, height, scale, offset_x, offset_y):
+        """Write the view's tiles to directory as TX_TY.png and return their paths."""
+        os.makedirs(directory, exist_ok=True)
+        tiles = self.tiles(drawing, width, height, scale, offset_x, offset_y)
+
+        def write(item):
+            (tx, ty), tile = item
+            path = os.path.join(directory, f"{tx}_{ty}.png")
+            tile.save(path)
+            return path
+        return list(self._pool.map(write, tiles.items()))
+
+
+def fit_view(bounding_box, width, height, padding=MARGIN_PIXELS):
+    """(scale, offset_x, offset_y) showing bounding_box (min_x, min_y, max_x,
+    max_y, or None for an empty drawing) centred in a width x height view,
+    with padding pixels around it for the dimensions."""
+    if bounding_box is None:
+        return 10.0, width / 2, height / 2
+    min_x, min_y, max_x, max_y = bounding_box
+    room_x, room_y = max(width - 2 * padding, 1), max(height - 2 * padding, 1)
+    spans = [room / span for room, span in ((room_x, max_x - min_x), (room_y, max_y - min_y)) if span > 0]
+    scale = min(spans) if spans else 10.0
+    return scale, width / 2 - (min_x + max_x) / 2 * scale, height / 2 + (min_y + max_y) / 2 * scale
+
+
+def drawing_bounding_box(drawing):
+    """Bounding box of every entity of drawing, or None if it is empty."""
+    boxes = [obj.bounding_box() for obj in drawing]
+    if not boxes:
+        return None
+    return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+
+_shared_renderer = None
+
+
+def write_thumbnail(path, drawing, width=256, height=256, renderer=None):
+    """Render the whole drawing into a width x height PNG at path.
+
+    Without a renderer, one shared by all calls is used, so its tile cache
+    and threads serve a whole batch of thumbnails.
+    """
+    global _shared_renderer
+    if renderer is None:
+        if _shared_renderer is None:
+            _shared_renderer = TileRenderer()
+        renderer = _shared_renderer
+    view = fit_view(drawing_bounding_box(drawing), width, height)
+    renderer.render(drawing, width, height, *view).save(path)
@@ -0,0 +1,175 @@
+import math
+
+from geometry import Line, Rectangle
+
+
+def snap_points(obj):
+    """((x, y, kind), ...) of the points of obj that the cursor snaps to.
+
+    Lines snap at their end points and midpoint, rectangles at their corners
+    and the midpoints of their sides.
+    """
+    if isinstance(obj, Line):
+        x1, y1, x2, y2 = obj.start.x, obj.start.y, obj.end.x, obj.end.y
+        return ((x1, y1, "endpoint"), (x2, y2, "endpoint"), ((x1 + x2) / 2, (y1 + y2) / 2, "midpoint"))
+    if isinstance(obj, Rectangle):
+        x1, y1, x2, y2 = obj.p1.x, obj.p1.y, obj.p2.x, obj.p2.y
+        mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+        return ((x1, y1, "corner"), (x2, y1, "corner"), (x2, y2, "corner"), (x1, y2, "corner"),
+                (mx, y1, "midpoint"), (x2, my, "midpoint"), (mx, y2, "midpoint"), (x1, my, "midpoint"))
+    return ()
+
+
+class SnapIndex:
+    """Nearest-point lookup over the snap points of a drawing's entities.
+
+    Each entity is filed in the grid cells that hold its snap points, and
+    its points are kept as they were when it was inserted, so update() after
+    an edit only touches that entity's cells.
+
+    A lookup searches rings of cells around the cursor, nearest first, and
+    stops as soon as the rings searched cover the best point found so far
+    (or the whole snap radius). Where the cursor is in empty space and no
+    point turns up within max_ring rings, it repeats the search on a grid
+    with cells twice as large, and so on; the coarser grids are built on
+    first use (or by prepare()) by merging the cells of the next finer one,
+    and from then on maintained like the base grid. A lookup therefore visits at most
+    (2 * max_ring + 1) ** 2 cells per grid level, whatever the zoom.
+    """
+
+    def __init__(self, cell_size=1.0, max_ring=2):
+        self.cell_size = cell_size
+        self.max_ring = max_ring
+        self.clear()
+
+    def clear(self):
+        self._levels = [{}]  # level k: {(cx, cy): {id(obj): obj}} with cells of cell_size * 2**k
+        self._points = {}    # id(obj) -> snap points of obj when it was inserted
+        self.point_count = 0
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell_keys(self, level, points):
+        size = self.cell_size * 2 ** level
+        return {(math.floor(x / size), math.floor(y / size)) for x, y, _ in points}
+
+    def insert(self, obj):
+        points = snap_points(obj)
+        key = id(obj)
+        self._points[key] = points
+        self.point_count += len(points)
+        for level, cells in enumerate(self._levels):
+            for cell_key in self._cell_keys(level, points):
+                cells.setdefault(cell_key, {})[key] = obj
+
+    def remove(self, obj):
+        key = id(obj)
+        points = self._points.pop(key, None)
+        if points is None:
+            return
+        self.point_count -= len(points)
+        for level, cells in enumerate(self._levels):
+            for cell_key in self._cell_keys(level, points):
+                cell = cells[cell_key]
+                del cell[key]
+                if not cell:
+                    del cells[cell_key]
+
+    def update(self, obj):
+        self.remove(obj)
+        self.insert(obj)
+
+    def _level_cells(self, level):
+        while len(self._levels) <= level:
+            # Halving a cell coordinate (rounding down) gives the cell of the
+            # same points in a grid of twice the cell size
+            coarse = {}
+            for (cx, cy), cell in self._levels[-1].items():
+                coarse_key = (cx >> 1, cy >> 1)
+                if coarse_key in coarse:
+                    coarse[coarse_key].update(cell)
+                else:
+                    coarse[coarse_key] = dict(cell)
+            self._levels.append(coarse)
+        return self._levels[level]
+
+    def prepare(self, radius):
+        """Build the grid levels lookups within radius may need, so that none
+        is built during a lookup."""
+        level = 0
+        while self.cell_size * 2 ** level * self.max_ring < radius:
+            level += 1
+        self._level_cells(level)
+
+    def nearest(self, x, y, radius):
+        """(x, y, kind, obj) of the snap point closest to (x, y) within radius, or None."""
+        level = 0
+        while True:
+            size = self.cell_size * 2 ** level
+            done, best = self._ring_search(self._level_cells(level), size, x, y, radius)
+            if done:
+                return best
+            level += 1
+
+    def _ring_search(self, cells, size, x, y, radius):
+        # (True, nearest point or None) once settled within max_ring rings, else (False, None)
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        # Distance from (x, y) to the nearest side of its own cell
+        margin = min(x - cx * size, (cx + 1) * size - x, y - cy * size, (cy + 1) * size - y)
+        points = self._points
+        seen = set()
+        best = None
+        best_distance = radius
+        for ring in range(self.max_ring + 1):
+            if ring == 0:
+                ring_cells = [(cx, cy)]
+            else:
+                ring_cells = [(cx + i, cy - ring) for i in range(-ring, ring + 1)]
+                ring_cells += [(cx + i, cy + ring) for i in range(-ring, ring + 1)]
+                ring_cells += [(cx - ring, cy + j) for j in range(-ring + 1, ring)]
+                ring_cells += [(cx + ring, cy + j) for j in range(-ring + 1, ring)]
+            for cell_key in ring_cells:
+                cell = cells.get(cell_key)
+                if cell is None:
+                    continue
+                for key, obj in cell.items():
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    for px, py, kind in points[key]:
+                        distance = math.hypot(px - x, py - y)
+                        if distance <= best_distance:
+                            best, best_distance = (px, py, kind, obj), distance
+            # Every point closer than covered lies in the rings searched so far
+            covered = margin + ring * size
+            if covered >= best_distance:
+                return True, best
+        return False, None
+
+
+def snap_to_grid(x, y, spacing, radius):
+    """(x, y) of the grid intersection nearest to (x, y) if within radius, else None."""
+    gx, gy = round(x / spacing) * spacing, round(y / spacing) * spacing
+    if math.hypot(gx - x, gy - y) <= radius:
+        return gx, gy
+    return None
+
+
+def snap(x, y, radius, snap_index=None, grid_spacing=None):
+    """(x, y, kind) for the cursor at (x, y): the nearest entity snap point or
+    the origin within radius, else the nearest grid intersection within
+    radius (if grid_spacing is given), else (x, y, None)."""
+    best = None
+    if snap_index is not None:
+        best = snap_index.nearest(x, y, radius)
+    origin_distance = math.hypot(x, y)
+    if origin_distance <= radius and (best is None or origin_distance < math.hypot(best[0] - x, best[1] - y)):
+        return 0.0, 0.0, "origin"
+    if best is not None:
+        return best[0], best[1], best[2]
+    if grid_spacing is not None:
+        grid_point = snap_to_grid(x, y, grid_spacing, radius)
+        if grid_point is not None:
+            return grid_point[0], grid_point[1], "grid"
+    return x, y, None
@@ -0,0 +1,212 @@
+import heapq
+import math
+
+
+class SpatialIndex:
+    """Uniform grid over entity bounding boxes.
+
+    Every entity is registered in each grid cell its bounding box overlaps, so
+    window queries and nearest-entity lookups only visit the cells around the
+    query instead of the whole drawing. Entities spanning more than
+    ``max_cells_per_entity`` cells are kept in a separate list that every query
+    checks, which keeps a few huge entities from flooding the grid.
+    """
+
+    def __init__(self, cell_size=10.0, max_cells_per_entity=256):
+        self.cell_size = cell_size
+        self.max_cells_per_entity = max_cells_per_entity
+        self.clear()
+
+    def clear(self):
+        self._cells = {}     # (cx, cy) -> {id(obj): obj}
+        self._oversized = {} # id(obj) -> obj
+        self._entries = {}   # id(obj) -> (bbox, cell range or None)
+        self._extent = None  # cell range ever occupied; only grows until clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, obj):
+        return id(obj) in self._entries
+
+    def _cell_range(self, min_x, min_y, max_x, max_y):
+        size = self.cell_size
+        return (math.floor(min_x / size), math.floor(min_y / size),
+                math.floor(max_x / size), math.floor(max_y / size))
+
+    def insert(self, obj):
+        bbox = obj.bounding_box()
+        cx1, cy1, cx2, cy2 = cell_range = self._cell_range(*bbox)
+        key = id(obj)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > self.max_cells_per_entity:
+            self._oversized[key] = obj
+            cell_range = None
+        else:
+            if self._extent is None:
+                self._extent = cell_range
+            else:
+                ex1, ey1, ex2, ey2 = self._extent
+                self._extent = (min(ex1, cx1), min(ey1, cy1), max(ex2, cx2), max(ey2, cy2))
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self._cells.setdefault((cx, cy), {})[key] = obj
+        self._entries[key] = (bbox, cell_range)
+
+    def remove(self, obj):
+        key = id(obj)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        cell_range = entry[1]
+        if cell_range is None:
+            del self._oversized[key]
+            return
+        cx1, cy1, cx2, cy2 = cell_range
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self._cells[(cx, cy)]
+                del cell[key]
+                if not cell:
+                    del self._cells[(cx, cy)]
+
+    def update(self, obj):
+        # Call after an edit changed the geometry of obj
+        self.remove(obj)
+        self.insert(obj)
+
+    def bounding_box(self, obj):
+        return self._entries[id(obj)][0]
+
+    def _candidate_cells(self, cx1, cy1, cx2, cy2):
+        # When zoomed far out the query covers more cells than are occupied;
+        # walking the occupied cells is then cheaper.
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._cells):
+            return [cell for (cx, cy), cell in self._cells.items()
+                    if cx1 <= cx <= cx2 and cy1 <= cy <= cy2]
+        cells = self._cells
+        return [cells[(cx, cy)] for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)
+                if (cx, cy) in cells]
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """Entities whose bounding box intersects the given window."""
+        found = {}
+        for cell in self._candidate_cells(*self._cell_range(min_x, min_y, max_x, max_y)):
+            found.update(cell)
+        found.update(self._oversized)
+
+        entries = self._entries
+        result = []
+        for key, obj in found.items():
+            bx1, by1, bx2, by2 = entries[key][0]
+            if bx1 <= max_x and bx2 >= min_x and by1 <= max_y and by2 >= min_y:
+                result.append(obj)
+        return result
+
+    def nearest(self, x, y, max_distance=None):
+        """Entity closest to (x, y), or None if nothing lies within max_distance."""
+        if not self._entries:
+            return None
+
+        best = None
+        best_distance = math.inf if max_distance is None else max_distance
+        for obj in self._oversized.values():
+            distance = obj.distance_to(x, y)
+            if distance <= best_distance:
+                best, best_distance = obj, distance
+
+        if self._cells:
+            # Best-first search over the cells of the occupied extent, nearest
+            # cell first, starting from the one nearest to (x, y) and growing
+            # through neighbouring cells, until the next cell is farther away
+            # than the best match found so far. A query far outside the
+            # drawing thus starts at its edge instead of walking the empty
+            # cells in between.
+            ex1, ey1, ex2, ey2 = self._extent
+            cx, cy = self._cell_range(x, y, x, y)[:2]
+            start = (min(max(cx, ex1), ex2), min(max(cy, ey1), ey2))
+            heap = [(self._cell_distance(x, y, *start), start)]
+            queued = {start}
+            # Once as many cells have been visited as are occupied, checking
+            # every occupied cell is cheaper
+            budget = len(self._cells)
+            seen = set()
+            while heap:
+                cell_distance, (cx, cy) = heapq.heappop(heap)
+                if cell_distance > best_distance:
+                    break
+                budget -= 1
+                cells = [(cx, cy)] if budget >= 0 else self._cells
+                for cell_key in cells:
+                    for key, obj in self._cells.get(cell_key, {}).items():
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        distance = obj.distance_to(x, y)
+                        if distance <= best_distance:
+                            best, best_distance = obj, distance
+                if budget < 0:
+                    break
+                for neighbour in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+                    if neighbour not in queued and ex1 <= neighbour[0] <= ex2 and ey1 <= neighbour[1] <= ey2:
+                        queued.add(neighbour)
+                        heapq.heappush(heap, (self._cell_distance(x, y, *neighbour), neighbour))
+        return best
+
+    def _cell_distance(self, x, y, cx, cy):
+        # Distance from (x, y) to the nearest point of cell (cx, cy)
+        size = self.cell_size
+        dx = max(cx * size - x, 0.0, x - (cx + 1) * size)
+        dy = max(cy * size - y, 0.0, y - (cy + 1) * size)
+        return math.hypot(dx, dy)
+
+
+class PointHash:
+    """Points filed by their coordinates quantised to cells twice the tolerance.
+
+    near() finds the points within tolerance of a position (on each axis) by
+    looking at the 3 x 3 cells around it, so its cost depends on how many
+    points lie there rather than on how crowded the surrounding area is.
+    Points are stored under a key chosen by the caller.
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.clear()
+
+    def clear(self):
+        self._cells = {}   # (qx, qy) -> {key: (x, y)}
+        self._entries = {} # key -> its cell
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell(self, x, y):
+        size = 2 * self.tolerance
+        return math.floor(x / size), math.floor(y / size)
+
+    def insert(self, key, x, y):
+        self.remove(key)
+        cell = self._cell(x, y)
+        self._cells.setdefault(cell, {})[key] = (x, y)
+        self._entries[key] = cell
+
+    def remove(self, key):
+        cell = self._entries.pop(key, None)
+        if cell is None:
+            return
+        points = self._cells[cell]
+        del points[key]
+        if not points:
+            del self._cells[cell]
+
+    def near(self, x, y):
+        """Keys of the points within tolerance of (x, y) on both axes."""
+        tolerance = self.tolerance
+        qx, qy = self._cell(x, y)
+        result = []
+        for cx in (qx - 1, qx, qx + 1):
+            for cy in (qy - 1, qy, qy + 1):
+                for key, (px, py) in self._cells.get((cx, cy), {}).items():
+                    if abs(px - x) <= tolerance and abs(py - y) <= tolerance:
+                        result.append(key)
+        return result
@@ -0,0 +1,146 @@
+"""Streaming SVG import and export.
+
+<line> elements become Line objects and <rect> elements Rectangle objects.
+<polyline> and <polygon> elements are read like DXF LWPOLYLINEs: closed
+axis-aligned quadrilaterals become rectangles, anything else one line per
+segment. Transforms and units are not interpreted.
+
+SVG's y axis points down while the CAD y axis points up, so y coordinates
+are negated in both directions.
+"""
+
+import xml.etree.ElementTree as ET
+
+from drawing_io import ProgressReporter, stream_size
+from dxf_io import _polyline_entities
+from geometry import Point, Line, Rectangle
+
+SVG_NS = "http://www.w3.org/2000/svg"
+
+# Room reserved in the header for the viewBox, patched once the bounds are known
+_VIEWBOX_PLACEHOLDER = " " * 128
+
+
+class _CountingReader:
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_done = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.bytes_done += len(data)
+        return data
+
+
+def _attr(element, name):
+    return float(element.get(name, 0))
+
+
+def _points(element):
+    numbers = [float(n) for n in element.get("points", "").replace(",", " ").split()]
+    return [(x, -y) for x, y in zip(numbers[0::2], numbers[1::2])]
+
+
+def _element_entities(tag, element):
+    if tag == "line":
+        yield Line(Point(_attr(element, "x1"), -_attr(element, "y1")),
+                   Point(_attr(element, "x2"), -_attr(element, "y2")))
+    elif tag == "rect":
+        x, y = _attr(element, "x"), _attr(element, "y")
+        yield Rectangle(Point(x, -y - _attr(element, "height")), Point(x + _attr(element, "width"), -y))
+    elif tag in ("polyline", "polygon"):
+        yield from _polyline_entities(_points(element), tag == "polygon")
+
+
+def read_svg(fileobj, progress=None):
+    """Yield the Line and Rectangle entities of a binary-mode SVG stream."""
+    reader = _CountingReader(fileobj)
+    reporter = ProgressReporter(progress, stream_size(fileobj), lambda: reader.bytes_done)
+    open_elements = []
+    for event, element in ET.iterparse(reader, events=("start", "end")):
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        tag = element.tag.rpartition("}")[2]
+        for entity in _element_entities(tag, element):
+            yield entity
+            reporter.entity_done()
+        # Detach finished elements so the tree only ever holds the open path
+        if open_elements:
+            open_elements[-1].remove(element)
+    reporter.finish()
+
+
+def svg_header(bounding_box=None):
+    """The opening <svg> tag, with a viewBox if bounding_box is given.
+
+    Its length does not depend on bounding_box, so write_svg can patch the
+    viewBox in afterwards.
+    """
+    viewbox = ""
+    if bounding_box is not None:
+        min_x, min_y, max_x, max_y = bounding_box
+        viewbox = f' viewBox="{min_x!r} {-max_y!r} {max_x - min_x!r} {max_y - min_y!r}"'
+    return f'<svg xmlns="{SVG_NS}"{viewbox.ljust(len(_VIEWBOX_PLACEHOLDER))} fill="none" stroke-width="1">\n'
+
+
+SVG_FOOTER = "</svg>\n"
+
+
+def svg_element(obj):
+    """The SVG element of a Line or Rectangle, or None for anything else."""
+    if isinstance(obj, Line):
+        return (f'<line x1="{obj.start.x!r}" y1="{-obj.start.y!r}" '
+                f'x2="{obj.end.x!r}" y2="{-obj.end.y!r}" stroke="blue"/>\n')
+    if isinstance(obj, Rectangle):
+        x, y = min(obj.p1.x, obj.p2.x), max(obj.p1.y, obj.p2.y)
+        return (f'<rect x="{x!r}" y="{-y!r}" width="{obj.width()!r}" '
+                f'height="{obj.height()!r}" stroke="green"/>\n')
+    return None
+
+
+def write_svg(objects, fileobj, progress=None):
+    """Write objects to a text-mode stream as SVG and return the entity count.
+
+    When the stream is seekable, a viewBox covering all entities is written
+    into space reserved in the header.
+    """
+    reporter = ProgressReporter(progress)
+    write = fileobj.write
+    try:
+        start = fileobj.tell()
+    except (AttributeError, OSError):
+        start = None
+    write(svg_header())
+
+    min_x = min_y = float("inf")
+    max_x = max_y = float("-inf")
+    for obj in objects:
+        element = svg_element(obj)
+        if element is None:
+            continue
+        write(element)
+        bx1, by1, bx2, by2 = obj.bounding_box()
+        min_x, min_y = min(min_x, bx1), min(min_y, by1)
+        max_x, max_y = max(max_x, bx2), max(max_y, by2)
+        reporter.entity_done()
+    write(SVG_FOOTER)
+
+    if start is not None and reporter.entities:
+        end = fileobj.tell()
+        fileobj.seek(start)
+        fileobj.write(svg_header((min_x, min_y, max_x, max_y)))
+        fileobj.seek(end)
+    reporter.finish()
+    return reporter.entities
+
+
+def load(path, progress=None):
+    with open(path, "rb") as f:
+        yield from read_svg(f, progress)
+
+
+def save(path, objects, progress=None):
+    with open(path, "w") as f:
+        return write_svg(objects, f, progress)
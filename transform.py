@@ -0,0 +1,19 @@
+from _lazy import load_numpy
+
+# Below this many points the NumPy call overhead outweighs the vectorised arithmetic
+_NUMPY_MIN_POINTS = 64
+
+
+def world_to_screen(xs, ys, scale, offset_x, offset_y):
+    """Map sequences of CAD coordinates to canvas coordinates in one pass.
+
+    Accepts lists, array('d') columns or NumPy arrays and returns two lists of
+    floats, ready to be passed to the Tk canvas.
+    """
+    np = load_numpy() if len(xs) >= _NUMPY_MIN_POINTS else None
+    if np is not None:
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        return (offset_x + xs * scale).tolist(), (offset_y - ys * scale).tolist()
+    return [offset_x + x * scale for x in xs], [offset_y - y * scale for y in ys]
+